@@ -0,0 +1,2 @@
+from .runner import Benchmark, run_cases, compare_results, load_results, save_results
+from .cases import default_cases
@@ -0,0 +1,31 @@
+import argparse, sys
+
+from .runner import run_cases, compare_results, load_results, save_results
+from .cases import default_cases
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(
+		prog='python -m quick_sqlite3.benchmark', 
+		description='Benchmark SimpleClient and ClCommander')
+	parser.add_argument('--rows', type=int, default=10000, help='rows of the benchmark table')
+	parser.add_argument('--database', choices=['memory', 'file'], default='memory', help='benchmark against :memory: or a temp file')
+	parser.add_argument('--repeat', type=int, default=3, help='run every case n times and report the best')
+	parser.add_argument('--case', action='append', help='only run the named case, can be repeated')
+	parser.add_argument('--output', help='save results into a JSON file')
+	parser.add_argument('--compare', help='compare with results saved by a previous run')
+	parser.add_argument('--threshold', type=float, default=0.1, help='slowdown ratio reported as regression')
+	args = parser.parse_args(argv)
+
+	database = ':memory:' if args.database == 'memory' else 'file'
+	results = run_cases(default_cases(args.rows, database), args.repeat, args.case)
+	if args.output:
+		save_results(results, args.output)
+	if args.compare:
+		lines, regressions = compare_results(load_results(args.compare), results, args.threshold)
+		print('\n'.join(lines))
+		if regressions:
+			return 1
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main())
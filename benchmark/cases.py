@@ -0,0 +1,184 @@
+import os, sqlite3, random, datetime
+
+from ..client import SimpleClient
+from ..commander import ClCommander
+from .runner import Benchmark
+
+def make_client(workdir, database, **kwargs):
+	if database != ':memory:':
+		database = os.path.join(workdir, 'bench.db')
+	return SimpleClient(database=database, enable_debug=False, **kwargs)
+
+def make_table(client, rows):
+	client.create_table('bench', (('name', 's'), ('age', 'i'), ('score', 'f')))
+	client.insert_many_table('bench', (
+		{'name': 'name%d' % i, 'age': i % 100, 'score': i * 0.5} for i in range(rows)))
+	return client
+
+def close_client(client):
+	client.close()
+
+def default_cases(rows=10000, database=':memory:'):
+	'''
+	rows 		-> the number of rows in the benchmark table
+	database 	-> ':memory:' or 'file', file databases are created in a temp dir
+	'''
+	def client_with_table(workdir):
+		return make_table(make_client(workdir, database), rows)
+
+	def fast_client_with_table(workdir, **kwargs):
+		return make_table(make_client(workdir, database, enable_fast_rows=True, **kwargs), rows)
+
+	def client_with_empty_table(workdir):
+		client = make_client(workdir, database)
+		client.create_table('bench', (('name', 's'), ('age', 'i'), ('score', 'f')))
+		return client
+
+	def insert_table(client):
+		for i in range(rows):
+			client.insert_table('bench', {'name': 'name%d' % i, 'age': i % 100, 'score': i * 0.5})
+		client.commit()
+		return rows
+
+	def insert_many_table(client):
+		client.insert_many_table('bench', (
+			{'name': 'name%d' % i, 'age': i % 100, 'score': i * 0.5} for i in range(rows)))
+		return rows
+
+	def insert_many_table_multi_values(client):
+		client.insert_many_table('bench', (
+			('name%d' % i, i % 100, i * 0.5) for i in range(rows)),
+			columns=('name', 'age', 'score'),
+			multi_values=True)
+		return rows
+
+	def select_table(client):
+		return len(client.select_table('bench'))
+
+	def fetch_rows(client):
+		# per row materialization cost of SELECT *
+		return len(client.fetchall('SELECT * FROM bench'))
+
+	def select_table_stream(client):
+		count = 0
+		for row in client.iter_table('bench'):
+			count += 1
+		return count
+
+	def select_table_pages(client):
+		count = 0
+		page_num = 100
+		for page_nth in range(1, rows // page_num + 1):
+			count += len(client.select_table('bench', page_nth=page_nth, page_num=page_num))
+		return count
+
+	def seek_table_pages(client):
+		count = 0
+		rows_, token = client.seek_table('bench', page_num=100)
+		count += len(rows_)
+		while token:
+			rows_, token = client.seek_table('bench', page_num=100, cursor=token)
+			count += len(rows_)
+		return count
+
+	def count_table(client):
+		n = 1000
+		for i in range(n):
+			client.count_table('bench', (('age', i % 100, '>'),))
+		return n
+
+	def id_table(client):
+		generator = random.Random(0) # reproducible ids
+		ids = [generator.randint(1, rows) for i in range(rows)]
+		for item_id in ids:
+			client.id_table('bench', item_id)
+		return len(ids)
+
+	def custom_function(client):
+		return len(client.sql('SELECT md5sum(name), strip(name) FROM bench', None))
+
+	def custom_aggregate(client):
+		client.sql('SELECT age, "join"(name) FROM bench GROUP BY age', None)
+		return rows
+
+	def custom_collation(client):
+		return len(client.sql('SELECT name FROM bench ORDER BY name COLLATE reverse', None))
+
+	def client_with_datetime_table(workdir):
+		client = make_client(workdir, database)
+		client.create_table('events', (('created', 'i'),))
+		now = datetime.datetime.now().replace(microsecond=0)
+		client.insert_many_table('events', ((now,) for i in range(rows)), columns=('created',))
+		return client
+
+	def custom_type_adapt(client):
+		now = datetime.datetime.now()
+		client.insert_many_table('events', ((now,) for i in range(rows)), columns=('created',))
+		return rows
+
+	def custom_type_convert(client):
+		return len(client.sql('SELECT created AS "created [datetime]" FROM events', None))
+
+	def source_database(workdir):
+		path = os.path.join(workdir, 'source.db')
+		make_table(SimpleClient(database=path, enable_debug=False), rows).close()
+		commander = ClCommander(None)
+		commander.connect_database()
+		return (commander, sqlite3.connect(path), workdir)
+
+	def close_commander(state):
+		commander, con, workdir = state
+		con.close()
+		commander.con.close()
+
+	def commander_load(state):
+		commander, con, workdir = state
+		response = commander.load_database(con)
+		if not commander.is_ok_status(response):
+			raise Exception(commander.get_body(response))
+		return rows
+
+	def commander_load_sql(state):
+		commander, con, workdir = state
+		response = commander.load_database(con, 'sql')
+		if not commander.is_ok_status(response):
+			raise Exception(commander.get_body(response))
+		return rows
+
+	def loaded_commander(workdir):
+		state = source_database(workdir)
+		commander_load(state)
+		return state
+
+	def commander_dump(state):
+		commander, con, workdir = state
+		response = commander.dump_database(os.path.join(workdir, 'dump.sql'))
+		if not commander.is_ok_status(response):
+			raise Exception(commander.get_body(response))
+		return rows
+
+	return [
+		Benchmark('insert_table', insert_table, client_with_empty_table, close_client),
+		Benchmark('insert_many_table', insert_many_table, client_with_empty_table, close_client),
+		Benchmark('insert_many_table_multi_values', insert_many_table_multi_values, client_with_empty_table, close_client),
+		Benchmark('select_table', select_table, client_with_table, close_client),
+		Benchmark('fetch_rows', fetch_rows, client_with_table, close_client),
+		Benchmark('fetch_rows_fast_tuple', fetch_rows, fast_client_with_table, close_client),
+		Benchmark('fetch_rows_fast_namedtuple', fetch_rows, 
+			lambda workdir: fast_client_with_table(workdir, fast_row_class='namedtuple'), close_client),
+		Benchmark('fetch_rows_fast_interned', fetch_rows, 
+			lambda workdir: fast_client_with_table(workdir, intern_text_size=100000), close_client),
+		Benchmark('select_table_stream', select_table_stream, client_with_table, close_client),
+		Benchmark('select_table_pages', select_table_pages, client_with_table, close_client),
+		Benchmark('seek_table_pages', seek_table_pages, client_with_table, close_client),
+		Benchmark('count_table', count_table, client_with_table, close_client),
+		Benchmark('id_table', id_table, client_with_table, close_client),
+		Benchmark('custom_function', custom_function, client_with_table, close_client),
+		Benchmark('custom_aggregate', custom_aggregate, client_with_table, close_client),
+		Benchmark('custom_collation', custom_collation, client_with_table, close_client),
+		Benchmark('custom_type_adapt', custom_type_adapt, client_with_datetime_table, close_client),
+		Benchmark('custom_type_convert', custom_type_convert, client_with_datetime_table, close_client),
+		Benchmark('commander_load_database', commander_load, source_database, close_commander),
+		Benchmark('commander_load_database_sql', commander_load_sql, source_database, close_commander),
+		Benchmark('commander_dump_database', commander_dump, loaded_commander, close_commander),
+	]
@@ -0,0 +1,121 @@
+import time, tracemalloc, json, tempfile, shutil, platform, sqlite3, datetime
+
+class Benchmark(object):
+	'''
+	A benchmark case.
+
+	name 	-> case name
+	setup 	-> setup(workdir) return a state object passed to run, optional
+	run 	-> run(state) return the number of operations done
+	teardown -> teardown(state), optional
+	'''
+
+	def __init__(self, name, run, setup=None, teardown=None):
+		self.name = name
+		self.run = run
+		self.setup = setup
+		self.teardown = teardown
+
+	def once(self, workdir, trace_memory=False):
+		state = self.setup(workdir) if self.setup else None
+		try:
+			if trace_memory:
+				tracemalloc.start()
+			start = time.perf_counter()
+			ops = self.run(state)
+			seconds = time.perf_counter() - start
+			peak = 0
+			if trace_memory:
+				peak = tracemalloc.get_traced_memory()[1]
+				tracemalloc.stop()
+		finally:
+			if trace_memory and tracemalloc.is_tracing():
+				tracemalloc.stop()
+			if self.teardown:
+				self.teardown(state)
+		return (ops, seconds, peak)
+
+def run_cases(cases, repeat=3, names=None, verbose=True):
+	'''
+	Run every case repeat times(the best is reported) and one more time
+	with tracemalloc to measure peak memory.
+
+	Return:
+
+		{'meta': {...}, 'results': {name: {'ops', 'seconds', 'ops_per_sec', 'peak_memory'}}}
+	'''
+	results = {}
+	for case in cases:
+		if names and case.name not in names:
+			continue
+		best = None
+		for i in range(repeat):
+			workdir = tempfile.mkdtemp(prefix='quick_sqlite3_bench_')
+			try:
+				ops, seconds, peak = case.once(workdir)
+			finally:
+				shutil.rmtree(workdir, ignore_errors=True)
+			if best is None or seconds < best[1]:
+				best = (ops, seconds)
+		workdir = tempfile.mkdtemp(prefix='quick_sqlite3_bench_')
+		try:
+			peak = case.once(workdir, True)[2]
+		finally:
+			shutil.rmtree(workdir, ignore_errors=True)
+		ops, seconds = best
+		results[case.name] = {
+			'ops': ops,
+			'seconds': seconds,
+			'ops_per_sec': ops / seconds if seconds > 0 else 0.0,
+			'peak_memory': peak,
+		}
+		if verbose:
+			print(format_result(case.name, results[case.name]))
+	return {
+		'meta': {
+			'time': datetime.datetime.now().isoformat(),
+			'python': platform.python_version(),
+			'sqlite': sqlite3.sqlite_version,
+			'platform': platform.platform(),
+			'repeat': repeat,
+		},
+		'results': results,
+	}
+
+def format_result(name, result):
+	return '{:<36} {:>12.1f} ops/sec {:>10.4f}s {:>10.1f} KiB peak'.format(
+		name, result['ops_per_sec'], result['seconds'], result['peak_memory'] / 1024.0)
+
+def save_results(results, path):
+	with open(path, 'w', encoding='utf8') as f:
+		json.dump(results, f, indent=2, sort_keys=True)
+
+def load_results(path):
+	with open(path, 'r', encoding='utf8') as f:
+		return json.load(f)
+
+def compare_results(base, current, threshold=0.1):
+	'''
+	Compare ops/sec of two runs, a case is a regression when it's slower than
+	base by more than threshold(0.1 = 10%).
+
+	Return:
+
+		(lines, regressions), lines are printable comparison rows
+	'''
+	lines = ['{:<36} {:>12} {:>12} {:>8}'.format('case', 'base', 'current', 'change')]
+	regressions = []
+	base_results = base.get('results', {})
+	for name, result in sorted(current.get('results', {}).items()):
+		if name not in base_results:
+			lines.append('{:<36} {:>12} {:>12.1f} {:>8}'.format(name, '-', result['ops_per_sec'], 'new'))
+			continue
+		old = base_results[name]['ops_per_sec']
+		new = result['ops_per_sec']
+		change = (new - old) / old if old else 0.0
+		flag = ''
+		if change < -threshold:
+			flag = ' REGRESSION'
+			regressions.append(name)
+		lines.append('{:<36} {:>12.1f} {:>12.1f} {:>+7.1%}{}'.format(name, old, new, change, flag))
+	return (lines, regressions)
@@ -1 +1,4 @@
-from .simple_client import SimpleClient
\ No newline at end of file
+from .simple_client import SimpleClient
+from .async_client import AsyncSimpleClient
+from .sharded_client import ShardedClient
+from .conditions import Expression
\ No newline at end of file
@@ -0,0 +1,253 @@
+import asyncio, contextlib, functools, itertools, threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .simple_client import SimpleClient
+
+class Worker(object):
+	'''
+	A dedicated thread owns a SimpleClient, every operation of the
+	client runs on this thread and its only connection(pool_size and 
+	enable_write_queue are not supported).
+	'''
+
+	def __init__(self, name, kwargs):
+		if kwargs.get('pool_size', 0) > 0 or kwargs.get('enable_write_queue', False):
+			raise Exception('pool_size and enable_write_queue are not supported by worker threads')
+		self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+		self.client = self.executor.submit(SimpleClient, **kwargs).result()
+		# the number of open streams(cursors) on the connection
+		self.streams = 0
+		self.running = None
+		self.lock = threading.Lock()
+
+	def submit(self, func, *args, **kwargs):
+		'''
+		Run func on the worker thread, return a concurrent.futures.Future.
+		'''
+		return self.executor.submit(func, *args, **kwargs)
+
+	def track(self, token, func):
+		with self.lock:
+			self.running = token
+		try:
+			return func()
+		finally:
+			with self.lock:
+				self.running = None
+
+	def interrupt(self, token):
+		'''
+		Interrupt the statement of the call token if it's still running, 
+		it's skipped when streams have open statements on the connection 
+		since the interrupt would abort them too.
+		'''
+		with self.lock:
+			if self.running is token and not self.streams:
+				self.client.client.interrupt()
+
+	async def run(self, func, *args, **kwargs):
+		'''
+		Run func on the worker thread. When the awaiting task is cancelled, 
+		a queued call never runs and the running SQL statement of the call 
+		will be interrupted.
+		'''
+		token = object()
+		future = self.executor.submit(self.track, token, functools.partial(func, *args, **kwargs))
+		waiter = asyncio.wrap_future(future)
+		try:
+			return await asyncio.shield(waiter)
+		except asyncio.CancelledError:
+			if future.cancel():
+				raise
+			self.interrupt(token)
+			try:
+				await waiter
+			except Exception:
+				pass
+			raise
+
+	def close(self, commit=True):
+		self.executor.submit(self.client.close, commit).result()
+		self.executor.shutdown()
+
+class AsyncSimpleClient(object):
+	'''
+	Asyncio version of SimpleClient, accept the same arguments as SimpleClient.
+
+	Write operations run on one writer thread, read operations run on
+	reader_threads threads(each one has its own connection), when reader_threads
+	is 0 or database is :memory:, reads share the writer thread.
+
+	Readers only see committed changes of the writer. pool_size and 
+	enable_write_queue are not supported, every thread has one connection.
+
+	Example:
+
+		client = AsyncSimpleClient(database='test.db', reader_threads=4)
+		rows = await client.select_table('user')
+		async for row in client.iter_table('user'):
+			print(row['username'])
+		await client.close()
+	'''
+
+	def __init__(self, reader_threads=0, **kwargs):
+		self.writer = Worker('sqlite3-writer', kwargs)
+		self.readers = []
+		if self.writer.client.database != ':memory:':
+			for i in range(reader_threads):
+				self.readers.append(Worker('sqlite3-reader-%d' % i, kwargs))
+		self.writer_lock = asyncio.Lock()
+		# the number of readers reserved by streams
+		self.stream_readers = 0
+		self.idle_readers = asyncio.Queue()
+		for reader in self.readers:
+			self.idle_readers.put_nowait(reader)
+
+	def readers_streaming(self):
+		# every reader is reserved by a stream, reads go to the writer
+		return self.stream_readers == len(self.readers)
+
+	@contextlib.asynccontextmanager
+	async def worker(self, write=False):
+		if write or self.readers_streaming():
+			async with self.writer_lock:
+				yield self.writer
+		else:
+			reader = await self.idle_readers.get()
+			try:
+				yield reader
+			finally:
+				self.idle_readers.put_nowait(reader)
+
+	async def call(self, method, *args, write=False, **kwargs):
+		async with self.worker(write) as worker:
+			return await worker.run(getattr(worker.client, method), *args, **kwargs)
+
+	async def sql(self, sql, params, autocommit=True):
+		write = not sql.upper().strip().startswith('SELECT')
+		return await self.call('sql', sql, params, autocommit, write=write)
+
+	async def script(self, sql_statements, autocommit=True):
+		return await self.call('script', sql_statements, autocommit, write=True)
+
+	async def create_table(self, *args, **kwargs):
+		return await self.call('create_table', *args, write=True, **kwargs)
+
+	async def drop_table(self, *args, **kwargs):
+		return await self.call('drop_table', *args, write=True, **kwargs)
+
+	async def insert_table(self, *args, **kwargs):
+		return await self.call('insert_table', *args, write=True, **kwargs)
+
+	async def insert_many_table(self, *args, **kwargs):
+		return await self.call('insert_many_table', *args, write=True, **kwargs)
+
+	async def import_file(self, *args, **kwargs):
+		return await self.call('import_file', *args, write=True, **kwargs)
+
+	async def update_table(self, *args, **kwargs):
+		return await self.call('update_table', *args, write=True, **kwargs)
+
+	async def count_table(self, *args, **kwargs):
+		return await self.call('count_table', *args, **kwargs)
+
+	async def id_table(self, *args, **kwargs):
+		return await self.call('id_table', *args, **kwargs)
+
+	async def one_table(self, *args, **kwargs):
+		return await self.call('one_table', *args, **kwargs)
+
+	async def select_table(self, *args, **kwargs):
+		kwargs.pop('stream', None)
+		return await self.call('select_table', *args, **kwargs)
+
+	async def seek_table(self, *args, **kwargs):
+		return await self.call('seek_table', *args, **kwargs)
+
+	async def commit(self):
+		return await self.call('commit', write=True)
+
+	async def rollback(self):
+		return await self.call('rollback', write=True)
+
+	async def stream_worker(self):
+		# a stream reserves a reader until it's closed, so calls of other 
+		# coroutines never run(or get interrupted) on its connection
+		if self.readers_streaming():
+			worker = self.writer
+		else:
+			self.stream_readers += 1
+			try:
+				worker = await self.idle_readers.get()
+			except BaseException:
+				self.stream_readers -= 1
+				raise
+		worker.streams += 1
+		return worker
+
+	def release_stream_worker(self, worker):
+		worker.streams -= 1
+		if worker is not self.writer:
+			self.stream_readers -= 1
+			self.idle_readers.put_nowait(worker)
+
+	async def run_stream(self, worker, func):
+		if worker is self.writer:
+			async with self.writer_lock:
+				return await worker.run(func)
+		return await worker.run(func)
+
+	async def stream(self, make_rows, batch_size=None):
+		'''
+		make_rows(client) return a rows generator of SimpleClient, the rows 
+		are fetched in batch_size batches on the worker thread.
+
+		A stream reserves a reader until it's closed. When all readers are 
+		reserved(or reader_threads is 0), it shares the writer, which is only 
+		held while a batch is fetched, so the loop body can call the client, 
+		e.g. update the rows it reads. Writes on the writer connection may be 
+		seen by the rest batches when reads share the writer.
+		'''
+		worker = await self.stream_worker()
+		try:
+			batch_size = batch_size if batch_size else worker.client.stream_batch_size
+			rows = make_rows(worker.client)
+			try:
+				while True:
+					batch = await self.run_stream(worker, lambda: list(itertools.islice(rows, batch_size)))
+					if not batch:
+						break
+					for row in batch:
+						yield row
+			finally:
+				# the generator must be closed on the thread it's running
+				await asyncio.shield(self.run_stream(worker, rows.close))
+		finally:
+			self.release_stream_worker(worker)
+
+	def iterate(self, sql, params=None, batch_size=None):
+		'''
+		Async iterate rows of a read statement.
+
+		async for row in client.iterate('SELECT * FROM user WHERE age>?', (30,)):
+			print(row['username'])
+
+		When break the loop early, wrap it with contextlib.aclosing() to close 
+		the cursor immediately instead of waiting for garbage collection.
+		'''
+		return self.stream(lambda client: client.iterate(sql, params, batch_size), batch_size)
+
+	def iter_table(self, 
+		tbl_name, 
+		columns=(), 
+		where_condition=(), 
+		orderby=(), 
+		groupby=(), 
+		batch_size=None):
+		return self.stream(lambda client: client.iter_table(
+			tbl_name, columns, where_condition, orderby, groupby, batch_size), batch_size)
+
+	async def close(self):
+		loop = asyncio.get_running_loop()
+		for worker in self.readers + [self.writer]:
+			await loop.run_in_executor(None, worker.close)
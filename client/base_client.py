@@ -1,8 +1,16 @@
-import sqlite3, datetime, sys, re, copy
+import sqlite3, datetime, sys, re, copy, contextlib, threading
 
 from ..config import readonly_config, writable_config
 from ..commander import SimpleCl
 from ..commander import run_cl_client
+from ..dumper import dump_database
+from .pool import ConnectionPool
+from .writer import WriteQueue
+from .result_cache import ResultCache
+from .metrics import Metrics
+from .columnar import fetch_columns
+from .rows import NamedRowFactory, TextInterner
+from .converters import TypeRegistry
 
 class BaseClient(object):
 
@@ -13,32 +21,90 @@ class BaseClient(object):
 		config.update(kwargs)
 		config.update(readonly_config)
 		self.database = config['database']
-		self.dump = config['dump']
+		self.dump_file = config['dump']
 		self.text_factory = config['text_factory']
 		self.waiting_unlock_timeout = config['waiting_unlock_timeout']
 		self.enable_row_factory = config['enable_row_factory']
+		self.enable_fast_rows = config['enable_fast_rows']
+		self.fast_row_class = config['fast_row_class']
+		self.intern_text_size = config['intern_text_size']
 		self.enable_debug = config['enable_debug']
 		self.enable_autocommit = config['enable_autocommit']
 		self.basic_types = config['basic_types']
 		self.detect_types = config['detect_types']
 		self.position_parameter_placeholder = config['position_parameter_placeholder']
 		self.keyword_parameter_placeholder = config['keyword_parameter_placeholder']
+		self.stream_batch_size = config['stream_batch_size']
+		self.count_mode = config['count_mode']
+		self.trusted_schema = config['trusted_schema']
+		self.recursive_triggers = config['recursive_triggers']
+		self.enable_index_advisor = config['enable_index_advisor']
+		self.cached_sql_statements = config['cached_sql_statements']
 		self.custom_types = {}
+		self.custom_functions = []
+		self.trace_callback = config.get('trace_callback', None)
+		self.pool_size = config['pool_size']
+		self.pool_idle_timeout = config['pool_idle_timeout']
+		self.pool_wait_timeout = config['pool_wait_timeout']
+		self.enable_write_queue = config['enable_write_queue']
+		self.write_queue_batch = config['write_queue_batch']
+		self.client = None
+		self.pool = None
+		self.writer = None
+		self.result_cache = None
+		self.pending_writes = set()
+		# depth of transaction() blocks of the current thread
+		self.transaction_state = threading.local()
+		self.metrics = None
+		self.process_hander = config['process_hander']
+
+		if self.enable_fast_rows and self.fast_row_class not in ['tuple', 'namedtuple']:
+			raise Exception('fast_row_class should be tuple or namedtuple')
+
+		# Adapters and converters of this client, "column [typename]" columns are 
+		# converted by the client instead of the sqlite3 global registry
+		if self.enable_fast_rows:
+			row_mode = self.fast_row_class
+		else:
+			row_mode = 'row' if self.enable_row_factory else 'tuple'
+		self.types = TypeRegistry(row_mode, cache_size=config['converter_cache_size'])
+
+		if config['enable_metrics']:
+			self.metrics = Metrics(
+				slow_query_threshold=config['slow_query_threshold'], 
+				progress_steps=config['metrics_progress_steps'])
+
+		# Cache results of read methods, invalidated when 
+		# any write through the client touches the tables
+		if config['result_cache_size'] > 0:
+			self.result_cache = ResultCache(
+				max_entries=config['result_cache_size'], 
+				max_bytes=config['result_cache_bytes'], 
+				ttl=config['result_cache_ttl'])
 
 		self.connection_args = {
 			'database': self.database,
 			'timeout': self.waiting_unlock_timeout,
-			'detect_types': self.detect_types,
+			'detect_types': self.detect_types & ~sqlite3.PARSE_COLNAMES,
+			'cached_statements': self.cached_sql_statements,
 		}
-		self.client = sqlite3.connect(**self.connection_args)
+		if self.enable_write_queue and self.pool_size <= 0:
+			# reads are served by pooled reader connections
+			self.pool_size = 4
+		if self.pool_size > 0:
+			if self.database == ':memory:':
+				raise Exception('connection pool cannot work with :memory: database')
+			# pooled connections are shared between threads
+			self.connection_args['check_same_thread'] = False
+		self.client = self.connect()
 
-		# The progress hander is invoked for every n instructions
-		# of the SQLite virtual machine
-		self.client.set_progress_handler(None, 0)
-		
-		# The trace callback to be called for each SQL statement that is actually
-		# executed by the SQLite backend.
-		self.client.set_trace_callback(config.get('trace_callback', None))
+		# Readers never block on the writer in WAL mode, the main 
+		# connection becomes the writer owned by a dedicated thread
+		if self.enable_write_queue:
+			self.client.isolation_level = None
+			self.client.execute('PRAGMA journal_mode=WAL')
+			# the writer thread invalidates cached results after every commit
+			self.writer = WriteQueue(self.client, self.write_queue_batch, self.invalidate_pending_writes)
 
 		# Enable traceback in user-defined functions, aggregates, 
 		# converters, authorizer callbacks etc.
@@ -47,35 +113,120 @@ class BaseClient(object):
 		else:
 			sqlite3.enable_callback_tracebacks(False) # sqlite3 default
 
-		# Support access by column name and index, representation, 
-		# iteration, equality testing and len()		
-		if self.enable_row_factory:
-			self.client.row_factory = sqlite3.Row
-		
-		# Immediately commit when make any modifications for database
-		if self.enable_autocommit:
-			self.client.isolation_level = None
-		
-		if hasattr(self.text_factory, '__call__'):
-			self.client.text_factory = self.text_factory
-		else:
-			self.client.text_factory = str # sqlite3 default
-
 		# Add custom Python functions to sqlite3
 		for item in config['custom_functions']:
 			if item[0] == 'function':
-				self.add_function(item[1], item[2], item[3])
+				self.add_function(item[1], item[2], item[3], *item[4:5])
 			elif item[0] == 'aggregate':
 				self.add_aggregate(item[1], item[2], item[3])
+			elif item[0] == 'window':
+				self.add_window_function(item[1], item[2], item[3])
 			elif item[0] == 'collation':
-				self.add_collation(item[1], item[2])
+				self.add_collation(item[1], item[2], *item[3:4])
 
 		# Add custom Python data types to sqlite3
-		for datatype, typename, py2sqlite_func, sqlite2py_func in config['custom_types']:
+		for item in config['custom_types']:
+			datatype, typename, py2sqlite_func, sqlite2py_func = item[:4]
 			if datatype and py2sqlite_func:
 				self.add_adapter(datatype, py2sqlite_func)
 			if typename and sqlite2py_func:
-				self.add_converter(typename, sqlite2py_func)
+				self.add_converter(typename, sqlite2py_func, batch=len(item) > 4 and item[4])
+
+		# Connections in pool are configured with the same settings and 
+		# custom functions as the main connection
+		if self.pool_size > 0:
+			self.pool = ConnectionPool(
+				self.connect, 
+				max_size=self.pool_size, 
+				idle_timeout=self.pool_idle_timeout, 
+				wait_timeout=self.pool_wait_timeout)
+
+	def connect(self):
+		'''
+		Open a new connection and apply row factory, text factory, autocommit 
+		and registered custom functions to it.
+		'''
+		con = sqlite3.connect(**self.connection_args)
+
+		# The progress hander is invoked for every n instructions
+		# of the SQLite virtual machine, it counts VM steps when metrics enabled
+		if self.metrics is not None:
+			con.set_progress_handler(self.metrics.progress, self.metrics.progress_steps)
+		else:
+			con.set_progress_handler(*self.process_hander)
+		
+		# The trace callback to be called for each SQL statement that is actually
+		# executed by the SQLite backend.
+		con.set_trace_callback(self.trace_callback)
+
+		# Support access by column name and index, representation, 
+		# iteration, equality testing and len()		
+		if self.enable_fast_rows:
+			if self.fast_row_class == 'namedtuple':
+				con.row_factory = NamedRowFactory()
+		elif self.enable_row_factory:
+			con.row_factory = sqlite3.Row
+		
+		# Immediately commit when make any modifications for database
+		if self.enable_autocommit:
+			con.isolation_level = None
+		
+		if self.enable_fast_rows:
+			# str is decoded natively without calling back into Python
+			con.text_factory = TextInterner(self.intern_text_size) if self.intern_text_size > 0 else str
+		elif hasattr(self.text_factory, '__call__'):
+			con.text_factory = self.text_factory
+		else:
+			con.text_factory = str # sqlite3 default
+
+		# Only changed when configured, it applies to every schema object
+		if self.trusted_schema is not None:
+			con.execute('PRAGMA trusted_schema={}'.format('ON' if self.trusted_schema else 'OFF'))
+
+		# Rows deleted by REPLACE conflict resolution fire DELETE triggers
+		if self.recursive_triggers is not None:
+			con.execute('PRAGMA recursive_triggers={}'.format('ON' if self.recursive_triggers else 'OFF'))
+
+		# The authorizer reports which tables a statement reads or writes
+		if self.result_cache is not None:
+			con.set_authorizer(self.result_cache.authorizer)
+
+		for item in self.custom_functions:
+			self.register_function(con, item)
+		return con
+
+	def register_function(self, con, item):
+		'''
+		item = (kind, name, ...) same as the custom_functions config entry
+		'''
+		if item[0] == 'function':
+			deterministic = len(item) > 4 and bool(item[4])
+			con.create_function(item[1], item[2], item[3], deterministic=deterministic)
+		elif item[0] == 'aggregate':
+			con.create_aggregate(item[1], item[2], item[3])
+		elif item[0] == 'window':
+			if hasattr(con, 'create_window_function'):
+				con.create_window_function(item[1], item[2], item[3])
+			else:
+				# Python < 3.11 can only use it as a plain aggregate
+				con.create_aggregate(item[1], item[2], item[3])
+		elif item[0] == 'collation':
+			con.create_collation(item[1], item[2])
+			if len(item) > 3 and item[3] is not None:
+				con.create_function(self.sort_key_function(item[1]), 1, item[3], deterministic=True)
+
+	def apply_connections(self, func):
+		'''
+		Call func(connection) for the main connection and every pooled connection.
+		'''
+		if self.client is not None:
+			func(self.client)
+		if self.pool is not None:
+			self.pool.apply(func)
+
+	def add_custom_function(self, item):
+		self.custom_functions.append(item)
+		self.apply_connections(lambda con: self.register_function(con, item))
 
 	def debug(self, msg, level='DEBUG'):
 		now = datetime.datetime.now()
@@ -89,6 +240,9 @@ class BaseClient(object):
 		Registers a callable to convert the custom Python type into one of SQLite’s supported types.
 		
 		Another way to do this, is by defining method __conform__() in the datatype.
+
+		The adapter only works for this client, parameters are adapted before 
+		they are passed to sqlite3.
 		'''
 		if not datatype:
 			return None
@@ -96,11 +250,21 @@ class BaseClient(object):
 			raise Exception('adapte function invalid')
 		
 		self.custom_types[datatype] = adapte_func
-		sqlite3.register_adapter(datatype, adapte_func)
+		self.types.add_adapter(datatype, adapte_func)
 
-	def add_converter(self, typename, convert_func):
+	def add_converter(self, typename, convert_func, batch=False, cache_size=None):
 		'''
 		Registers a callable to convert a bytestring from the database into a custom Python type.
+
+		Parameters:
+
+			batch 		-> convert_func accepts a list of bytes(a column of fetched rows) and
+						   return a list of objects
+			cache_size 	-> conversions of the most recent distinct bytes are memoized, 
+						   default is converter_cache_size, 0 disables it
+
+		The converter only works for this client, it's applied to columns 
+		named like "column [typename]" when rows are fetched.
 		'''
 		if not isinstance(typename, str):
 			raise Exception('typename should be a string')
@@ -108,15 +272,23 @@ class BaseClient(object):
 			raise Exception('convert function invalid')
 
 		self.custom_types[typename] = convert_func
-		sqlite3.register_converter(typename, convert_func)
+		self.types.add_converter(typename, convert_func, batch, cache_size)
 
-	def add_function(self, func_name, num_params, func):
+	def add_function(self, func_name, num_params, func, deterministic=False):
 		'''
 		Description:
 		
 		Add python callable object as a SQL function, you can 
 		later use that python callable with func_name in your SQL statements.
 		The func will accepts the number of num_params parameters
+
+		deterministic = True -> the func always returns the same result for the same 
+								arguments, it can be used in expression indexes, generated 
+								columns and partial indexes(see create_table)
+
+		sqlite3 cannot mark functions SQLITE_INNOCUOUS, when the connection doesn't 
+		trust the schema(trusted_schema config) functions used by indexes and 
+		generated columns raise "unsafe use of ...".
 		
 		Example:
 		
@@ -130,7 +302,7 @@ class BaseClient(object):
 		if not hasattr(func, '__call__'):
 			raise Exception('argument func should be callable')
 		
-		self.client.create_function(func_name, num_params, func)
+		self.add_custom_function(('function', func_name, num_params, func, deterministic))
 
 	def add_aggregate(self, func_name, num_params, cls):
 		'''
@@ -154,15 +326,47 @@ class BaseClient(object):
 		if not hasattr(cls, '__class__'):
 			raise Exception('argument func should be class')
 		
-		self.client.create_aggregate(func_name, num_params, cls)
+		self.add_custom_function(('aggregate', func_name, num_params, cls))
+
+	def add_window_function(self, func_name, num_params, cls):
+		'''
+		Description:
+
+		Add python class as a SQL aggregate window function, the python class
+		must implement the following methods
+			step() 		- add a row into the current window
+			inverse() 	- remove a row from the current window
+			value() 	- return the current value of the aggregate
+			finalize()	- return the final result of the aggregate
+		It can also be used as a plain aggregate function.
+
+		Example:
+
+		cursor.execute('SELECT func_name(x) OVER (ORDER BY id ROWS 2 PRECEDING) FROM test')
+		'''
+
+		if not isinstance(func_name, str):
+			raise Exception('argument func_name should be string')
+		if not isinstance(num_params, int):
+			raise Exception('argument num_params should be int')
+		for method in ['step', 'inverse', 'value', 'finalize']:
+			if not hasattr(cls, method):
+				raise Exception('window function class should implement {}()'.format(method))
+
+		self.add_custom_function(('window', func_name, num_params, cls))
 
-	def add_collation(self, coll_name, func):
+	def add_collation(self, coll_name, func, key=None):
 		'''
 		Description:
 
 		Add python callable as SQL collate function, you can 
 		later use that python class with func_name in your SQL 'ORDER BY ... COLLATE ...' statements.
 		The func will accepts two bytestring, the return is just like cmp function
+
+		key(value) returns a sort key, ordering by keys gives the same order as the 
+		collation. It's registered as deterministic SQL function sort_key_<coll_name>, 
+		so the keys can be indexed(see create_table sort_keys) and SimpleClient.select_table
+		orders by the key instead of calling func for every comparison.
 		
 		Example:
 		
@@ -172,8 +376,20 @@ class BaseClient(object):
 			raise Exception('argument func_name should be string')
 		if not hasattr(func, '__call__'):
 			raise Exception('argument func should be callable')
+		if key is not None and not hasattr(key, '__call__'):
+			raise Exception('argument key should be callable')
 		
-		self.client.create_collation(coll_name, func)
+		self.add_custom_function(('collation', coll_name, func, key))
+
+	def sort_key_function(self, coll_name):
+		return 'sort_key_{}'.format(coll_name)
+
+	def collation_keys(self):
+		'''
+		Return names of collations which have a sort key function.
+		'''
+		return set([item[1].lower() for item in self.custom_functions 
+			if item[0] == 'collation' and len(item) > 3 and item[3] is not None])
 
 	def total_changes(self):
 		'''
@@ -185,24 +401,297 @@ class BaseClient(object):
 	def get_connection(self):
 		return self.client
 
-	def execute(self, sql, params=None, autocommit=False):
-		cursor = None
+	@contextlib.contextmanager
+	def connection(self):
+		'''
+		Checkout a connection from the pool for reading, when pool is disabled
+		the main connection will be used.
+
+		Example:
+
+		with client.connection() as con:
+			rows = con.execute('SELECT * FROM user').fetchall()
+		'''
+		if self.pool is None:
+			yield self.client
+		else:
+			with self.pool.connection() as con:
+				yield con
+
+	def pool_stats(self):
+		'''
+		Pool size, idle connections, checkouts and wait time(seconds) metrics.
+		'''
+		if self.pool is None:
+			return {}
+		return self.pool.stats()
+
+	def fetchall(self, sql, params=None, cached=False):
+		'''
+		Execute a read statement on a pooled connection and return all rows.
+		cached = True -> use the result cache(if enabled)
+		'''
+		return self._fetch(sql, params, cached, False)
+
+	def fetchone(self, sql, params=None, cached=False):
+		'''
+		Execute a read statement on a pooled connection and return the first row.
+		cached = True -> use the result cache(if enabled)
+		'''
+		return self._fetch(sql, params, cached, True)
+
+	def _fetch(self, sql, params, cached, one):
+		fetch = 'one' if one else 'all'
+		key = None
+		if cached and self.result_cache is not None:
+			key = self.result_cache.make_key(fetch, sql, params)
+		if key is None:
+			with self.connection() as con:
+				return self._query(con, sql, params, fetch=fetch)[1]
+
+		# rows are immutable, row lists are cached as tuples and every 
+		# caller gets its own list
+		hit, result = self.result_cache.get(key)
+		if hit:
+			return list(result) if fetch == 'all' else result
+		version = self.result_cache.current_version()
+		with self.connection() as con:
+			cursor, result, reads = self._query(con, sql, params, fetch=fetch)
+		self.result_cache.put(key, tuple(result) if fetch == 'all' else result, reads, version)
+		return result
+
+	def result_cache_stats(self):
+		'''
+		Hits, misses, invalidations, entries and bytes of the result cache.
+		'''
+		if self.result_cache is None:
+			return {}
+		return self.result_cache.stats()
+
+	def iterate(self, sql, params=None, batch_size=None):
+		'''
+		Execute a read statement and lazily yield rows, rows are fetched 
+		with cursor.fetchmany(batch_size) instead of fetchall().
+
+		The cursor is closed(and pooled connection checked in) when 
+		iteration finished or the generator is closed/garbage collected.
+
+		Example:
+
+		for row in client.iterate('SELECT * FROM user'):
+			if row['age'] > 30:
+				break
+		'''
+		batch_size = batch_size if batch_size else self.stream_batch_size
+		with self.connection() as con:
+			token = self.metrics.begin() if self.metrics is not None else None
+			cursor = self._query(con, sql, params, measure=False)[0]
+			plan = self.column_plan(cursor)
+			if plan is not None:
+				cursor.row_factory = None
+			count = 0
+			error = False
+			try:
+				while True:
+					rows = cursor.fetchmany(batch_size)
+					if not rows:
+						break
+					if plan is not None:
+						rows = plan.convert_rows(rows)
+					count += len(rows)
+					for row in rows:
+						yield row
+			except BaseException as e:
+				error = not isinstance(e, GeneratorExit)
+				raise
+			finally:
+				cursor.close()
+				if token is not None:
+					self.metrics.end(sql, token, count, error)
+
+	def fetch_columns(self, sql, params=None, types=None, batch_size=None, use_numpy=True):
+		'''
+		Execute a read statement and return its result by columns, rows are 
+		fetched in batch_size batches as plain tuples and copied into typed arrays.
+
+		Parameters:
+
+			types 		-> {column name: basic type}, 'i' columns are filled into int64 
+						   arrays and 'f' into double arrays, other columns are inferred
+			use_numpy 	-> numpy arrays when numpy is installed, otherwise array.array
+						   (list for TEXT/BLOB columns)
+
+		Example:
+
+			columns = client.fetch_columns('SELECT age, score FROM user', types={'age': 'i'})
+			columns['score'].sum()
+		'''
+		batch_size = batch_size if batch_size else self.stream_batch_size
+		with self.connection() as con:
+			token = self.metrics.begin() if self.metrics is not None else None
+			count = 0
+			error = True
+			cursor = self._query(con, sql, params, measure=False)[0]
+			try:
+				result, count = fetch_columns(cursor, types, batch_size, use_numpy, self.column_plan(cursor))
+				error = False
+			finally:
+				cursor.close()
+				if token is not None:
+					self.metrics.end(sql, token, count, error)
+		return result
+
+	def _run(self, con, sql, params=None):
 		if not params:
-			cursor = self.client.execute(sql)
+			return con.execute(sql)
+		return con.execute(sql, params)
+
+	def _query(self, con, sql, params=None, many=False, fetch=None, measure=True):
+		'''
+		Execute sql on con with metrics and result cache tracking.
+
+		fetch = 'one' or 'all' -> fetch rows inside the measurement
+		measure = False -> the caller records metrics itself
+
+		Return:
+
+			(cursor, fetched rows, tables read by the statement)
+		'''
+		def run():
+			if many:
+				cursor = con.executemany(sql, self.types.adapt_many(params))
+			else:
+				cursor = self._run(con, sql, self.types.adapt_params(params))
+			plan = self.column_plan(cursor)
+			if plan is not None:
+				# fetched rows are converted column by column
+				cursor.row_factory = None
+				if fetch == 'one':
+					row = cursor.fetchone()
+					return (cursor, None if row is None else plan.convert_rows([row])[0])
+				elif fetch == 'all':
+					return (cursor, plan.convert_rows(cursor.fetchall()))
+				cursor.row_factory = plan.convert_row
+				return (cursor, None)
+			if fetch == 'one':
+				return (cursor, cursor.fetchone())
+			elif fetch == 'all':
+				return (cursor, cursor.fetchall())
+			return (cursor, None)
+
+		if self.metrics is not None and measure:
+			measured = run
+			run = lambda: self.metrics.measure(sql, measured, self.count_rows)
+		if self.result_cache is None:
+			cursor, result = run()
+			return (cursor, result, frozenset())
+		(cursor, result), reads, writes = self.result_cache.execute(con, run, sql)
+		if con is self.client and (writes is None or writes):
+			# invalidate again when the transaction finished
+			self.pending_writes.add(writes)
+		return (cursor, result, reads)
+
+	def column_plan(self, cursor):
+		'''
+		Return the ColumnPlan of typed("column [typename]") columns of cursor, or None.
+		'''
+		if not (self.detect_types & sqlite3.PARSE_COLNAMES):
+			return None
+		return self.types.plan(cursor.description)
+
+	def converter_stats(self):
+		'''
+		Memoization hits and misses of every converter.
+		'''
+		return self.types.stats()
+
+	def _execute(self, con, sql, params=None, many=False):
+		return self._query(con, sql, params, many)[0]
+
+	def _executescript(self, con, sql_statements):
+		if self.metrics is not None:
+			cursor = self.metrics.measure(sql_statements, 
+				lambda: con.executescript(sql_statements), lambda cursor: 0)
+		else:
+			cursor = con.executescript(sql_statements)
+		if self.result_cache is not None:
+			self.result_cache.clear()
+		return cursor
+
+	def count_rows(self, result):
+		cursor, rows = result
+		if isinstance(rows, list):
+			return len(rows)
+		elif rows is not None:
+			return 1
+		return max(cursor.rowcount, 0)
+
+	def metrics_snapshot(self, reset=False):
+		'''
+		Return a dict of per statement metrics and slow queries:
+
+		{
+			'statements': {
+				'SELECT * FROM user WHERE id=?': {
+					'calls', 'errors', 'rows', 'vm_steps', 'total_time', 'mean_time', 
+					'max_time', 'p50', 'p95', 'p99', 'histogram'
+				}
+			},
+			'slow_queries': [{'sql', 'seconds', 'rows', 'vm_steps', 'error', 'time'}],
+			'slow_query_threshold': seconds
+		}
+		'''
+		if self.metrics is None:
+			return {}
+		return self.metrics.snapshot(reset)
+
+	def invalidate_pending_writes(self):
+		if self.result_cache is None or not self.pending_writes:
+			return None
+		pending, self.pending_writes = self.pending_writes, set()
+		if None in pending:
+			self.result_cache.clear()
 		else:
-			cursor = self.client.execute(sql, params)
+			self.result_cache.invalidate(set().union(*pending))
+
+	def in_writer_job(self):
+		# the current thread runs a transaction() block on behalf of the writer thread
+		return getattr(self.transaction_state, 'writer_job', False)
+
+	def flush_writer(self, action):
+		'''
+		Wait for the queued writes in write queue mode, the writer thread is held 
+		by the current thread inside transaction(), waiting for it would deadlock.
+		'''
+		if self.in_writer_job():
+			raise Exception('{} is not allowed inside transaction() in write queue mode'.format(action))
+		if self.writer is not None:
+			self.writer.flush()
+
+	def execute(self, sql, params=None, autocommit=False):
+		if self.writer is not None and not self.in_writer_job():
+			# committed by the writer thread
+			return self.writer.call(lambda con: self._execute(con, sql, params))
+		cursor = self._execute(self.client, sql, params)
 		if autocommit:
 			self.commit()
 		return cursor
 
 	def executemany(self, sql, params, autocommit=False):
-		cursor = self.client.executemany(sql, params)
+		if self.writer is not None and not self.in_writer_job():
+			return self.writer.call(lambda con: self._execute(con, sql, params, True))
+		cursor = self._execute(self.client, sql, params, True)
 		if autocommit:
 			self.commit()
 		return cursor
 
 	def executescript(self, sql_statements, autocommit=False):
-		cursor = self.client.executescript(sql_statements)
+		if self.in_writer_job():
+			raise Exception('executescript commits itself, cannot run in a transaction block of write queue mode')
+		if self.writer is not None:
+			# executescript() commits itself, cannot run in the group transaction
+			return self.writer.call(lambda con: self._executescript(con, sql_statements), batch=False)
+		cursor = self._executescript(self.client, sql_statements)
 		if autocommit:
 			self.commit()
 		return cursor
@@ -211,35 +700,147 @@ class BaseClient(object):
 		'''
 		Commit current transaction, then your changes for the 
 		database will be visible to other database connections.
+
+		In write queue mode every write is committed by the writer thread, 
+		commit() only waits for the queued writes(cached results are invalidated 
+		by the writer thread after each commit).
 		'''
+		if self.in_writer_job():
+			# committed when the transaction block ends
+			return None
+		if self.writer is not None:
+			self.writer.flush()
+			return None
 		self.client.commit()
+		self.invalidate_pending_writes()
+
+	@contextlib.contextmanager
+	def transaction(self):
+		'''
+		Run statements in one transaction of the main connection, commit when 
+		the block succeeds and rollback when any exception raised.
+
+		with client.transaction():
+			client.execute('INSERT INTO user(name) VALUES (?)', ('xiao',))
+
+		A nested block joins the outer transaction, e.g. insert_many_table() 
+		inside a block commits nothing until the outer block ends.
+
+		In write queue mode the block runs as one job of the writer thread: the 
+		writer waits in the job's SAVEPOINT while writes of the block run on the 
+		write connection, other writes are queued until the block ends. Reads of 
+		the block are served by reader connections and don't see its writes.
+		'''
+		depth = getattr(self.transaction_state, 'depth', 0)
+		if depth:
+			self.transaction_state.depth = depth + 1
+			try:
+				yield self.client
+			finally:
+				self.transaction_state.depth = depth
+			return None
+		if self.writer is not None:
+			yield from self.writer_transaction()
+			return None
+		if not self.client.in_transaction:
+			self.client.execute('BEGIN')
+		self.transaction_state.depth = 1
+		try:
+			yield self.client
+		except BaseException:
+			self.transaction_state.depth = 0
+			self.rollback()
+			raise
+		else:
+			self.transaction_state.depth = 0
+			self.commit()
+
+	def writer_transaction(self):
+		started = threading.Event()
+		done = threading.Event()
+		errors = []
+		def job(con):
+			started.set()
+			done.wait()
+			if errors:
+				# rollback to the SAVEPOINT of the job
+				raise errors[0]
+		future = self.writer.submit(job)
+		while not started.wait(0.1):
+			if future.done():
+				# the writer failed before running the job
+				future.result()
+		self.transaction_state.depth = 1
+		self.transaction_state.writer_job = True
+		try:
+			yield self.client
+		except BaseException as e:
+			errors.append(e)
+			raise
+		finally:
+			self.transaction_state.depth = 0
+			self.transaction_state.writer_job = False
+			done.set()
+			try:
+				future.result()
+			except BaseException:
+				if not errors:
+					raise
 
 	def rollback(self):
 		'''
 		Rolls back any changes to the database since the last call to commit()
 		'''
+		if self.writer is not None:
+			raise Exception('rollback is not supported in write queue mode')
 		self.client.rollback()
+		self.invalidate_pending_writes()
 
 	def __del__(self):
-		self.close()
+		if getattr(self, 'client', None) is not None:
+			self.close()
 
 	def close(self, commit=True):
 		'''
 		By default commit current trasaction and then close connection.
 		'''
+		if self.client is None:
+			return None
+		if self.in_writer_job():
+			raise Exception('close is not allowed inside transaction() in write queue mode')
 		if commit:
 			self.commit()
+		if self.writer is not None:
+			self.writer.close()
 		self.client.close()
+		self.client = None
+		if self.pool is not None:
+			self.pool.close()
 	
 	def cli(self, con):
 		# cl = SimpleCl(con, copy.deepcopy(self.connection_args))
 		# cl.run()
 		run_cl_client(con)
 
-	def dump(self, dump):
-		with open(dump, 'w') as f:
-			for line in self.client.iterdump():
-				f.write('%s\n' % line)
+	def dump(self, dump=None, mode='sql', compression=None):
+		'''
+		Dump database into file(default is the dump config).
+
+		mode = 'sql' 		-> streaming SQL dump, compression(gzip or zlib) is 
+							   guessed from file extension when not given
+		mode = 'snapshot' 	-> binary database file copied with the backup API
+
+		Return:
+
+			{'path', 'bytes', 'seconds', 'bytes_per_sec', ...}
+		'''
+		dump = dump if dump else self.dump_file
+		self.flush_writer('dump')
+		if mode == 'snapshot' and self.pool is not None:
+			# backup from a reader connection, the writer goes on between steps
+			with self.connection() as con:
+				return dump_database(con, dump, mode, compression)
+		return dump_database(self.client, dump, mode, compression)
 
 	def validate_placeholder_in_sql(self, sql, params):
 		sql = str(sql)
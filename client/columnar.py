@@ -0,0 +1,113 @@
+import array
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+# basic type -> array typecode
+typecodes = {
+	'i': 'q', # 64-bit signed int
+	'f': 'd', # double
+}
+
+def infer_type(values):
+	for value in values:
+		if value is None:
+			continue
+		if isinstance(value, int) and not isinstance(value, bool):
+			return 'i'
+		elif isinstance(value, float):
+			return 'f'
+		return 'o'
+	return 'o'
+
+class Column(object):
+	'''
+	Values of one column, INTEGER(i) and REAL(f) columns are kept in
+	array.array, other columns in a list.
+
+	INTEGER columns with NULL values are promoted to REAL with NaN,
+	columns with values which don't fit the type fall back to a list.
+	'''
+
+	def __init__(self, t=None):
+		self.t = None
+		self.values = None
+		if t is not None:
+			self.set_type(t)
+
+	def set_type(self, t):
+		self.t = t if t in typecodes else 'o'
+		self.values = array.array(typecodes[self.t]) if self.t in typecodes else []
+
+	def extend(self, values):
+		if self.t is None:
+			self.set_type(infer_type(values))
+		if self.t == 'o':
+			self.values.extend(values)
+			return
+		n = len(self.values)
+		try:
+			self.values.extend(values)
+		except (TypeError, OverflowError):
+			# array.extend is not atomic
+			del self.values[n:]
+			self.promote(values)
+
+	def promote(self, values):
+		if self.t == 'i' and all([v is None or isinstance(v, (int, float)) for v in values]):
+			self.t = 'f'
+			self.values = array.array('d', self.values)
+			self.extend(values)
+		elif self.t == 'f' and all([v is None or isinstance(v, (int, float)) for v in values]):
+			self.values.extend([float('nan') if v is None else v for v in values])
+		else:
+			self.t = 'o'
+			self.values = self.values.tolist()
+			self.values.extend(values)
+
+	def result(self, use_numpy=True):
+		if self.t is None:
+			self.set_type('o')
+		if not (use_numpy and numpy is not None):
+			return self.values
+		if self.t == 'i':
+			return numpy.frombuffer(self.values, dtype=numpy.int64)
+		elif self.t == 'f':
+			return numpy.frombuffer(self.values, dtype=numpy.float64)
+		values = numpy.empty(len(self.values), dtype=object)
+		values[:] = self.values
+		return values
+
+def fetch_columns(cursor, types=None, batch_size=1000, use_numpy=True, plan=None):
+	'''
+	Fetch rows of cursor in batch_size batches into columns.
+
+	Parameters:
+
+		types 		-> {column name: basic type}, the type of other columns
+					   are inferred from the first batch
+		use_numpy 	-> return numpy arrays when numpy is installed
+		plan 		-> ColumnPlan converts typed columns batch by batch
+
+	Return:
+
+		{column name: numpy.ndarray or array.array or list}, and the number of rows
+	'''
+	types = types if types else {}
+	names = plan.names if plan is not None else [d[0] for d in cursor.description]
+	columns = [Column(types.get(name)) for name in names]
+	# plain tuples instead of row objects, they are dropped after every batch
+	cursor.row_factory = None
+	count = 0
+	while True:
+		rows = cursor.fetchmany(batch_size)
+		if not rows:
+			break
+		count += len(rows)
+		for i, (column, values) in enumerate(zip(columns, zip(*rows))):
+			if plan is not None:
+				values = plan.convert_column(i, values)
+			column.extend(values)
+	return (dict([(name, column.result(use_numpy)) for name, column in zip(names, columns)]), count)
@@ -0,0 +1,42 @@
+import re
+
+# operators allowed in (name, value, op) where conditions
+operators = set([
+	'=', '==', '!=', '<>', '<', '<=', '>', '>=',
+	'IS', 'IS NOT', 'IN', 'NOT IN',
+	'LIKE', 'NOT LIKE', 'GLOB', 'NOT GLOB'
+])
+
+class Expression(str):
+	'''
+	Mark a SQL expression used as the name of a where condition, it's put into
+	SQL as is instead of being quoted as a column name, e.g. a condition on an
+	expression index:
+
+		client.count_table('user', ((Expression('md5sum(username)'), digest),))
+
+	Never build an Expression from user input.
+	'''
+
+# legacy (name, condition) strings, e.g. '>30', ' IS NULL', ' LIKE "x%"'
+legacy_condition_pattern = re.compile(r'^(\s*(<=|>=|<>|!=|==|=|<|>)|\s+(IS|IN|NOT|LIKE|GLOB|BETWEEN)\b)', re.IGNORECASE)
+
+def quote_identifier(name):
+	'''
+	Quote a column name for SQL with backticks, Expression names are returned as is.
+
+	SQLite falls back to a string literal for a double-quoted name which is not 
+	a column, a backtick-quoted name is always an identifier(no such column error).
+	'''
+	if isinstance(name, Expression):
+		return str(name)
+	return '`{}`'.format(str(name).replace('`', '``'))
+
+def normalize_operator(op):
+	'''
+	' not  like ' -> 'NOT LIKE', raise when the operator isn't allowed.
+	'''
+	op = ' '.join(str(op).split()).upper()
+	if op not in operators:
+		raise Exception('where condition operator {} is not supported'.format(op))
+	return op
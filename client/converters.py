@@ -0,0 +1,209 @@
+import collections, functools, threading
+
+class TypedRow(tuple):
+	'''
+	Row of a query with typed columns, supports access by column
+	name(case-insensitive) and index like sqlite3.Row.
+	'''
+	__slots__ = ()
+	columns = {}
+	names = ()
+
+	def __getitem__(self, key):
+		if isinstance(key, str):
+			try:
+				key = self.columns[key.lower()]
+			except KeyError:
+				raise IndexError('No item with that key')
+		return tuple.__getitem__(self, key)
+
+	def keys(self):
+		return list(self.names)
+
+def typed_row_class(names):
+	columns = {}
+	for i, name in enumerate(names):
+		columns.setdefault(name.lower(), i)
+	return type('TypedRow', (TypedRow,), {'__slots__': (), 'columns': columns, 'names': names})
+
+class ColumnPlan(object):
+	'''
+	How to convert rows of one query: clean column names and
+	[(column index, converter)] of typed columns.
+	'''
+
+	def __init__(self, names, converters, row_class):
+		self.names = names
+		self.converters = converters
+		self.row_class = row_class
+
+	def make_row(self, values):
+		if self.row_class is tuple:
+			return values
+		return tuple.__new__(self.row_class, values)
+
+	def convert_row(self, cursor, row):
+		# row factory of cursors returned to the caller
+		row = list(row)
+		for i, converter in self.converters:
+			if row[i] is not None:
+				row[i] = converter.convert_one(row[i])
+		return self.make_row(tuple(row))
+
+	def convert_column(self, i, values):
+		for j, converter in self.converters:
+			if i == j:
+				return converter.convert_many(values)
+		return values
+
+	def convert_rows(self, rows):
+		'''
+		Convert a batch of plain tuple rows, every typed column is converted
+		as a whole batch.
+		'''
+		if not rows:
+			return rows
+		columns = list(zip(*rows))
+		for i, converter in self.converters:
+			columns[i] = converter.convert_many(columns[i])
+		if self.row_class is tuple:
+			return list(zip(*columns))
+		return [tuple.__new__(self.row_class, row) for row in zip(*columns)]
+
+def to_bytes(value):
+	# converters always accept bytes like sqlite3 converters
+	if isinstance(value, bytes):
+		return value
+	elif isinstance(value, str):
+		return value.encode('utf8')
+	return str(value).encode('ascii')
+
+class Converter(object):
+	'''
+	func 		-> func(bytes) return an object, or func([bytes]) return [object]
+				   when batch is True, NULL values are never passed to it
+	cache_size 	-> memoize conversions of the most recent raw values, 0 disables it
+	'''
+
+	def __init__(self, func, batch=False, cache_size=1024):
+		self.func = func
+		self.batch = batch
+		self.convert = lambda value: func(to_bytes(value))
+		if not batch and cache_size > 0:
+			self.convert = functools.lru_cache(maxsize=cache_size, typed=True)(self.convert)
+
+	def convert_one(self, value):
+		if self.batch:
+			return self.func([to_bytes(value)])[0]
+		return self.convert(value)
+
+	def convert_many(self, values):
+		if self.batch:
+			indexes = [i for i, v in enumerate(values) if v is not None]
+			converted = self.func([to_bytes(values[i]) for i in indexes])
+			if len(indexes) == len(values):
+				return list(converted)
+			values = list(values)
+			for i, v in zip(indexes, converted):
+				values[i] = v
+			return values
+		convert = self.convert
+		return [None if v is None else convert(v) for v in values]
+
+	def stats(self):
+		if hasattr(self.convert, 'cache_info'):
+			return self.convert.cache_info()._asdict()
+		return {}
+
+class TypeRegistry(object):
+	'''
+	Adapters and converters of one client, instead of the process-global
+	sqlite3.register_adapter()/register_converter().
+
+	Parameters are adapted before executing, converters are applied to
+	columns named like "column [typename]".
+
+	row_mode 	-> 'row'(access by name and index), 'namedtuple' or 'tuple',
+				   the class of converted rows
+	'''
+
+	def __init__(self, row_mode='row', cache_size=1024, max_plans=256):
+		self.row_mode = row_mode
+		self.cache_size = cache_size
+		self.adapters = {}
+		self.converters = {}
+		self.plans = collections.OrderedDict()
+		self.max_plans = max_plans
+		self.lock = threading.Lock()
+
+	def add_adapter(self, datatype, func):
+		self.adapters[datatype] = func
+
+	def add_converter(self, typename, func, batch=False, cache_size=None):
+		cache_size = self.cache_size if cache_size is None else cache_size
+		# typenames are case-insensitive like sqlite3
+		self.converters[typename.upper()] = Converter(func, batch, cache_size)
+		with self.lock:
+			self.plans.clear()
+
+	def adapt(self, value):
+		adapter = self.adapters.get(type(value))
+		return value if adapter is None else adapter(value)
+
+	def adapt_params(self, params):
+		if not self.adapters or not params:
+			return params
+		if isinstance(params, dict):
+			return dict([(k, self.adapt(v)) for k, v in params.items()])
+		return [self.adapt(v) for v in params]
+
+	def adapt_many(self, seq_of_params):
+		if not self.adapters:
+			return seq_of_params
+		return (self.adapt_params(params) for params in seq_of_params)
+
+	def plan(self, description):
+		'''
+		Return the ColumnPlan of a query, or None when it has no typed columns.
+		'''
+		if description is None:
+			return None
+		names = tuple([d[0] for d in description])
+		if not [name for name in names if ' [' in name]:
+			return None
+		with self.lock:
+			if names in self.plans:
+				self.plans.move_to_end(names)
+				return self.plans[names]
+		plan = self.make_plan(names)
+		with self.lock:
+			self.plans[names] = plan
+			if len(self.plans) > self.max_plans:
+				self.plans.popitem(last=False)
+		return plan
+
+	def make_plan(self, names):
+		clean = []
+		converters = []
+		for i, name in enumerate(names):
+			# the same rule as sqlite3.PARSE_COLNAMES: 'name [typename]'
+			pos = name.find(' [')
+			if pos >= 0 and name.endswith(']'):
+				typename = name[pos+2:-1].upper()
+				if typename in self.converters:
+					converters.append((i, self.converters[typename]))
+				name = name[:pos]
+			clean.append(name)
+		if not converters and tuple(clean) == names:
+			return None
+		clean = tuple(clean)
+		if self.row_mode == 'tuple':
+			row_class = tuple
+		elif self.row_mode == 'namedtuple':
+			row_class = collections.namedtuple('Row', clean, rename=True)
+		else:
+			row_class = typed_row_class(clean)
+		return ColumnPlan(clean, converters, row_class)
+
+	def stats(self):
+		return dict([(typename, converter.stats()) for typename, converter in self.converters.items()])
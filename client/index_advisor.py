@@ -0,0 +1,182 @@
+import threading, re
+
+range_ops = ['<', '<=', '>', '>=', 'LIKE', 'GLOB']
+equal_ops = ['=', '==', 'IS', 'IN']
+orderby_pattern = re.compile(r'^\s*(.+?)(\s+(?:ASC|DESC))?\s*$', re.IGNORECASE)
+
+index_term_pattern = re.compile(r'^\s*(.+?)(\s+COLLATE\s+\w+)?(\s+(?:ASC|DESC))?\s*$', re.IGNORECASE | re.DOTALL)
+
+def strip_direction(term):
+	m = orderby_pattern.match(term)
+	return m.group(1) if m else term
+
+def normalize_expression(term):
+	'''
+	'"Age" DESC' -> 'age', 'md5sum( username )' -> 'md5sum(username)', used to compare 
+	suggested columns with terms of existing indexes.
+	'''
+	return re.sub(r'\s+', '', strip_direction(term)).replace('"', '').replace('`', '').lower()
+
+def index_terms(sql):
+	'''
+	Return the column/expression terms of a CREATE INDEX statement, without 
+	COLLATE and ASC/DESC.
+	'''
+	m = re.search(r'\bON\b[^(]*\(', sql, re.IGNORECASE)
+	if not m:
+		return []
+	terms = []
+	depth = 0
+	quote = None
+	start = m.end()
+	for i in range(m.end(), len(sql)):
+		c = sql[i]
+		if quote:
+			if c == quote:
+				quote = None
+		elif c in '\'"`':
+			quote = c
+		elif c == '(':
+			depth += 1
+		elif c == ')' and depth:
+			depth -= 1
+		elif c in ',)' and not depth:
+			terms.append(index_term_pattern.match(sql[start:i]).group(1))
+			start = i + 1
+			if c == ')':
+				break
+	return terms
+
+class QueryShape(object):
+	'''
+	A query generated by SimpleClient builders: table, [(column, op)] of the
+	WHERE clause and ORDER BY terms, with a sample SQL and parameters to explain.
+	'''
+
+	def __init__(self, tbl_name, conditions, orderby, sql, params):
+		self.tbl_name = tbl_name
+		self.conditions = conditions
+		self.orderby = orderby
+		self.sql = sql
+		self.params = params
+		self.calls = 0
+
+	def suggested_columns(self):
+		'''
+		Equality columns first, then one range column or ORDER BY columns.
+		'''
+		columns = []
+		for column, op in self.conditions:
+			if op in equal_ops and column not in columns:
+				columns.append(column)
+		ranges = [column for column, op in self.conditions if op in range_ops and column not in columns]
+		if ranges:
+			columns.append(ranges[0])
+		else:
+			for term in self.orderby:
+				m = orderby_pattern.match(term)
+				column = m.group(1) if m else term
+				if ' COLLATE ' in column.upper() or column in columns:
+					break
+				# keep the direction, e.g. 'age DESC', for mixed directions
+				columns.append(term.strip())
+		return [column for column in columns if strip_direction(column) not in ['id', 'rowid']]
+
+class IndexAdvisor(object):
+	'''
+	Record query shapes, explain them with EXPLAIN QUERY PLAN and suggest
+	indexes for shapes which scan the whole table or sort with a temp b-tree.
+	'''
+
+	def __init__(self, max_shapes=1000):
+		self.shapes = {}
+		self.max_shapes = max_shapes
+		self.lock = threading.Lock()
+
+	def record(self, tbl_name, conditions, orderby, sql, params):
+		key = (tbl_name, tuple(conditions), tuple(orderby))
+		with self.lock:
+			shape = self.shapes.get(key)
+			if shape is None:
+				if len(self.shapes) >= self.max_shapes:
+					return
+				shape = self.shapes[key] = QueryShape(tbl_name, tuple(conditions), tuple(orderby), sql, list(params))
+			shape.calls += 1
+
+	def clear(self):
+		with self.lock:
+			self.shapes.clear()
+
+	def explain(self, fetchall, shape):
+		'''
+		fetchall(sql, params) returns rows of EXPLAIN QUERY PLAN.
+		'''
+		plan = [row[3] for row in fetchall('EXPLAIN QUERY PLAN ' + shape.sql, shape.params)]
+		scan = False
+		search = False
+		temp_sort = False
+		for detail in plan:
+			upper = detail.upper()
+			if upper.startswith('SCAN'):
+				# SCAN t USING INDEX reads every index entry, e.g. for ORDER BY
+				scan = True
+			elif upper.startswith('SEARCH'):
+				search = True
+			elif 'TEMP B-TREE' in upper:
+				temp_sort = True
+		return {
+			'table': shape.tbl_name,
+			'sql': shape.sql,
+			'calls': shape.calls,
+			'plan': plan,
+			'access': 'SCAN' if scan else ('SEARCH' if search else 'OTHER'),
+			'temp_sort': temp_sort,
+		}
+
+	def report(self, fetchall):
+		'''
+		Shapes which cannot be explained(e.g. the table was dropped) are reported 
+		with 'error' instead of breaking the report.
+		'''
+		with self.lock:
+			shapes = list(self.shapes.values())
+		items = []
+		for shape in sorted(shapes, key=lambda s: -s.calls):
+			try:
+				item = dict(self.explain(fetchall, shape), columns=shape.suggested_columns())
+			except Exception as e:
+				item = {
+					'table': shape.tbl_name,
+					'sql': shape.sql,
+					'calls': shape.calls,
+					'plan': [],
+					'access': None,
+					'temp_sort': False,
+					'columns': [],
+					'error': str(e),
+				}
+			items.append(item)
+		return items
+
+	def suggest(self, fetchall, min_calls=1):
+		'''
+		Return [{'table', 'columns', 'calls', 'plan'}] of indexes that shapes
+		need, shapes already using an index for search and sort are skipped.
+		'''
+		suggestions = {}
+		for item in self.report(fetchall):
+			if item['calls'] < min_calls or not item['columns'] or item.get('error'):
+				continue
+			if item['access'] == 'SEARCH' and not item['temp_sort']:
+				continue
+			key = (item['table'], tuple(item['columns']))
+			if key in suggestions:
+				suggestions[key]['calls'] += item['calls']
+			else:
+				suggestions[key] = {
+					'table': item['table'],
+					'columns': item['columns'],
+					'calls': item['calls'],
+					'plan': item['plan'],
+				}
+		return sorted(suggestions.values(), key=lambda s: -s['calls'])
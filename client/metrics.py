@@ -0,0 +1,139 @@
+import threading, collections, functools, time, re, datetime
+
+# Latency histogram bucket upper bounds(seconds): 0.1ms, 0.2ms ... ~52s
+latency_buckets = [0.0001 * 2**i for i in range(20)]
+
+string_pattern = re.compile(r"'(?:[^']|'')*'")
+number_pattern = re.compile(r'(?<![\w.])[-+]?\d+(\.\d+)?([eE][-+]?\d+)?\b')
+in_list_pattern = re.compile(r'\bIN\s*\(\s*\?(\s*,\s*\?)+\s*\)', re.IGNORECASE)
+
+@functools.lru_cache(maxsize=1024)
+def normalize_sql(sql):
+	'''
+	Replace literals with ? and collapse whitespaces, so statements
+	only differ in values are counted together.
+	'''
+	sql = string_pattern.sub('?', str(sql))
+	sql = number_pattern.sub('?', sql)
+	sql = in_list_pattern.sub('IN (?)', sql)
+	return ' '.join(sql.split())
+
+class StatementStats(object):
+
+	def __init__(self):
+		self.calls = 0
+		self.errors = 0
+		self.rows = 0
+		self.steps = 0
+		self.total_time = 0.0
+		self.max_time = 0.0
+		self.buckets = [0] * (len(latency_buckets) + 1)
+
+	def add(self, seconds, rows, steps, error):
+		self.calls += 1
+		self.errors += 1 if error else 0
+		self.rows += rows
+		self.steps += steps
+		self.total_time += seconds
+		self.max_time = max(self.max_time, seconds)
+		i = 0
+		while i < len(latency_buckets) and seconds > latency_buckets[i]:
+			i += 1
+		self.buckets[i] += 1
+
+	def percentile(self, p):
+		'''
+		Approximate percentile, the upper bound of the bucket contains it.
+		'''
+		if not self.calls:
+			return 0.0
+		rank = p * self.calls
+		count = 0
+		for i, n in enumerate(self.buckets):
+			count += n
+			if count >= rank:
+				return latency_buckets[i] if i < len(latency_buckets) else self.max_time
+		return self.max_time
+
+	def snapshot(self):
+		return {
+			'calls': self.calls,
+			'errors': self.errors,
+			'rows': self.rows,
+			'vm_steps': self.steps,
+			'total_time': self.total_time,
+			'mean_time': self.total_time / self.calls if self.calls else 0.0,
+			'max_time': self.max_time,
+			'p50': self.percentile(0.50),
+			'p95': self.percentile(0.95),
+			'p99': self.percentile(0.99),
+			'histogram': dict(zip([str(b) for b in latency_buckets] + ['inf'], self.buckets)),
+		}
+
+class Metrics(object):
+	'''
+	Per normalized statement call counts, latency histograms, rows, VM steps
+	and a slow query log.
+
+	slow_query_threshold 	-> statements slower than this(seconds) are logged
+	progress_steps 			-> the progress handler is invoked for every n VM instructions,
+							   VM steps are counted in units of n
+	slow_query_log_size 	-> the max number of kept slow queries
+	'''
+
+	def __init__(self, slow_query_threshold=0.5, progress_steps=1000, slow_query_log_size=100):
+		self.slow_query_threshold = slow_query_threshold
+		self.progress_steps = progress_steps
+		self.statements = collections.defaultdict(StatementStats)
+		self.slow_queries = collections.deque(maxlen=slow_query_log_size)
+		self.lock = threading.Lock()
+		self.local = threading.local()
+
+	def progress(self):
+		# counts VM steps of the statement running on current thread
+		self.local.steps = getattr(self.local, 'steps', 0) + self.progress_steps
+		return 0
+
+	def begin(self):
+		return (time.perf_counter(), getattr(self.local, 'steps', 0))
+
+	def end(self, sql, token, rows=0, error=False):
+		seconds = time.perf_counter() - token[0]
+		steps = getattr(self.local, 'steps', 0) - token[1]
+		statement = normalize_sql(sql)
+		with self.lock:
+			self.statements[statement].add(seconds, rows, steps, error)
+			if seconds >= self.slow_query_threshold:
+				self.slow_queries.append({
+					'sql': statement,
+					'seconds': seconds,
+					'rows': rows,
+					'vm_steps': steps,
+					'error': error,
+					'time': datetime.datetime.now().isoformat(),
+				})
+
+	def measure(self, sql, func, count_rows):
+		'''
+		Run func() and record it, count_rows(result) return the number of rows.
+		'''
+		token = self.begin()
+		try:
+			result = func()
+		except BaseException:
+			self.end(sql, token, 0, True)
+			raise
+		self.end(sql, token, count_rows(result))
+		return result
+
+	def snapshot(self, reset=False):
+		with self.lock:
+			snapshot = {
+				'statements': dict([(sql, stats.snapshot()) for sql, stats in self.statements.items()]),
+				'slow_queries': list(self.slow_queries),
+				'slow_query_threshold': self.slow_query_threshold,
+			}
+			if reset:
+				self.statements.clear()
+				self.slow_queries.clear()
+		return snapshot
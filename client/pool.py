@@ -0,0 +1,164 @@
+import threading, contextlib, time
+
+class ConnectionPool(object):
+	'''
+	A bounded pool of pre-configured sqlite3 connections.
+
+	factory 		-> callable return a new configured connection
+	max_size 		-> the max number of connections(idle and checked out)
+	idle_timeout 	-> idle connections older than this(seconds) will be closed
+	wait_timeout 	-> how long checkout() waits for a free connection
+	'''
+
+	def __init__(self, factory, max_size=5, idle_timeout=300, wait_timeout=5):
+		if not hasattr(factory, '__call__'):
+			raise Exception('argument factory should be callable')
+		if not isinstance(max_size, int) or max_size < 1:
+			raise Exception('argument max_size should be a positive int')
+		self.factory = factory
+		self.max_size = max_size
+		self.idle_timeout = idle_timeout
+		self.wait_timeout = wait_timeout
+		self.closed = False
+		self._idle = [] # list of (connection, checkin time)
+		self._connections = set()
+		self._pending = 0 # connections being opened
+		self._cond = threading.Condition(threading.Lock())
+		self._stats = {
+			'created': 0,
+			'reaped': 0,
+			'checkouts': 0,
+			'timeouts': 0,
+			'wait_total': 0.0,
+			'wait_max': 0.0,
+		}
+
+	def __len__(self):
+		return len(self._connections)
+
+	def checkout(self, timeout=None):
+		'''
+		Take an idle connection, open a new one when pool is not full,
+		otherwise wait until other threads checkin their connections.
+		'''
+		timeout = self.wait_timeout if timeout is None else timeout
+		start = time.monotonic()
+		deadline = start + timeout
+		con = None
+		create = False
+		with self._cond:
+			while True:
+				if self.closed:
+					raise Exception('connection pool has been closed')
+				self._reap()
+				if self._idle:
+					con = self._idle.pop()[0]
+					break
+				if len(self._connections) + self._pending < self.max_size:
+					# reserve a slot, the connection is opened outside the lock
+					self._pending += 1
+					create = True
+					break
+				remaining = deadline - time.monotonic()
+				if remaining <= 0:
+					self._stats['timeouts'] += 1
+					raise Exception('waiting for pool connection timeout')
+				self._cond.wait(remaining)
+
+		if create:
+			try:
+				con = self.factory()
+			except Exception:
+				with self._cond:
+					self._pending -= 1
+					self._cond.notify()
+				raise
+			with self._cond:
+				self._pending -= 1
+				self._connections.add(con)
+				self._stats['created'] += 1
+
+		waited = time.monotonic() - start
+		with self._cond:
+			self._stats['checkouts'] += 1
+			self._stats['wait_total'] += waited
+			self._stats['wait_max'] = max(self._stats['wait_max'], waited)
+		return con
+
+	def checkin(self, con):
+		'''
+		Return the connection to pool, any uncommitted transaction will be rolled back.
+		'''
+		if con.in_transaction:
+			con.rollback()
+		with self._cond:
+			if con not in self._connections:
+				return None
+			if self.closed:
+				self._connections.discard(con)
+				con.close()
+				return None
+			self._idle.append((con, time.monotonic()))
+			self._cond.notify()
+
+	@contextlib.contextmanager
+	def connection(self, timeout=None):
+		con = self.checkout(timeout)
+		try:
+			yield con
+		finally:
+			self.checkin(con)
+
+	def _reap(self):
+		# must be called with the lock held
+		if not self.idle_timeout or self.idle_timeout < 0:
+			return None
+		now = time.monotonic()
+		alive = []
+		for con, last_used in self._idle:
+			if now - last_used > self.idle_timeout:
+				self._connections.discard(con)
+				con.close()
+				self._stats['reaped'] += 1
+			else:
+				alive.append((con, last_used))
+		self._idle = alive
+
+	def reap(self):
+		'''
+		Close connections which have been idle longer than idle_timeout.
+		'''
+		with self._cond:
+			self._reap()
+
+	def apply(self, func):
+		'''
+		Call func(connection) for every open connection in the pool, it's used
+		to register custom functions after the pool has been created.
+		'''
+		with self._cond:
+			connections = list(self._connections)
+		for con in connections:
+			func(con)
+
+	def stats(self):
+		with self._cond:
+			stats = dict(self._stats)
+			stats['size'] = len(self._connections)
+			stats['idle'] = len(self._idle)
+			stats['max_size'] = self.max_size
+		stats['in_use'] = stats['size'] - stats['idle']
+		stats['wait_avg'] = stats['wait_total'] / stats['checkouts'] if stats['checkouts'] else 0.0
+		return stats
+
+	def close(self):
+		'''
+		Close idle connections, the checked out connections will be closed when checkin.
+		'''
+		with self._cond:
+			self.closed = True
+			for con, last_used in self._idle:
+				self._connections.discard(con)
+				con.close()
+			self._idle = []
+			self._cond.notify_all()
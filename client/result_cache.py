@@ -0,0 +1,185 @@
+import sqlite3, threading, collections, time, sys
+
+class ResultCache(object):
+	'''
+	LRU cache of query results keyed by normalized SQL and parameters.
+
+	The sqlite3 authorizer(installed on every connection) reports which tables
+	a statement reads or writes when it's prepared, the cache remembers them per
+	SQL string, so cached results can be invalidated when a write touches their tables.
+
+	max_entries 	-> the max number of cached results
+	max_bytes 		-> the max(estimated) size of cached results
+	ttl 			-> cached result expires after ttl seconds, 0 means never
+	'''
+
+	read_actions = set([sqlite3.SQLITE_READ])
+	write_actions = set([
+		sqlite3.SQLITE_INSERT,
+		sqlite3.SQLITE_UPDATE,
+		sqlite3.SQLITE_DELETE,
+		sqlite3.SQLITE_DROP_TABLE,
+		sqlite3.SQLITE_ALTER_TABLE,
+	])
+
+	def __init__(self, max_entries=1000, max_bytes=64*1024*1024, ttl=60):
+		self.max_entries = max_entries
+		self.max_bytes = max_bytes
+		self.ttl = ttl
+		self.entries = collections.OrderedDict() # key -> (value, tables, size, expire)
+		self.table_keys = collections.defaultdict(set)
+		self.statement_tables = collections.OrderedDict() # sql -> (reads, writes)
+		self.invalidated = {} # table -> version
+		self.cleared = -1 # version of the last clear()
+		self.version = 0
+		self.bytes = 0
+		self.lock = threading.RLock()
+		self.local = threading.local()
+		self.stats_counter = {
+			'hits': 0,
+			'misses': 0,
+			'invalidations': 0,
+			'evictions': 0,
+		}
+
+	def authorizer(self, action, arg1, arg2, dbname, source):
+		collector = getattr(self.local, 'collector', None)
+		if collector is not None:
+			if action in self.read_actions and arg1:
+				collector[0].add(arg1)
+			elif action in self.write_actions and arg1:
+				collector[1].add(arg1)
+		return sqlite3.SQLITE_OK
+
+	def execute(self, con, func, sql):
+		'''
+		Run func() which executes sql on con, return (result, reads, writes).
+		writes is None when a modification happened but the tables are unknown.
+		'''
+		self.local.collector = (set(), set())
+		changes = con.total_changes
+		try:
+			result = func()
+		finally:
+			reads, writes = self.local.collector
+			self.local.collector = None
+		with self.lock:
+			if reads or writes:
+				self.statement_tables[sql] = (frozenset(reads), frozenset(writes))
+				while len(self.statement_tables) > max(self.max_entries, 1000):
+					self.statement_tables.popitem(last=False)
+			elif sql in self.statement_tables:
+				# the prepared statement was reused from sqlite3 statement cache
+				reads, writes = self.statement_tables[sql]
+		if writes:
+			self.invalidate(writes)
+		elif con.total_changes != changes:
+			self.clear()
+			return (result, frozenset(reads), None)
+		return (result, frozenset(reads), frozenset(writes))
+
+	def make_key(self, kind, sql, params):
+		if isinstance(params, dict):
+			params = tuple(sorted(params.items()))
+		elif params:
+			params = tuple(params)
+		else:
+			params = ()
+		key = (kind, ' '.join(sql.split()), params)
+		try:
+			hash(key)
+		except TypeError:
+			return None
+		return key
+
+	def get(self, key):
+		'''
+		Return (True, value) when hit, otherwise (False, None)
+		'''
+		with self.lock:
+			entry = self.entries.get(key)
+			if entry is not None and entry[3] and entry[3] < time.monotonic():
+				self.remove(key)
+				entry = None
+			if entry is None:
+				self.stats_counter['misses'] += 1
+				return (False, None)
+			self.entries.move_to_end(key)
+			self.stats_counter['hits'] += 1
+			return (True, entry[0])
+
+	def current_version(self):
+		with self.lock:
+			return self.version
+
+	def put(self, key, value, tables, version):
+		'''
+		version is current_version() before the query executed, the result is
+		dropped if any of its tables was invalidated during the query.
+		'''
+		if not tables:
+			return None
+		size = self.sizeof(value)
+		if size > self.max_bytes:
+			return None
+		expire = time.monotonic() + self.ttl if self.ttl else 0
+		with self.lock:
+			if self.cleared > version:
+				return None
+			for table in tables:
+				if self.invalidated.get(table, -1) > version:
+					return None
+			if key in self.entries:
+				self.remove(key)
+			self.entries[key] = (value, tables, size, expire)
+			self.bytes += size
+			for table in tables:
+				self.table_keys[table].add(key)
+			while self.entries and (len(self.entries) > self.max_entries or self.bytes > self.max_bytes):
+				self.remove(next(iter(self.entries)))
+				self.stats_counter['evictions'] += 1
+
+	def remove(self, key):
+		# must be called with the lock held
+		value, tables, size, expire = self.entries.pop(key)
+		self.bytes -= size
+		for table in tables:
+			keys = self.table_keys.get(table)
+			if keys is not None:
+				keys.discard(key)
+				if not keys:
+					del self.table_keys[table]
+
+	def invalidate(self, tables):
+		with self.lock:
+			self.version += 1
+			for table in tables:
+				self.invalidated[table] = self.version
+				for key in list(self.table_keys.get(table, ())):
+					self.remove(key)
+					self.stats_counter['invalidations'] += 1
+
+	def clear(self):
+		with self.lock:
+			self.version += 1
+			self.cleared = self.version
+			self.stats_counter['invalidations'] += len(self.entries)
+			self.entries.clear()
+			self.table_keys.clear()
+			self.bytes = 0
+
+	def sizeof(self, value):
+		size = sys.getsizeof(value)
+		if isinstance(value, (list, tuple)):
+			for row in value:
+				size += sys.getsizeof(row)
+				if isinstance(row, (tuple, sqlite3.Row)):
+					size += sum([sys.getsizeof(v) for v in row])
+		return size
+
+	def stats(self):
+		with self.lock:
+			stats = dict(self.stats_counter)
+			stats['entries'] = len(self.entries)
+			stats['bytes'] = self.bytes
+		return stats
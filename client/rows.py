@@ -0,0 +1,55 @@
+import collections
+
+class NamedRowFactory(object):
+	'''
+	Row factory returns namedtuple rows, the row class is created once per
+	query(cursor.description) instead of per row.
+
+	One factory per connection, rows of a finished query are still valid
+	after the class is replaced.
+	'''
+
+	def __init__(self, max_classes=64):
+		self.description = None
+		self.row_class = None
+		self.classes = collections.OrderedDict()
+		self.max_classes = max_classes
+
+	def __call__(self, cursor, row):
+		description = cursor.description
+		if description is not self.description:
+			self.row_class = self.get_class(description)
+			self.description = description
+		return tuple.__new__(self.row_class, row)
+
+	def get_class(self, description):
+		names = tuple([d[0] for d in description])
+		row_class = self.classes.get(names)
+		if row_class is None:
+			# rename=True turns invalid/duplicate column names(e.g. count(*)) into _0, _1 ...
+			row_class = collections.namedtuple('Row', names, rename=True)
+			self.classes[names] = row_class
+			if len(self.classes) > self.max_classes:
+				self.classes.popitem(last=False)
+		else:
+			self.classes.move_to_end(names)
+		return row_class
+
+class TextInterner(object):
+	'''
+	Text factory shares one str object among equal TEXT values, saves memory
+	for columns with many repeated values(e.g. status, city). The table is
+	cleared when it holds max_size values.
+	'''
+
+	def __init__(self, max_size=10000):
+		self.max_size = max_size
+		self.table = {}
+
+	def __call__(self, data):
+		text = self.table.get(data)
+		if text is None:
+			if len(self.table) >= self.max_size:
+				self.table.clear()
+			text = self.table[data] = data.decode('utf8')
+		return text
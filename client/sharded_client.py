@@ -0,0 +1,300 @@
+import hashlib, heapq, itertools, time
+
+from .async_client import Worker
+
+def shard_hash(value):
+	'''
+	Stable hash of a shard key value, the same in every process(unlike hash()).
+	'''
+	data = value if isinstance(value, bytes) else repr(value).encode('utf8')
+	return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+
+class Descending(object):
+	'''
+	Wrap a sort key to reverse its order, for DESC terms of mixed directions.
+	'''
+	__slots__ = ('key',)
+
+	def __init__(self, key):
+		self.key = key
+
+	def __lt__(self, other):
+		return other.key < self.key
+
+	def __eq__(self, other):
+		return self.key == other.key
+
+def value_key(value):
+	# SQLite orders NULL < INTEGER/REAL < TEXT < BLOB
+	if value is None:
+		return (0, 0)
+	elif isinstance(value, (int, float)):
+		return (1, value)
+	elif isinstance(value, str):
+		return (2, value)
+	return (3, bytes(value))
+
+class Shard(Worker):
+	'''
+	Worker owns the SimpleClient of one database file, methods are called by name.
+	'''
+
+	def call(self, method, *args, **kwargs):
+		return self.submit(getattr(self.client, method), *args, **kwargs)
+
+class ShardedClient(object):
+	'''
+	Spread rows of tables over several database files by the hash of a
+	shard key column, accept the same arguments as SimpleClient(except 
+	pool_size and enable_write_queue, every shard has one connection).
+
+	databases 	-> database files, one shard per file
+	shard_key 	-> the column routes rows, insert_table() requires it
+
+	insert_table/update_table/id_table go to the shard of the key value(update_table
+	when the conditions have shard_key = value), other reads and writes run on all
+	shards in parallel and results are merged.
+
+	Row ids are allocated by every shard, so they are unique only when the shard
+	key is 'id' and inserts provide it.
+
+	Example:
+
+		client = ShardedClient(['user-0.db', 'user-1.db', 'user-2.db'], shard_key='username')
+		client.create_table('user', (('username', 's'), ('age', 'i')))
+		client.insert_table('user', {'username': 'tom', 'age': 20})
+		rows = client.select_table('user', orderby=('age DESC',), page_nth=1, page_num=10)
+		client.close()
+	'''
+
+	def __init__(self, databases, shard_key='id', **kwargs):
+		if not databases:
+			raise Exception('Please specify database files of shards')
+		self.shard_key = shard_key
+		self.shards = []
+		for i, database in enumerate(databases):
+			kwargs['database'] = database
+			self.shards.append(Shard('sqlite3-shard-%d' % i, kwargs))
+		self.column_names = {}
+
+	def shard_index(self, value):
+		return shard_hash(value) % len(self.shards)
+
+	def shard(self, value):
+		return self.shards[self.shard_index(value)]
+
+	def broadcast(self, method, *args, **kwargs):
+		'''
+		Call the method of every shard in parallel, return results in shard order.
+		'''
+		futures = [shard.call(method, *args, **kwargs) for shard in self.shards]
+		return [future.result() for future in futures]
+
+	def shard_condition(self, where_condition):
+		'''
+		Return the shard key value when the conditions have shard_key = value.
+		'''
+		client = self.shards[0].client
+		for name, op, value in client.condition_items(where_condition):
+			if name == self.shard_key and op in ['=', '==']:
+				return (value,)
+		return None
+
+	def script(self, sql_statements, autocommit=True):
+		return self.broadcast('script', sql_statements, autocommit)
+
+	def create_table(self, *args, **kwargs):
+		return self.broadcast('create_table', *args, **kwargs)
+
+	def create_index(self, *args, **kwargs):
+		return self.broadcast('create_index', *args, **kwargs)
+
+	def drop_table(self, tbl_name):
+		self.column_names.pop(tbl_name, None)
+		return self.broadcast('drop_table', tbl_name)
+
+	def analyze(self, tbl_name=None):
+		return self.broadcast('analyze', tbl_name)
+
+	def commit(self):
+		return self.broadcast('commit')
+
+	def rollback(self):
+		return self.broadcast('rollback')
+
+	def insert_table(self, tbl_name, columns={}):
+		'''
+		Return lastrowid of the shard.
+		'''
+		if self.shard_key not in columns:
+			raise Exception('Please specify the shard key {} of inserted row'.format(self.shard_key))
+		return self.shard(columns[self.shard_key]).call('insert_table', tbl_name, columns).result()
+
+	def insert_many_table(self, tbl_name, rows, columns=(), batch_size=10000, **kwargs):
+		'''
+		Rows are grouped by shard, a group is inserted(insert_many_table of the shard)
+		as soon as it has batch_size rows, so rows of a generator are never held
+		at once. Every shard inserts one batch at a time, in parallel with the others.
+
+		Return {'rows', 'seconds', 'rows_per_sec'} of all shards.
+		'''
+		if not isinstance(batch_size, int) or batch_size <= 0:
+			raise Exception('argument batch_size should be a positive int')
+		start = time.perf_counter()
+		rows = iter(rows)
+		columns = tuple(columns)
+		if not columns:
+			first = next(rows, None)
+			if first is None:
+				return {'rows': 0, 'seconds': 0.0, 'rows_per_sec': 0.0}
+			rows = itertools.chain([first], rows)
+			if isinstance(first, dict):
+				columns = tuple(first.keys())
+		if self.shard_key not in columns:
+			raise Exception('Please specify the shard key {} of inserted rows'.format(self.shard_key))
+		position = columns.index(self.shard_key)
+		groups = [[] for shard in self.shards]
+		pending = [None for shard in self.shards]
+		count = 0
+		def flush(i):
+			# wait for the previous batch of the shard
+			inserted = pending[i].result()['rows'] if pending[i] is not None else 0
+			pending[i] = self.shards[i].call('insert_many_table', tbl_name, groups[i], columns, **kwargs) if groups[i] else None
+			groups[i] = []
+			return inserted
+		for row in rows:
+			value = row[self.shard_key] if isinstance(row, dict) else row[position]
+			i = self.shard_index(value)
+			groups[i].append(row)
+			if len(groups[i]) >= batch_size:
+				count += flush(i)
+		# submit the rest groups, then wait for them
+		for i in range(len(self.shards)):
+			count += flush(i)
+		for i in range(len(self.shards)):
+			count += flush(i)
+		seconds = time.perf_counter() - start
+		return {
+			'rows': count,
+			'seconds': seconds,
+			'rows_per_sec': count / seconds if seconds > 0 else 0.0
+		}
+
+	def update_table(self, tbl_name, columns, where_condition=()):
+		'''
+		Return the affected row count, summed when the update runs on all shards.
+		'''
+		if self.shard_key in columns:
+			raise Exception('Shard key {} cannot be updated, rows would be in the wrong shard'.format(self.shard_key))
+		key = self.shard_condition(where_condition)
+		if key is not None:
+			return self.shard(key[0]).call('update_table', tbl_name, columns, where_condition).result()
+		return sum(self.broadcast('update_table', tbl_name, columns, where_condition))
+
+	def id_table(self, tbl_name, item_id):
+		'''
+		Read the shard of item_id when the shard key is id, otherwise search all shards.
+		'''
+		if self.shard_key == 'id':
+			return self.shard(item_id).call('id_table', tbl_name, item_id).result()
+		for row in self.broadcast('id_table', tbl_name, item_id):
+			if row is not None:
+				return row
+		return None
+
+	def count_table(self, tbl_name, where_condition=(), mode=None):
+		key = self.shard_condition(where_condition)
+		if key is not None:
+			return self.shard(key[0]).call('count_table', tbl_name, where_condition, mode).result()
+		return sum(self.broadcast('count_table', tbl_name, where_condition, mode))
+
+	def table_columns(self, tbl_name):
+		if tbl_name not in self.column_names:
+			rows = self.shards[0].call('fetchall', 'PRAGMA table_info({})'.format(tbl_name)).result()
+			self.column_names[tbl_name] = [row[1] for row in rows]
+		return self.column_names[tbl_name]
+
+	def collation_key(self, coll_name):
+		coll_name = coll_name.lower()
+		if coll_name == 'binary':
+			return None
+		elif coll_name == 'nocase':
+			return lambda s: s.lower() if isinstance(s, str) else s
+		elif coll_name == 'rtrim':
+			return lambda s: s.rstrip(' ') if isinstance(s, str) else s
+		for item in self.shards[0].client.custom_functions:
+			if item[0] == 'collation' and item[1].lower() == coll_name and len(item) > 3 and item[3]:
+				return item[3]
+		raise Exception('Collation {} has no sort key, rows of shards cannot be merged'.format(coll_name))
+
+	def sort_key(self, tbl_name, columns, orderby):
+		'''
+		Return a function computes the Python sort key of a row, which orders
+		rows the same as ORDER BY of SQLite.
+		'''
+		client = self.shards[0].client
+		names = [c[0] if isinstance(c, tuple) else c for c in columns] if columns else self.table_columns(tbl_name)
+		terms = []
+		for term in orderby:
+			m = client.collate_pattern.match(term)
+			if m:
+				column, key, direction = m.group(1), self.collation_key(m.group(2)), m.group(3)
+			else:
+				parts = term.split()
+				column, key = parts[0], None
+				direction = parts[1] if len(parts) > 1 else None
+			if column not in names:
+				raise Exception('Order by column {} should be selected to merge rows of shards'.format(column))
+			descending = bool(direction) and direction.strip().upper() == 'DESC'
+			terms.append((names.index(column), key, descending))
+		def row_key(row):
+			k = []
+			for i, key, descending in terms:
+				value = row[i]
+				if key is not None and value is not None:
+					value = key(value)
+				value = value_key(value)
+				k.append(Descending(value) if descending else value)
+			return tuple(k)
+		return row_key
+
+	def select_table(self,
+		tbl_name,
+		columns=(),
+		where_condition=(),
+		orderby=(),
+		groupby=(),
+		page_nth=-1,
+		page_num=-1):
+		'''
+		The same as SimpleClient.select_table(), rows of shards are merged by
+		orderby(columns in orderby should be selected), or concatenated in shard
+		order. For a page every shard returns its first page_nth*page_num rows.
+
+		groupby is not supported since groups span shards.
+		'''
+		if groupby:
+			raise Exception('groupby is not supported by sharded tables')
+		paging = page_num > 0 and page_nth > 0
+		limit = page_nth * page_num if paging else -1
+		key = self.shard_condition(where_condition)
+		shards = [self.shard(key[0])] if key is not None else self.shards
+		futures = [shard.call('select_table', tbl_name, columns, where_condition, orderby,
+			page_nth=1 if paging else -1, page_num=limit) for shard in shards]
+		results = [future.result() for future in futures]
+		if orderby and len(results) > 1:
+			rows = heapq.merge(*results, key=self.sort_key(tbl_name, columns, orderby))
+		else:
+			rows = itertools.chain(*results)
+		if paging:
+			return list(itertools.islice(rows, (page_nth-1)*page_num, limit))
+		return list(rows)
+
+	def one_table(self, tbl_name, where_condition=(), orderby=()):
+		rows = self.select_table(tbl_name, (), where_condition, orderby, page_nth=1, page_num=1)
+		return rows[0] if rows else None
+
+	def close(self, commit=True):
+		for shard in self.shards:
+			shard.close(commit)
+		self.shards = []
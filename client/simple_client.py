@@ -1,17 +1,38 @@
+import json, base64, itertools, operator, sqlite3, time, re, threading, collections, os
+
 from .base_client import BaseClient
+from .table_stats import parse_stat, decode_first_value, IndexStats, estimate_selectivity
+from .index_advisor import IndexAdvisor, normalize_expression, index_terms
+from .conditions import quote_identifier, normalize_operator, legacy_condition_pattern
+from ..dumper import export_tables, export_connection, ImportReader
 
 class SimpleClient(BaseClient):
 
+	condition_pattern = re.compile(r'^\s*(<=|>=|<>|!=|==|=|<|>|\s+LIKE\s+|\s+GLOB\s+)\s*(.+?)\s*$', re.IGNORECASE)
+	integer_pattern = re.compile(r'^[-+]?\d+$')
+	float_pattern = re.compile(r'^[-+]?(\d+\.\d*|\.\d+)([eE][-+]?\d+)?$')
+	collate_pattern = re.compile(r'^\s*(.+?)\s+COLLATE\s+(\w+)(\s+(?:ASC|DESC))?\s*$', re.IGNORECASE)
+
+	# table of the trigger-maintained row counters
+	row_counts_table = 'quick_sqlite3_row_counts'
+
 	def __init__(self, **kwargs):
 		super(SimpleClient, self).__init__(**kwargs)
+		self.sql_cache = collections.OrderedDict()
+		self.sql_cache_lock = threading.Lock()
+		self.sql_cache_hits = 0
+		self.sql_cache_misses = 0
+		self.index_advisor = IndexAdvisor() if self.enable_index_advisor else None
+		# whether row_counts_table exists, checked once per client
+		self.row_counts_exists = None
 
 	def script(self, sql_statements, autocommit=True):
 		'''
 		execute multiple sql statements.
 		'''
-		cursor = self.client.executescript(sql_statements, autocommit)
+		cursor = self.executescript(sql_statements, autocommit)
 
-	def sql(self, sql, params, autocommit=True):
+	def sql(self, sql, params, autocommit=True, stream=False, batch_size=None):
 		'''
 		Parameters:
 
@@ -23,17 +44,27 @@ class SimpleClient(BaseClient):
 			params
 				None, tuple, dict, Iterator, Generator
 
+			stream
+				SELECT result rows will be yielded lazily in batch_size batches
+
 		Return:
 
-			SELECT 			-> result set list
+			SELECT 			-> result set list(or generator when stream is True)
 			INSERT 			-> lastrowid
 			UPDATE|DELETE 	-> affected row count
 			else			-> affected row count
 		'''
+		sql_upper = sql.upper().strip()
+		if sql_upper.startswith('SELECT') and (not params or isinstance(params, (tuple, list, dict))):
+			# read statement may run on a pooled connection
+			if stream:
+				return self.iterate(sql, params, batch_size)
+			return self.fetchall(sql, params)
+
 		cursor = None
 		if not params:
 			cursor = self.execute(sql, None, autocommit)
-		if isinstance(params, tuple) or isinstance(params, list) or isinstance(params, dict):
+		elif isinstance(params, tuple) or isinstance(params, list) or isinstance(params, dict):
 			cursor = self.execute(sql, params, autocommit)
 		elif hasattr(params, '__iter__'):
 			# params is Iterator or Generator
@@ -41,21 +72,41 @@ class SimpleClient(BaseClient):
 		else:
 			raise Exception('sql parameters invalid')
 		
-		sql_upper = sql.upper().strip()
-		if sql_upper.startswith('SELECT'):
-			return cursor.fetchall()
-		elif sql_upper.startswith('INSERT'):
+		if sql_upper.startswith('INSERT'):
 			return cursor.lastrowid
 		else:
 			# UPDATE|DELETE|Others
 			return cursor.rowcount
 
-	def create_table(self, tbl_name, columns, with_id_primary_key=True):
+	def create_table(self, 
+		tbl_name, 
+		columns, 
+		with_id_primary_key=True, 
+		generated_columns=(), 
+		indexes=(), 
+		sort_keys=(), 
+		row_counter=False):
 		'''
 		Parameters:
 
 			with_id_primary_key = True -> add id column as table's primary key
 			columns = ((column_name, column_type, [column_constraint])) -> column definitions
+			generated_columns = ((column_name, column_type, expression, ['STORED'])) -> columns 
+				computed from other columns, e.g. ('username_md5', 's', 'md5sum(username)'), 
+				VIRTUAL by default(computed when read), STORED ones are computed when written
+			indexes = (expression, (expression1, expression2), {...}) -> indexes on columns or 
+				expressions, e.g. 'md5sum(username)' or ('age', 'score'), a dict is the keyword 
+				arguments of create_index, e.g. {'expressions': ('age',), 'where': 'age > 60'} is 
+				a partial index, {'expressions': ('email',), 'unique': True}
+			sort_keys = ((column_name, collation)) -> index the sort keys of column with a 
+				collation registered with key function, select_table(orderby=('username COLLATE reverse',))
+				becomes an index-ordered scan instead of calling the collation for every comparison
+			row_counter = True -> maintain the number of rows with triggers, 
+				see count_table(mode='counter')
+
+			Custom functions used in generated columns and indexes should be registered 
+			with deterministic=True, queries use the index when they have the same 
+			expression, e.g. where_condition = ((Expression('md5sum(username)'), value),)
 
 			Avaiable column types(default TEXT)
 			   type  	SQLite3 	Python
@@ -69,6 +120,11 @@ class SimpleClient(BaseClient):
 				NOT NULL    -> the associated column may not contain a NULL value
 				UNIQUE      -> each row must contain a unique combination of values in the columns identified by the UNIQUE constraint. 
 		'''
+		keys = self.collation_keys()
+		for column_name, collation in sort_keys:
+			if collation.lower() not in keys:
+				raise Exception('collation {} has no sort key function'.format(collation))
+
 		column_definitions = []
 		if with_id_primary_key:
 			column_definitions.append('id INTEGER PRIMARY KEY AUTOINCREMENT')
@@ -80,6 +136,11 @@ class SimpleClient(BaseClient):
 				column_constraint = ''
 			col_def = '{} {} {}'.format(column_name, column_type, column_constraint).strip()
 			column_definitions.append(col_def)
+		for column in generated_columns:
+			column_name, column_type, expression = column[:3]
+			storage = 'STORED' if len(column) > 3 and str(column[3]).upper() == 'STORED' else 'VIRTUAL'
+			column_definitions.append('{} {} GENERATED ALWAYS AS ({}) {}'.format(
+				column_name, self.basic_types.get(column_type, 'TEXT'), expression, storage))
 		
 		sql = 'CREATE TABLE IF NOT EXISTS {table} ({columns});'.format(
 			table=tbl_name, 
@@ -87,56 +148,407 @@ class SimpleClient(BaseClient):
 		
 		self.debug(sql)
 		self.execute(sql)
+		for index in indexes:
+			if isinstance(index, dict):
+				self.create_index(tbl_name, **index)
+			else:
+				self.create_index(tbl_name, index)
+		for column_name, collation in sort_keys:
+			self.create_index(tbl_name, '{}({})'.format(self.sort_key_function(collation), column_name))
+		if row_counter:
+			self.enable_row_counter(tbl_name)
 		self.commit()
 
+	def index_name(self, tbl_name, expressions):
+		slug = re.sub(r'\W+', '_', '_'.join(expressions)).strip('_').lower()
+		return 'idx_{}_{}'.format(re.sub(r'\W+', '_', tbl_name), slug)
+
+	def create_index(self, tbl_name, expressions, unique=False, where=None, name=None):
+		'''
+		Create an index on columns or expressions(e.g. 'md5sum(username)') of 
+		table if it doesn't exist, return the index name.
+
+		unique = True 		-> UNIQUE index
+		where = 'age > 60' 	-> partial index only contains rows match the condition, 
+							   it's used by queries whose WHERE implies the condition
+		'''
+		if isinstance(expressions, str):
+			expressions = (expressions,)
+		expressions = tuple(expressions)
+		if not name:
+			name = self.index_name(tbl_name, expressions + ((where,) if where else ()))
+		sql = 'CREATE {unique}INDEX IF NOT EXISTS {name} ON {table} ({expressions})'.format(
+			unique='UNIQUE ' if unique else '', 
+			name=name, 
+			table=tbl_name, 
+			expressions=', '.join(expressions))
+		if where:
+			sql += ' WHERE {}'.format(where)
+		self.debug(sql)
+		self.execute(sql)
+		return name
+
+	def index_columns(self, tbl_name):
+		'''
+		Return {index name: [column or expression]} of non-partial indexes of table, 
+		expressions(e.g. 'md5sum(username)') are read from the CREATE INDEX statement.
+		'''
+		indexes = {}
+		for row in self.fetchall('PRAGMA index_list({})'.format(tbl_name)):
+			if row[4]:
+				continue
+			terms = None
+			columns = []
+			# (seqno, cid, name, desc, coll, key), cid -2 is an expression
+			for info in self.fetchall('PRAGMA index_xinfo({})'.format(row[1])):
+				if not info[5]:
+					continue
+				if info[1] == -2:
+					if terms is None:
+						sql = self.fetchone("SELECT sql FROM sqlite_master WHERE type = 'index' AND name = ?", (row[1],))
+						terms = index_terms(sql[0]) if sql and sql[0] else []
+					columns.append(terms[info[0]] if info[0] < len(terms) else None)
+				else:
+					columns.append(info[2])
+			indexes[row[1]] = columns
+		return indexes
+
+	def advise(self, tbl_name, where_condition, orderby, sql, params):
+		# record the query shape for the index advisor
+		if self.index_advisor is not None:
+			conditions = [(name, op) for name, op, value in self.condition_items(where_condition) if op]
+			self.index_advisor.record(tbl_name, conditions, self.rewrite_orderby(orderby), sql, params)
+
+	def index_report(self):
+		'''
+		Explain every query shape recorded by the index advisor(enable_index_advisor).
+
+		Return:
+
+			[{'table', 'sql', 'calls', 'plan', 'access': 'SCAN' or 'SEARCH', 'temp_sort', 'columns'}], 
+			shapes failed to explain have 'error' and are never suggested
+		'''
+		if self.index_advisor is None:
+			return []
+		return self.index_advisor.report(self.fetchall)
+
+	def suggest_indexes(self, min_calls=1):
+		'''
+		Suggest indexes for recorded query shapes which scan the whole table or 
+		sort rows with a temp b-tree, indexes already exist are skipped.
+
+		Return:
+
+			[{'table', 'columns', 'calls', 'plan'}]
+		'''
+		if self.index_advisor is None:
+			return []
+		suggestions = []
+		existing = {}
+		for item in self.index_advisor.suggest(self.fetchall, min_calls):
+			if item['table'] not in existing:
+				existing[item['table']] = [[normalize_expression(c) if c else None for c in columns] 
+					for columns in self.index_columns(item['table']).values()]
+			n = len(item['columns'])
+			if [columns for columns in existing[item['table']] 
+				if columns[:n] == [normalize_expression(c) for c in item['columns']]]:
+				continue
+			suggestions.append(item)
+		return suggestions
+
+	def create_suggested_indexes(self, min_calls=1):
+		'''
+		Create the indexes suggested by suggest_indexes(), return their names.
+		'''
+		names = [self.create_index(item['table'], item['columns']) for item in self.suggest_indexes(min_calls)]
+		if names:
+			self.commit()
+		return names
+
 	def drop_table(self, tbl_name):
 		sql = 'DROP TABLE IF EXISTS {table}'.format(table=tbl_name)
 		self.debug(sql)
 		self.execute(sql)
+		if self.has_row_counts():
+			self.execute('DELETE FROM {} WHERE tbl_name=?'.format(self.row_counts_table), (tbl_name,))
+		self.commit()
+
+	def enable_row_counter(self, tbl_name):
+		'''
+		Maintain the number of rows of table in row_counts_table with insert/delete 
+		triggers, count_table(tbl_name, mode='counter') reads one row instead of 
+		walking the whole table. Every insert/delete updates the counter row.
+
+		Rows replaced by INSERT OR REPLACE only fire the delete trigger when 
+		recursive_triggers is on(the default config).
+		'''
+		self.execute('CREATE TABLE IF NOT EXISTS {} (tbl_name TEXT PRIMARY KEY, n INTEGER NOT NULL)'.format(
+			self.row_counts_table))
+		self.row_counts_exists = True
+		for event, delta in [('INSERT', '+ 1'), ('DELETE', '- 1')]:
+			sql = '''CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table} BEGIN 
+				UPDATE {counts} SET n = n {delta} WHERE tbl_name = '{table}'; END'''.format(
+				name='{}_row_count_{}'.format(tbl_name, event.lower()), 
+				event=event, 
+				table=tbl_name, 
+				counts=self.row_counts_table, 
+				delta=delta)
+			self.debug(sql)
+			self.execute(sql)
+		self.execute('INSERT OR REPLACE INTO {} (tbl_name, n) SELECT ?, COUNT(*) FROM {}'.format(
+			self.row_counts_table, tbl_name), (tbl_name,))
+		self.commit()
+
+	def analyze(self, tbl_name=None):
+		'''
+		Collect statistics(sqlite_stat1, and sqlite_stat4 if SQLite is built with it) 
+		used by the query planner and count_table(mode='approx').
+		'''
+		sql = 'ANALYZE {}'.format(tbl_name) if tbl_name else 'ANALYZE'
+		self.debug(sql)
+		self.execute(sql)
 		self.commit()
 
-	def count_table(self, tbl_name, where_condition=()):
+	def sql_cache_stats(self):
+		'''
+		Hit/miss counters of the generated SQL cache.
+		'''
+		return {
+			'hits': self.sql_cache_hits,
+			'misses': self.sql_cache_misses,
+			'size': len(self.sql_cache)
+		}
+
+	def cached_sql(self, key, build):
 		'''
-		where_condition = (('age', '50', '>'))
+		Builders generate placeholder-only SQL, so the SQL string only depends on 
+		the statement shape(key), it's memoized to skip rebuilding and let sqlite3 
+		reuse the prepared statement from its statement cache.
 		'''
+		with self.sql_cache_lock:
+			sql = self.sql_cache.get(key)
+			if sql is not None:
+				self.sql_cache_hits += 1
+				self.sql_cache.move_to_end(key)
+				return sql
+			self.sql_cache_misses += 1
+		sql = build()
+		with self.sql_cache_lock:
+			self.sql_cache[key] = sql
+			while len(self.sql_cache) > max(self.cached_sql_statements, 1):
+				self.sql_cache.popitem(last=False)
+		return sql
+
+	def parse_condition(self, condition):
+		'''
+		Convert a literal condition string(e.g. '>30', '="xiao"') into (op, value), 
+		return None when it's not a number or quoted string literal.
+		'''
+		m = self.condition_pattern.match(str(condition))
+		if not m:
+			return None
+		op, literal = m.group(1).strip().upper(), m.group(2)
+		if len(literal) >= 2 and literal[0] == literal[-1] and literal[0] in '\'"':
+			return (op, literal[1:-1].replace(literal[0]*2, literal[0]))
+		if self.integer_pattern.match(literal):
+			return (op, int(literal))
+		if self.float_pattern.match(literal):
+			return (op, float(literal))
+		return None
+
+	def build_where(self, where_condition):
+		'''
+		where_condition items:
+			(name, value) 		-> `name` = ?, value is bound as a parameter
+			(name, condition) 	-> legacy form, e.g. ('age', '>30') or ('username', '="xiao"'), 
+								   the number or quoted string literal is bound as a parameter, 
+								   other conditions(e.g. ' IS NULL', '>age') raise, use a 3-tuple
+			(name, value, op) 	-> `name` op ?, e.g. ('age', 30, '>'), ('age', None, 'IS'), 
+								   op 'IN'/'NOT IN' accept a list value, see conditions.operators
+			name is quoted as a column name unless it's an Expression, e.g. 
+			(Expression('md5sum(username)'), digest), to compare with a string which looks 
+			like a condition use ('name', '>30', '=')
+
+		Return:
+
+			(shape, params), shape is a tuple of SQL expressions used as cache key
+		'''
+		shape = []
 		params = []
-		if where_condition:
-			items = []
-			for name, value, op in where_condition:
-				items.append(name+op)
+		for name, op, value in self.condition_items(where_condition):
+			name = quote_identifier(name)
+			if op in ['IN', 'NOT IN']:
+				value = list(value) if isinstance(value, (list, tuple, set)) else [value]
+				shape.append('{} {} ({})'.format(name, op, ', '.join(['?']*len(value))))
+				params.extend(value)
+			else:
+				shape.append('{} {} ?'.format(name, op))
 				params.append(value)
-			where = ' and '.join(items)
-			sql = 'SELECT COUNT(*) FROM {table} WHERE {where}'.format(table=tbl_name, where=where)
-		else:
+		return (tuple(shape), params)
+
+	def condition_items(self, where_condition):
+		'''
+		Return [(name, op, value)] of where_condition, op is normalized(e.g. 'NOT LIKE').
+		'''
+		items = []
+		for item in where_condition:
+			if len(item) >= 3:
+				items.append((item[0], normalize_operator(item[2]), item[1]))
+			elif len(item) == 2:
+				value = item[1]
+				if isinstance(value, str) and legacy_condition_pattern.match(value):
+					parsed = self.parse_condition(value)
+					if parsed is None:
+						raise Exception('where condition {!r} of {} cannot be bound as a parameter, use (name, value, op)'.format(value, item[0]))
+					items.append((item[0], normalize_operator(parsed[0]), parsed[1]))
+				else:
+					items.append((item[0], '=', value))
+			else:
+				raise Exception('where condition should be (name, value) or (name, value, op)')
+		return items
+
+	def count_table(self, tbl_name, where_condition=(), mode=None):
+		'''
+		where_condition = (('age', 50, '>'),) or (('username', 'xiao'),)
+
+		mode(default is the count_mode config)
+			'exact' 	-> SELECT COUNT(*)
+			'counter' 	-> read the trigger-maintained counter(see create_table row_counter), 
+						   filtered counts or tables without counter fall back to exact
+			'approx' 	-> estimate from statistics collected by analyze(), the number 
+						   of rows from sqlite_stat1, selectivity of conditions from 
+						   sqlite_stat4 samples or average rows per key, falls back to 
+						   exact when the table has no statistics
+			'index' 	-> count with the smallest index covering all columns of the 
+						   conditions(INDEXED BY), falls back to exact
+		'''
+		mode = mode if mode else self.count_mode
+		if mode not in ['exact', 'counter', 'approx', 'index']:
+			raise Exception('count mode should be exact, counter, approx or index')
+		if mode == 'counter' and not where_condition:
+			count = self.counter_count(tbl_name)
+			if count is not None:
+				return count
+		elif mode == 'approx':
+			count = self.approx_count(tbl_name, where_condition)
+			if count is not None:
+				return count
+		index = self.covering_index(tbl_name, where_condition) if mode == 'index' else None
+
+		where, params = self.build_where(where_condition)
+		def build():
 			sql = 'SELECT COUNT(*) FROM {table}'.format(table=tbl_name)
+			if index:
+				sql += ' INDEXED BY {}'.format(index)
+			if where:
+				sql += ' WHERE {}'.format(' and '.join(where))
+			return sql
+		sql = self.cached_sql(('count', tbl_name, where, index), build)
 		
 		self.debug(sql)
-		cursor = self.execute(sql, params)
-		result = cursor.fetchone()
+		self.advise(tbl_name, where_condition, (), sql, params)
+		result = self.fetchone(sql, params, cached=True)
 		return result[0] if result else 0
 
+	def has_row_counts(self):
+		if self.row_counts_exists is None:
+			self.row_counts_exists = self.has_table(self.row_counts_table)
+		return self.row_counts_exists
+
+	def counter_count(self, tbl_name):
+		if not self.has_row_counts():
+			return None
+		sql = 'SELECT n FROM {} WHERE tbl_name=?'.format(self.row_counts_table)
+		self.debug(sql)
+		result = self.fetchone(sql, (tbl_name,), cached=True)
+		return result[0] if result else None
+
+	def table_stats(self, tbl_name):
+		'''
+		Return (the number of rows, {leading column: IndexStats}) from 
+		sqlite_stat1/sqlite_stat4, or (None, {}) when the table isn't analyzed.
+		'''
+		if not self.has_table('sqlite_stat1'):
+			return (None, {})
+		rows = self.fetchall('SELECT idx, stat FROM sqlite_stat1 WHERE tbl=?', (tbl_name,))
+		if not rows:
+			return (None, {})
+		total = None
+		stats = {}
+		has_stat4 = self.has_table('sqlite_stat4')
+		# rows of partial indexes only count the rows they cover
+		partial = set([row[1] for row in self.fetchall('PRAGMA index_list({})'.format(tbl_name)) if row[4]])
+		for idx, stat in [(row[0], row[1]) for row in rows]:
+			if idx in partial:
+				continue
+			stat = parse_stat(stat)
+			if stat:
+				total = stat[0]
+			if idx is None or len(stat) < 2:
+				continue
+			info = self.fetchall('PRAGMA index_info({})'.format(idx))
+			if not info or info[0][2] is None:
+				continue # expression index
+			samples = []
+			if has_stat4:
+				for neq, nlt, sample in [(r[0], r[1], r[2]) for r in self.fetchall(
+					'SELECT neq, nlt, sample FROM sqlite_stat4 WHERE tbl=? AND idx=?', (tbl_name, idx))]:
+					samples.append((decode_first_value(sample), parse_stat(neq)[0], parse_stat(nlt)[0]))
+			column = info[0][2]
+			if column not in stats or (samples and not stats[column].samples):
+				stats[column] = IndexStats(column, stat, samples)
+		return (total, stats)
+
+	def approx_count(self, tbl_name, where_condition=()):
+		total, stats = self.table_stats(tbl_name)
+		if total is None:
+			return None
+		selectivity = 1.0
+		for name, op, value in self.condition_items(where_condition):
+			selectivity *= estimate_selectivity(stats.get(name), total, name, op, value)
+		return int(round(total * selectivity))
+
+	def covering_index(self, tbl_name, where_condition=()):
+		'''
+		Return the name of the index with the fewest columns which covers all 
+		columns of where_condition, or None.
+		'''
+		columns = set([item[0] for item in where_condition]) - set(['id', 'rowid'])
+		best = None
+		for row in self.fetchall('PRAGMA index_list({})'.format(tbl_name)):
+			name, partial = row[1], row[4]
+			if partial:
+				continue
+			indexed = [info[2] for info in self.fetchall('PRAGMA index_info({})'.format(name))]
+			if columns.issubset(set(indexed)) and (best is None or len(indexed) < best[1]):
+				best = (name, len(indexed))
+		return best[0] if best else None
+
 	def id_table(self, tbl_name, item_id):
-		sql = 'SELECT * FROM {table} WHERE id=?'.format(table=tbl_name)
+		sql = self.cached_sql(('id', tbl_name), 
+			lambda: 'SELECT * FROM {table} WHERE id=?'.format(table=tbl_name))
 		self.debug(sql)
-		cursor = self.execute(sql, (item_id,))
-		return cursor.fetchone()
+		return self.fetchone(sql, (item_id,), cached=True)
 
 	def one_table(self, tbl_name, where_condition=(), orderby=()):
 		'''
-		where_condition = (('id', '>30'))
+		where_condition = (('id', 30, '>'),) or (('username', 'xiao'),)
 		orderby = ('username', 'age')
 		'''
-		sql = 'SELECT * FROM {table}'.format(table=tbl_name)
-		if where_condition:
-			where = ' and '.join([name+condition for name, condition in where_condition])
-			sql += ' WHERE {where}'.format(where=where)
-		if orderby:
-			sql += ' ORDER BY {}'.format(', '.join(orderby))
-		sql += ' LIMIT 1'
+		where, params = self.build_where(where_condition)
+		orderby = tuple(orderby)
+		def build():
+			sql = 'SELECT * FROM {table}'.format(table=tbl_name)
+			if where:
+				sql += ' WHERE {}'.format(' and '.join(where))
+			if orderby:
+				sql += ' ORDER BY {}'.format(', '.join(orderby))
+			return sql + ' LIMIT 1'
+		sql = self.cached_sql(('one', tbl_name, where, orderby), build)
 
 		self.debug(sql)
-		cursor = self.execute(sql)
-		return cursor.fetchone()
+		self.advise(tbl_name, where_condition, orderby, sql, params)
+		return self.fetchone(sql, params, cached=True)
 
 	def select_table(self, 
 		tbl_name, 
@@ -145,78 +557,432 @@ class SimpleClient(BaseClient):
 		orderby=(), 
 		groupby=(), 
 		page_nth=-1, 
-		page_num=-1):
+		page_num=-1,
+		stream=False,
+		batch_size=None,
+		columnar=False):
 		'''
 		columns = ((col_name1, typename), (col_name2, typename) ...)
-		where_condition = (('id', '>30'))
+		where_condition = (('id', 30, '>'),) or (('username', 'xiao'),)
 		orderby = ('username', 'age')
 		page_nth = 1 and page_num = 10 -> first 10 rows
+		stream = True -> return a generator yields rows in batch_size batches
+		columnar = True -> return {column: array} instead of rows, INTEGER/REAL columns 
+						   declared in create_table are numpy int64/float64 arrays(array.array 
+						   when numpy is not installed), see fetch_columns()
+		'''
+		columns = tuple(columns)
+		where, params = self.build_where(where_condition)
+		orderby = tuple(orderby)
+		groupby = tuple(groupby)
+		paging = page_num > 0 and page_nth > 0
+		def build():
+			if columns:
+				s = []
+				for column in columns:
+					if isinstance(column, tuple):
+						s.append('{column} AS "{column} [{typename}]"'.format(column=column[0], typename=column[1]))
+					else:
+						s.append(column)
+				sql = 'SELECT {columns} FROM {table}'.format(columns=', '.join(s), table=tbl_name)
+			else:
+				sql = 'SELECT * FROM {table}'.format(table=tbl_name)
+			if where:
+				sql += ' WHERE {}'.format(' and '.join(where))
+			if groupby:
+				sql += ' GROUP BY {}'.format(', '.join(groupby))
+			if orderby:
+				sql += ' ORDER BY {}'.format(', '.join(self.rewrite_orderby(orderby)))
+			if paging:
+				sql += ' LIMIT ? OFFSET ?'
+			return sql
+		sql = self.cached_sql(('select', tbl_name, columns, where, groupby, orderby, paging), build)
+		if paging:
+			params = params + [page_num, (page_nth-1)*page_num]
+
+		self.debug(sql)
+		self.advise(tbl_name, where_condition, orderby, sql, params)
+		if columnar:
+			return self.fetch_columns(sql, params, self.column_types(tbl_name), batch_size)
+		if stream:
+			return self.iterate(sql, params, batch_size)
+		return self.fetchall(sql, params, cached=True)
+
+	def rewrite_orderby(self, orderby):
+		'''
+		Replace 'column COLLATE name [ASC|DESC]' with 'sort_key_name(column) [ASC|DESC]' 
+		when the collation has a sort key function.
+		'''
+		keys = None
+		items = []
+		for item in orderby:
+			m = self.collate_pattern.match(item)
+			if m:
+				keys = self.collation_keys() if keys is None else keys
+				if m.group(2).lower() in keys:
+					item = '{}({}){}'.format(self.sort_key_function(m.group(2)), m.group(1), m.group(3) or '')
+			items.append(item)
+		return items
+
+	def column_types(self, tbl_name):
+		'''
+		Return {column name: basic type} of the table, columns whose declared 
+		type isn't one of basic_types are omitted.
+		'''
+		declared = dict([(v.upper(), k) for k, v in self.basic_types.items()])
+		rows = self.fetchall('PRAGMA table_info({})'.format(tbl_name))
+		types = {}
+		for row in rows:
+			t = declared.get((row[2] or '').upper())
+			if t is not None:
+				types[row[1]] = t
+		return types
+
+	def iter_table(self, 
+		tbl_name, 
+		columns=(), 
+		where_condition=(), 
+		orderby=(), 
+		groupby=(), 
+		batch_size=None):
 		'''
+		Lazily iterate the table rows, same as select_table(..., stream=True)
+
+		for row in client.iter_table('user', batch_size=500):
+			print(row['username'])
+		'''
+		return self.select_table(
+			tbl_name, 
+			columns, 
+			where_condition, 
+			orderby, 
+			groupby, 
+			stream=True, 
+			batch_size=batch_size)
+
+	def seek_table(self, 
+		tbl_name, 
+		columns=(), 
+		where_condition=(), 
+		key='id', 
+		page_num=10, 
+		cursor=None, 
+		desc=False):
+		'''
+		Keyset(seek) pagination, page on an indexed ordering key instead of 
+		OFFSET, so every page costs the same no matter how deep it is.
+
+		Parameters:
+
+			key 		-> ordering column name, or tuple of column names, should be unique(and indexed)
+			page_num 	-> the number of rows per page
+			cursor 		-> token returned by the previous call, None for the first page
+			desc 		-> page in descending key order
+
+		Return:
+
+			(rows, next_cursor), next_cursor is None when there is no more rows
+
+		Example:
+
+			rows, token = client.seek_table('user', page_num=100)
+			while token:
+				rows, token = client.seek_table('user', page_num=100, cursor=token)
+		'''
+		keys = (key,) if isinstance(key, str) else tuple(key)
+		if not keys:
+			raise Exception('argument key should not be empty')
+		if not isinstance(page_num, int) or page_num <= 0:
+			raise Exception('argument page_num should be a positive int')
+
 		if columns:
-			s = []
-			for column in columns:
-				if isinstance(column, tuple):
-					s.append('{column} AS "{column} [typename]"'.format(column=column[0], typename=[column[1]]))
-				else:
-					s.append(column)
-			sql = 'SELECT {columns} FROM {table}'.format(columns=', '.join(columns), table=tbl_name)
+			s = [column[0] if isinstance(column, tuple) else column for column in columns]
+			s.extend([k for k in keys if k not in s])
+			sql = 'SELECT {columns} FROM {table}'.format(columns=', '.join(s), table=tbl_name)
 		else:
 			sql = 'SELECT * FROM {table}'.format(table=tbl_name)
 
-		if where_condition:
-			sql += ' WHERE {}'.format(' and '.join([name+condition for name, condition in where_condition]))
-		if groupby:
-			sql += ' GROUP BY'.format(', '.join(groupby))
-		if orderby:
-			sql += ' ORDER BY {}'.format(', '.join(orderby))
-		if page_num > 0 and page_nth > 0:
-			limit = page_num
-			offset = (page_nth-1)*page_num
-			sql += ' LIMIT {limit} OFFSET {offset}'.format(limit=limit, offset=offset)
+		where, params = self.build_where(where_condition)
+		where = list(where)
+		if cursor:
+			values = self.decode_seek_cursor(cursor)
+			if len(values) != len(keys):
+				raise Exception('cursor does not match the key')
+			op = '<' if desc else '>'
+			if len(keys) == 1:
+				where.append('{}{}?'.format(keys[0], op))
+			else:
+				where.append('({}) {} ({})'.format(', '.join(keys), op, ', '.join(['?']*len(keys))))
+			params.extend(values)
+		if where:
+			sql += ' WHERE {}'.format(' and '.join(where))
+		direction = ' DESC' if desc else ''
+		sql += ' ORDER BY {}'.format(', '.join([k+direction for k in keys]))
+		# fetch one more row to know whether there is a next page
+		sql += ' LIMIT {}'.format(page_num+1)
 
 		self.debug(sql)
-		cursor = self.execute(sql)
-		return cursor.fetchall()
+		with self.connection() as con:
+			cur = self._execute(con, sql, params)
+			names = [d[0] for d in cur.description]
+			rows = cur.fetchall()
+		if len(rows) <= page_num:
+			return (rows, None)
+		rows = rows[:page_num]
+		last = rows[-1]
+		values = [last[names.index(k)] for k in keys]
+		return (rows, self.encode_seek_cursor(values))
+
+	def encode_seek_cursor(self, values):
+		s = json.dumps(list(values), separators=(',', ':'))
+		return base64.urlsafe_b64encode(s.encode('utf8')).decode('ascii')
+
+	def decode_seek_cursor(self, cursor):
+		try:
+			values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf8'))
+		except Exception:
+			raise Exception('cursor invalid')
+		if not isinstance(values, list):
+			raise Exception('cursor invalid')
+		return values
 
 	def insert_table(self, tbl_name, columns={}):
 		'''
 		columns = {'fieldname': 'value'}
 		'''
-		sql = 'INSERT INTO {table} ({keys}) VALUES ({values})'.format(
+		keys = tuple(columns.keys())
+		sql = self.cached_sql(('insert', tbl_name, keys), lambda: 'INSERT INTO {table} ({keys}) VALUES ({values})'.format(
 			table=tbl_name,
-			keys= ', '.join(columns.keys()),
-			values=', '.join(['?']*len(columns.keys()))
-		)
+			keys=', '.join([quote_identifier(k) for k in keys]),
+			values=', '.join(['?']*len(keys))
+		))
 		
 		self.debug(sql)
 		cursor = self.execute(sql, list(columns.values()))
 		return cursor.lastrowid
 
+	def insert_many_table(self, 
+		tbl_name, 
+		rows, 
+		columns=(), 
+		chunk_size=10000, 
+		multi_values=False, 
+		progress=None):
+		'''
+		Bulk insert rows with one prepared statement, every chunk_size rows 
+		are committed in one transaction.
+
+		Parameters:
+
+			rows 			-> iterable/generator of dict or tuple
+			columns 		-> column names, required when rows are tuples, 
+							   by default the keys of the first dict row
+			chunk_size 		-> the number of rows per transaction
+			multi_values 	-> insert many rows per statement with multi-row VALUES list, 
+							   as many as SQLite's variable limit allowed
+			progress 		-> callable(count, seconds), invoked after every committed chunk
+
+		Return:
+
+			{'rows': inserted row count, 'seconds': elapsed time, 'rows_per_sec': throughput}
+
+		Example:
+
+			client.insert_many_table('user', ({'username': str(i)} for i in range(100000)))
+		'''
+		if not isinstance(chunk_size, int) or chunk_size <= 0:
+			raise Exception('argument chunk_size should be a positive int')
+		rows = iter(rows)
+		try:
+			first = next(rows)
+		except StopIteration:
+			return {'rows': 0, 'seconds': 0.0, 'rows_per_sec': 0.0}
+		rows = itertools.chain((first,), rows)
+
+		if isinstance(first, dict):
+			columns = tuple(columns) if columns else tuple(first.keys())
+			getter = operator.itemgetter(*columns)
+			if len(columns) == 1:
+				rows = ((getter(row),) for row in rows)
+			else:
+				rows = (getter(row) for row in rows)
+		elif not columns:
+			raise Exception('argument columns is required for tuple rows')
+		ncols = len(columns)
+
+		row_sql = '({})'.format(', '.join(['?']*ncols))
+		sql = 'INSERT INTO {table} ({keys}) VALUES '.format(table=tbl_name, keys=', '.join([quote_identifier(c) for c in columns]))
+		rows_per_statement = 1
+		if multi_values:
+			try:
+				limit = self.client.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+			except AttributeError:
+				limit = 999 # SQLite default before 3.32
+			rows_per_statement = max(1, min(limit // ncols, chunk_size))
+			chunk_size = max(rows_per_statement, chunk_size - chunk_size % rows_per_statement)
+		self.debug(sql + row_sql)
+
+		count = 0
+		start = time.perf_counter()
+		while True:
+			chunk = list(itertools.islice(rows, chunk_size))
+			if not chunk:
+				break
+			with self.transaction():
+				if rows_per_statement == 1:
+					self.executemany(sql + row_sql, chunk)
+				else:
+					full = len(chunk) - len(chunk) % rows_per_statement
+					if full:
+						many_sql = sql + ', '.join([row_sql]*rows_per_statement)
+						self.executemany(many_sql, (
+							[v for row in chunk[i:i+rows_per_statement] for v in row]
+							for i in range(0, full, rows_per_statement)))
+					if full < len(chunk):
+						rest = chunk[full:]
+						self.execute(sql + ', '.join([row_sql]*len(rest)), [v for row in rest for v in row])
+			count += len(chunk)
+			if progress is not None:
+				progress(count, time.perf_counter() - start)
+		seconds = time.perf_counter() - start
+		rate = count / seconds if seconds > 0 else 0.0
+		self.debug('insert {} rows into {} in {:.3f}s ({:.0f} rows/sec)'.format(count, tbl_name, seconds, rate))
+		return {'rows': count, 'seconds': seconds, 'rows_per_sec': rate}
+
+	def has_table(self, tbl_name):
+		sql = 'SELECT count(*) FROM sqlite_master WHERE type=? AND name=?'
+		return self.fetchone(sql, ('table', tbl_name))[0] > 0
+
+	def import_file(self, 
+		path, 
+		tbl_name=None, 
+		fmt=None, 
+		types=None, 
+		chunk_size=50000, 
+		multi_values=False, 
+		progress=None):
+		'''
+		Stream a CSV(with header) or JSONL file into table, the table is created 
+		with create_table if it doesn't exist.
+
+		Parameters:
+
+			tbl_name 	-> default is the file name without extension
+			fmt 		-> 'csv' or 'jsonl', guessed from file extension by default
+			types 		-> {column: column type}, column type is a key of basic_types, 
+						   types of other columns are inferred from the first rows
+			chunk_size 	-> the number of rows per executemany() batch
+			progress 	-> callable(count, seconds), invoked after every inserted chunk
+
+		An "id" column is used as the id primary key of a new table. The whole 
+		file is imported in one transaction, when any row fails nothing is 
+		imported(the table is dropped if it was created by the import).
+
+		Values which don't match the inferred column type(e.g. 'n/a' in an 
+		integer column after the sampled rows) are imported as text.
+
+		Return:
+
+			{'table', 'columns', 'types', 'rows', 'seconds', 'rows_per_sec'}
+
+		Example:
+
+			client.import_file('user.csv', types={'phone': 's'})
+		'''
+		if tbl_name is None:
+			tbl_name = os.path.splitext(os.path.basename(path))[0]
+		with ImportReader(path, fmt, types) as reader:
+			if not reader.columns:
+				raise Exception('no columns found in {}'.format(path))
+			created = not self.has_table(tbl_name)
+			if created:
+				self.create_table(tbl_name, 
+					tuple([('"{}"'.format(c), reader.types[c]) for c in reader.columns if c != 'id']))
+			try:
+				with self.transaction():
+					result = self.insert_many_table(tbl_name, reader, 
+						columns=tuple(reader.columns), 
+						chunk_size=chunk_size, 
+						multi_values=multi_values, 
+						progress=progress)
+			except BaseException:
+				if created:
+					self.drop_table(tbl_name)
+				raise
+		result.update({
+			'table': tbl_name,
+			'columns': reader.columns,
+			'types': reader.types
+		})
+		return result
+
 	def update_table(self, tbl_name, columns, where_condition=()):
 		'''
 		columns = {
 			'field_name': 'field_value', # assign to the field
 			'field_name': '++field_value' # add into the field
 		}
-		where_condition = (('id', '>30'))
+		where_condition = (('id', 30, '>'),) or (('username', 'xiao'),)
 		'''
-		s = []
+		fields = []
+		params = []
 		for field_name, field_value in columns.items():
-			field_name = str(field_name)
-			field_value = str(field_value)
-			if field_value.startswith('++'):
-				s.append(field_name+'='+field_name+'+'+field_value[2:])
+			field_name = quote_identifier(str(field_name))
+			if isinstance(field_value, str) and field_value.startswith('++'):
+				parsed = self.parse_condition('='+field_value[2:])
+				fields.append('{0}={0}+?'.format(field_name))
+				params.append(parsed[1] if parsed else field_value[2:])
 			else:
-				s.append(field_name+'='+field_value)
-		
-		sql = 'UPDATE {table} SET {columns}'.format(
-			table=tbl_name,
-			fields=' '.join(s)
-		)
-		
-		if where_condition:
-			sql += ' WHERE {}'.format(' and '.join([name+condition for name, condition in where_condition]))
+				fields.append(field_name+'=?')
+				params.append(field_value)
+		fields = tuple(fields)
+		where, where_params = self.build_where(where_condition)
+		params.extend(where_params)
+		def build():
+			sql = 'UPDATE {table} SET {fields}'.format(table=tbl_name, fields=', '.join(fields))
+			if where:
+				sql += ' WHERE {}'.format(' and '.join(where))
+			return sql
+		sql = self.cached_sql(('update', tbl_name, fields, where), build)
 
 		self.debug(sql)
-		cursor = self.execute(sql)
-		return cursor.rowcount
\ No newline at end of file
+		cursor = self.execute(sql, params)
+		return cursor.rowcount
+
+	def export_tables(self, 
+		tables=None, 
+		directory='.', 
+		fmt='csv', 
+		workers=None, 
+		partitions=1, 
+		processes=False):
+		'''
+		Export tables into directory/<table>.<fmt> in parallel, every table(or rowid 
+		range when partitions > 1) is exported by a worker with its own read connection.
+
+		Parameters:
+
+			tables 		-> table names, None exports all tables
+			fmt 		-> 'csv' or 'jsonl', BLOB values are exported as hex strings
+			workers 	-> the number of worker threads/processes, default is cpu count
+			partitions 	-> split every table into this number of rowid ranges
+			processes 	-> use a process pool instead of a thread pool
+
+		Only committed rows are exported. The database is copied into a temp 
+		file with backup API first, so all tables and ranges come from one 
+		snapshot even when other connections commit during the export.
+
+		Return:
+
+			{table: {'path', 'rows', 'seconds'}}
+		'''
+		kwargs = {
+			'workers': workers,
+			'partitions': partitions,
+			'processes': processes,
+			'batch_size': self.stream_batch_size
+		}
+		self.flush_writer('export_tables')
+		if self.database == ':memory:':
+			return export_connection(self.client, tables, directory, fmt, **kwargs)
+		return export_tables(self.database, tables, directory, fmt, **kwargs)
@@ -0,0 +1,123 @@
+import struct, bisect
+
+# SQLite's own guesses when there are no statistics
+default_selectivity = {
+	'=': 0.1,
+	'range': 0.25,
+	'other': 0.25,
+}
+
+def parse_stat(stat):
+	'''
+	'10000 100 1 unordered' -> [10000, 100, 1]
+	'''
+	numbers = []
+	for item in str(stat).split():
+		if not item.isdigit():
+			break
+		numbers.append(int(item))
+	return numbers
+
+def read_varint(data, pos):
+	value = 0
+	for i in range(9):
+		b = data[pos]
+		pos += 1
+		if i == 8:
+			return ((value << 8) | b, pos)
+		value = (value << 7) | (b & 0x7f)
+		if b < 0x80:
+			break
+	return (value, pos)
+
+int_sizes = {1: 1, 2: 2, 3: 3, 4: 4, 5: 6, 6: 8}
+
+def decode_first_value(record):
+	'''
+	Decode the first column of a SQLite record(e.g. sqlite_stat4.sample).
+	'''
+	record = bytes(record)
+	header_size, pos = read_varint(record, 0)
+	serial_type, pos = read_varint(record, pos)
+	body = record[header_size:]
+	if serial_type == 0:
+		return None
+	elif serial_type in int_sizes:
+		return int.from_bytes(body[:int_sizes[serial_type]], 'big', signed=True)
+	elif serial_type == 7:
+		return struct.unpack('>d', body[:8])[0]
+	elif serial_type == 8:
+		return 0
+	elif serial_type == 9:
+		return 1
+	elif serial_type >= 12 and serial_type % 2 == 0:
+		return body[:(serial_type - 12) // 2]
+	elif serial_type >= 13:
+		return body[:(serial_type - 13) // 2].decode('utf8', 'replace')
+	return None
+
+class IndexStats(object):
+	'''
+	Statistics of one index: the leading column, average rows per key(sqlite_stat1)
+	and samples of the leading column(sqlite_stat4, optional).
+	'''
+
+	def __init__(self, column, stat, samples=()):
+		self.column = column
+		self.stat = stat
+		# [(key, rows equal to key, rows less than key)] sorted by key
+		self.samples = sorted(samples, key=lambda s: s[0])
+
+	def rows_per_key(self):
+		return self.stat[1] if len(self.stat) > 1 else None
+
+	def equal_rows(self, value):
+		for key, neq, nlt in self.samples:
+			if key == value:
+				return neq
+		return self.rows_per_key()
+
+	def less_rows(self, value):
+		'''
+		Return (rows less than value, rows equal to value) from samples, or None.
+		'''
+		try:
+			keys = [s[0] for s in self.samples]
+			i = bisect.bisect_left(keys, value)
+		except TypeError:
+			return None
+		if not self.samples:
+			return None
+		if i == len(keys):
+			key, neq, nlt = self.samples[-1]
+			return (nlt + neq, 0)
+		key, neq, nlt = self.samples[i]
+		return (nlt, neq if key == value else 0)
+
+def estimate_selectivity(stats, total, column, op, value):
+	'''
+	Estimate the fraction of rows which satisfy "column op value" with
+	statistics of the index whose leading column is column.
+	'''
+	if not total:
+		return 0.0
+	if stats is None or column != stats.column:
+		if op == '=':
+			return default_selectivity['=']
+		if op in ['<', '<=', '>', '>=']:
+			return default_selectivity['range']
+		return default_selectivity['other']
+	if op in ['=', '==', 'IS']:
+		rows = stats.equal_rows(value)
+		return min(1.0, rows / total) if rows is not None else default_selectivity['=']
+	if op == 'IN' and isinstance(value, (list, tuple, set)):
+		rows = sum([stats.equal_rows(v) or 0 for v in value])
+		return min(1.0, rows / total)
+	if op in ['<', '<=', '>', '>=']:
+		less = stats.less_rows(value)
+		if less is None:
+			return default_selectivity['range']
+		lt, eq = less
+		rows = {'<': lt, '<=': lt + eq, '>': total - lt - eq, '>=': total - lt}[op]
+		return max(0.0, min(1.0, rows / total))
+	return default_selectivity['other']
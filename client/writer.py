@@ -0,0 +1,146 @@
+import threading, queue
+from concurrent.futures import Future
+
+class WriteQueue(object):
+	'''
+	A dedicated writer thread owns the write connection, all writes are
+	submitted into a queue and executed one by one by the writer thread.
+
+	Group commit: jobs waiting in the queue(at most max_batch) are executed
+	in one transaction, every job runs in its own SAVEPOINT so a failed job
+	does not rollback the others.
+
+	con 		-> connection used by writer thread, should be in autocommit mode(isolation_level=None)
+	max_batch 	-> the max number of jobs committed in one transaction
+	on_commit 	-> called on writer thread after every transaction finished(committed 
+				   or rolled back) and before its jobs are resolved
+	'''
+
+	def __init__(self, con, max_batch=100, on_commit=None):
+		if not isinstance(max_batch, int) or max_batch < 1:
+			raise Exception('argument max_batch should be a positive int')
+		self.con = con
+		self.max_batch = max_batch
+		self.on_commit = on_commit
+		self.queue = queue.Queue()
+		self.closed = False
+		self.stats = {
+			'jobs': 0,
+			'commits': 0,
+		}
+		self.thread = threading.Thread(target=self.run, name='sqlite3-writer', daemon=True)
+		self.thread.start()
+
+	def submit(self, func, batch=True):
+		'''
+		func(connection) will be called on writer thread, return a Future.
+		batch = False -> run func outside of transaction, e.g. executescript()
+		'''
+		if self.closed:
+			raise Exception('write queue has been closed')
+		future = Future()
+		self.queue.put((func, future, batch))
+		return future
+
+	def call(self, func, batch=True):
+		'''
+		Submit func and wait until it's committed, return func result.
+		'''
+		return self.submit(func, batch).result()
+
+	def flush(self):
+		'''
+		Wait for all submitted jobs committed.
+		'''
+		self.call(lambda con: None)
+
+	def run(self):
+		stop = False
+		while not stop:
+			item = self.queue.get()
+			if item is None:
+				break
+			batch = []
+			while True:
+				func, future, batchable = item
+				if not batchable:
+					self.commit(batch)
+					self.commit([item], False)
+					batch = []
+				else:
+					batch.append(item)
+				if len(batch) >= self.max_batch:
+					break
+				try:
+					item = self.queue.get_nowait()
+				except queue.Empty:
+					break
+				if item is None:
+					stop = True
+					break
+			self.commit(batch)
+
+	def commit(self, batch, transaction=True):
+		if not batch:
+			return None
+		results = []
+		try:
+			if transaction:
+				self.con.execute('BEGIN IMMEDIATE')
+			for func, future, batchable in batch:
+				if not future.set_running_or_notify_cancel():
+					continue
+				if not transaction:
+					try:
+						results.append((future, func(self.con), None))
+					except BaseException as e:
+						results.append((future, None, e))
+					continue
+				self.con.execute('SAVEPOINT job')
+				try:
+					result = func(self.con)
+				except BaseException as e:
+					self.con.execute('ROLLBACK TO job')
+					results.append((future, None, e))
+				else:
+					results.append((future, result, None))
+				self.con.execute('RELEASE job')
+			if transaction:
+				self.con.execute('COMMIT')
+		except BaseException as e:
+			if self.con.in_transaction:
+				self.con.rollback()
+			self.finished()
+			for func, future, batchable in batch:
+				if future.done():
+					continue
+				if not future.running() and not future.set_running_or_notify_cancel():
+					continue
+				future.set_exception(e)
+			return None
+
+		self.finished()
+		self.stats['jobs'] += len(results)
+		self.stats['commits'] += 1
+		for future, result, error in results:
+			if error is None:
+				future.set_result(result)
+			else:
+				future.set_exception(error)
+
+	def finished(self):
+		if self.on_commit is not None:
+			try:
+				self.on_commit()
+			except Exception:
+				pass
+
+	def close(self):
+		'''
+		Commit the queued jobs and stop writer thread.
+		'''
+		if self.closed:
+			return None
+		self.closed = True
+		self.queue.put(None)
+		self.thread.join()
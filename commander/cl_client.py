@@ -1,13 +1,48 @@
 from .cl_commander import ClCommander
+from .cl_feedbacks import timer_txt, more_chunks_txt
+from .utils import print_list_as_table
+
+# column widths of the last segment, reused by the continued segment
+last_widths = None
 
 def display(response):
+	global last_widths
 	if response['header']['status'] == 'error':
 		print('[ERROR]', response['body'])
+	elif response['header']['type'] == 'data-chunk':
+		for segment in response['body']:
+			if segment['continued'] and last_widths:
+				last_widths = print_list_as_table(segment['rows'], widths=last_widths)
+			else:
+				last_widths = print_list_as_table(segment['rows'], segment['columns'])
 	else:
 		print(response['body'])
+	if 'timer' in response['header']:
+		print(timer_txt(1, response['header']['timer']))
+
+def page(commander, response):
+	'''
+	Display chunks of a response like a pager.
+	'''
+	shown = 0
+	more = True
+	while True:
+		display(response)
+		if response['header']['type'] != 'data-chunk':
+			return
+		shown += sum([len(segment['rows']) for segment in response['body']])
+		if not response['header']['continuation']:
+			return
+		if more:
+			answer = input(more_chunks_txt(1, shown)).strip().lower()
+			if answer == 'q':
+				display(commander.cancel_chunks())
+				return
+			more = answer != 'a'
+		response = commander.next_chunk()
 
-def run(con=None, args=None, dump=None):
-	commander = ClCommander(dump)
+def run(con=None, args=None, dump=None, chunk_rows=None):
+	commander = ClCommander(dump, chunk_rows)
 	display(commander.open(con, args))
 	try:
 		while True:
@@ -17,7 +52,7 @@ def run(con=None, args=None, dump=None):
 			response = commander.accept(line)
 			if response['header']['type'] == 'termination':
 				raise KeyboardInterrupt()
-			display(response)
+			page(commander, response)
 	except KeyboardInterrupt:
 		response = commander.close()
 		display(response)
\ No newline at end of file
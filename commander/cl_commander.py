@@ -1,12 +1,14 @@
-import sqlite3, json, copy, os
+import sqlite3, json, copy, os, time, itertools, contextlib
 
 from .cl_feedbacks import *
+from ..dumper import dump_database, export_connection, ImportReader
+from ..config import readonly_config
 
 class ClCommander():
 	default_response = {
 		'header': {
 			'status': 'ok', # avaiable status: ok, error
-			'type': 'message', # avaiable type: message, data, termination
+			'type': 'message', # avaiable type: message, data, data-chunk, termination
 		},
 		'body': ''
 	}
@@ -17,29 +19,63 @@ class ClCommander():
 			'usage': 'EXIT [nodump]'
 		},
 		'LOAD': {
-			'description': 'Load a database into interaction.',
-			'usage': 'LOAD <path_to_database_file>'
+			'description': 'Load a database into interaction, copy pages with backup API by default or replay its SQL dump.',
+			'usage': 'LOAD <path_to_database_file> [backup|sql]'
 		},
 		'DUMP': {
-			'description': 'Dump iteraction with SQL format into a file.',
-			'usage': 'DUMP <path_to_dump_file>'
+			'description': 'Dump iteraction with SQL format(optionally compressed) or as a binary snapshot into a file.',
+			'usage': 'DUMP <path_to_dump_file> [sql|snapshot] [gzip|zlib]'
+		},
+		'EXPORT': {
+			'description': 'Export tables into CSV or JSONL files in parallel.',
+			'usage': 'EXPORT <directory> [csv|jsonl] [<table-name> ...]'
+		},
+		'IMPORT': {
+			'description': 'Import a CSV or JSONL file into a table, the table is created if it does not exist.',
+			'usage': 'IMPORT <path_to_data_file> [<table-name>] [csv|jsonl]'
 		},
 		'SHOW': {
 			'description': 'Show database information.',
 			'usage': 'SHOW table [<table-name>]'
 		},
+		'TIMER': {
+			'description': 'Report wall time, rows and VM steps of statements.',
+			'usage': 'TIMER on|off'
+		},
+		'EXPLAIN': {
+			'description': 'Show the query plan tree and the number of bytecode instructions of a statement.',
+			'usage': 'EXPLAIN [QUERY PLAN] <sql>'
+		},
 		'HELP': {
 			'description': 'Query avaiable commands.',
 			'usage': 'HELP [<command>]'
 		}
 	}
 
-	def __init__(self, dump):
+	# The number of pages copied per backup step
+	backup_pages = 1024
+
+	# The number of rows inserted per transaction when importing
+	import_chunk_size = 50000
+
+	# VM steps are counted in units of this number when timer is on
+	timer_progress_steps = 100
+
+	# The max number of rows per data-chunk response, 0 returns the whole 
+	# results in one data response
+	chunk_rows = 500
+
+	def __init__(self, dump, chunk_rows=None):
 		self.con = None
 		self.con_kwargs = None
 		self.statements = ''
 		self.cached_statements = []
 		self.nodump = False
+		self.timer = False
+		self.vm_steps = 0
+		self.stream = None
+		if chunk_rows is not None:
+			self.chunk_rows = chunk_rows
 
 		self.dump = dump
 		if dump:
@@ -77,24 +113,64 @@ class ClCommander():
 		try:
 			self.con_kwargs = {} if not con_kwargs else copy.deepcopy(con_kwargs)
 			self.con_kwargs['database'] = ':memory:'
-			self.con = sqlite3.connect(**self.con_kwargs)
-			self.con.isolation_level = None # enable auto-commit mode
-			self.con.text_factory = lambda item: item.decode('utf8')
+			self.con = self.new_connection()
 		except Exception as e:
 			return self.message('error', connect_database_txt(-1, self.con_kwargs, str(e)))
 		
 		return self.message('ok', connect_database_txt(1, self.con_kwargs))
 
-	def load_database(self, con):
+	def new_connection(self):
+		con = sqlite3.connect(**self.con_kwargs)
+		con.isolation_level = None # enable auto-commit mode
+		con.text_factory = lambda item: item.decode('utf8')
+		if self.timer:
+			con.set_progress_handler(self.count_vm_steps, self.timer_progress_steps)
+		return con
+
+	def load_database(self, con, mode='backup'):
+		'''
+		mode = 'backup' -> copy database pages with the online backup API into a new 
+						   memory database, which replaces the current one
+		mode = 'sql' 	-> replay the SQL dump(iterdump) of the database statement by statement
+		'''
 		if not self.con:
 			return self.message('error', load_database_txt(-1))
 		if not con:
 			return self.message('error', load_database_txt(-2))
+		if mode == 'sql':
+			return self.replay_database(con)
+		target = None
+		try:
+			# a memory database with pages can't be overwritten by a backup 
+			# with another page size, so always copy into a fresh one
+			target = self.new_connection()
+			progress = []
+			steps = [0, 0] # (steps, total pages)
+			def report(status, remaining, total):
+				steps[0] += 1
+				steps[1] = total
+				copied = total - remaining
+				# report about every 10 percent
+				if not progress or remaining == 0 or (copied - progress[-1][0]) * 10 >= total:
+					progress.append((copied, total))
+			con.backup(target, pages=self.backup_pages, progress=report)
+		except Exception as e:
+			if target:
+				target.close()
+			return self.message('error', load_database_txt(-3, str(e)))
+		
+		self.con.close()
+		self.con = target
+		return self.message('ok', load_database_txt(2, steps[1], steps[0], progress))
+
+	def replay_database(self, con):
 		try:
 			count = 0
-			with self.con:
-				# automatically commit or rollback transactions
+			with self.transaction():
 				for sql in con.iterdump():
+					# the dump has its own BEGIN TRANSACTION and COMMIT
+					if sql in ['BEGIN TRANSACTION;', 'COMMIT;']:
+						continue
 					count += 1
 					self.con.execute(sql)
 		except Exception as e:
@@ -102,18 +178,127 @@ class ClCommander():
 		
 		return self.message('ok', load_database_txt(1, count))
 
-	def dump_database(self, dump):
+	def dump_database(self, dump, mode='sql', compression=None):
+		'''
+		mode = 'sql' 		-> streaming SQL dump, compression is None, gzip or zlib
+		mode = 'snapshot' 	-> binary database file copied with the backup API
+		'''
 		if not self.con:
 			return self.message('error', dump_database_txt(-1))
 		if os.path.exists(dump):
 			return self.message('error', dump_database_txt(-2, dump))
 		try:
-			with open(dump, 'w', encoding='utf8') as f:
-				for sql in self.con.iterdump():
-					f.write('%s\n' % sql)
+			stats = dump_database(self.con, dump, mode, compression)
 		except Exception as e:
 			return self.message('error', dump_database_txt(-3, str(e)))
-		return self.message('ok', dump_database_txt(1, dump))
+		return self.message('ok', dump_database_txt(1, dump, stats))
+
+	def export_database(self, directory, fmt='csv', tables=None):
+		if not self.con:
+			return self.message('error', export_database_txt(-1))
+		try:
+			start = time.perf_counter()
+			results = export_connection(self.con, tables, directory, fmt)
+		except Exception as e:
+			return self.message('error', export_database_txt(-2, str(e)))
+		return self.message('ok', export_database_txt(1, results, time.perf_counter() - start))
+
+	def import_file(self, path, tbl_name=None, fmt=None):
+		'''
+		Stream a CSV(with header) or JSONL file into table with executemany, 
+		import_chunk_size rows per batch, the whole file is imported in one 
+		transaction.
+		'''
+		if not self.con:
+			return self.message('error', import_file_txt(-1))
+		if tbl_name is None:
+			tbl_name = os.path.splitext(os.path.basename(path))[0]
+		basic_types = readonly_config['basic_types']
+		try:
+			start = time.perf_counter()
+			progress = []
+			count = 0
+			with ImportReader(path, fmt) as reader:
+				if not reader.columns:
+					raise Exception('no columns found')
+				columns = ['"{}"'.format(c) for c in reader.columns]
+				definitions = ['{} {}'.format(name, basic_types.get(reader.types[c], 'TEXT')) 
+					for name, c in zip(columns, reader.columns) if c != 'id']
+				if 'id' in reader.columns:
+					definitions.insert(0, 'id INTEGER PRIMARY KEY AUTOINCREMENT')
+				sql = 'INSERT INTO "{}" ({}) VALUES ({})'.format(tbl_name, ', '.join(columns), ', '.join(['?']*len(columns)))
+				rows = iter(reader)
+				with self.transaction():
+					self.con.execute('CREATE TABLE IF NOT EXISTS "{}" ({})'.format(tbl_name, ', '.join(definitions)))
+					while True:
+						chunk = list(itertools.islice(rows, self.import_chunk_size))
+						if not chunk:
+							break
+						self.con.executemany(sql, chunk)
+						count += len(chunk)
+						progress.append((count, time.perf_counter() - start))
+		except Exception as e:
+			return self.message('error', import_file_txt(-2, str(e)))
+		return self.message('ok', import_file_txt(1, path, tbl_name, count, time.perf_counter() - start, progress))
+
+	@contextlib.contextmanager
+	def transaction(self):
+		'''
+		The connection is in autocommit mode(isolation_level=None), "with self.con" 
+		never opens a transaction, so BEGIN/COMMIT/ROLLBACK are explicit.
+		'''
+		self.con.execute('BEGIN')
+		try:
+			yield self.con
+		except BaseException:
+			self.con.execute('ROLLBACK')
+			raise
+		else:
+			self.con.execute('COMMIT')
+
+	def set_timer(self, on):
+		if not self.con:
+			return self.message('error', command_timer_txt(-1))
+		self.timer = on
+		if on:
+			self.con.set_progress_handler(self.count_vm_steps, self.timer_progress_steps)
+		else:
+			self.con.set_progress_handler(None, 0)
+		return self.message('ok', command_timer_txt(1 if on else 2))
+
+	def count_vm_steps(self):
+		self.vm_steps += self.timer_progress_steps
+		return 0
+
+	def explain_statement(self, sql):
+		'''
+		Render EXPLAIN QUERY PLAN rows(id, parent, notused, detail) as a tree 
+		and count bytecode instructions with EXPLAIN.
+		'''
+		if not self.con:
+			return self.message('error', explain_statement_txt(-1))
+		sql = sql.strip().rstrip(';').strip()
+		if sql.upper().startswith('QUERY PLAN'):
+			sql = sql[len('QUERY PLAN'):].strip()
+		if not sql:
+			return self.message('error', explain_statement_txt(-2))
+		try:
+			plan = self.con.execute('EXPLAIN QUERY PLAN ' + sql).fetchall()
+			instructions = len(self.con.execute('EXPLAIN ' + sql).fetchall())
+		except Exception as e:
+			return self.message('error', explain_statement_txt(-3, str(e)))
+		children = {}
+		for node_id, parent, notused, detail in plan:
+			children.setdefault(parent, []).append((node_id, detail))
+		lines = []
+		def render(parent, prefix):
+			nodes = children.get(parent, [])
+			for i, (node_id, detail) in enumerate(nodes):
+				last = i == len(nodes) - 1
+				lines.append(prefix + ('`--' if last else '|--') + detail)
+				render(node_id, prefix + ('   ' if last else '|  '))
+		render(0, '')
+		return self.message('ok', explain_statement_txt(1, lines, instructions))
 
 	def show_database(self, tbl_name=None):
 		if not self.con:
@@ -156,8 +341,11 @@ class ClCommander():
 			return self.message('ok', command_help_txt(2, cmds))
 		
 		elif cmd == 'LOAD':
-			if nargs == 1:
+			if nargs in [1, 2]:
 				a = args[0]
+				mode = args[1].strip().lower() if nargs == 2 else 'backup'
+				if mode not in ['backup', 'sql']:
+					return self.message('error', command_load_txt(-4, args[1]))
 				if not os.path.exists(a):
 					return self.message('error', command_load_txt(-1, a))
 				try:
@@ -165,17 +353,54 @@ class ClCommander():
 				except Exception as e:
 					return self.message('error', command_load_txt(-2, str(e)))
 				else:
-					return self.load_database(con)	
+					try:
+						return self.load_database(con, mode)
+					finally:
+						con.close()
 			return self.message('error', command_load_txt(-3, raw_cmd))
 		
 		elif cmd == 'DUMP':
-			if nargs == 1:
+			if nargs in [1, 2, 3]:
 				a = args[0]
+				mode = 'sql'
+				compression = None
+				for option in [arg.strip().lower() for arg in args[1:]]:
+					if option in ['sql', 'snapshot']:
+						mode = option
+					elif option in ['gzip', 'zlib']:
+						compression = option
+					else:
+						return self.message('error', command_dump_txt(-3, option))
 				if os.path.exists(a):
 					return self.message('error', command_dump_txt(-1, a))
-				return self.dump_database(a)
+				return self.dump_database(a, mode, compression)
 			return self.message('error', command_dump_txt(-2, raw_cmd))
 		
+		elif cmd == 'EXPORT':
+			if nargs >= 1:
+				fmt = 'csv'
+				tables = args[1:]
+				if tables and tables[0].lower() in ['csv', 'jsonl']:
+					fmt = tables[0].lower()
+					tables = tables[1:]
+				return self.export_database(args[0], fmt, tables if tables else None)
+			return self.message('error', command_export_txt(-1, raw_cmd))
+
+		elif cmd == 'IMPORT':
+			if nargs in [1, 2, 3]:
+				a = args[0]
+				tbl_name = None
+				fmt = None
+				for option in args[1:]:
+					if option.strip().lower() in ['csv', 'jsonl']:
+						fmt = option.strip().lower()
+					else:
+						tbl_name = option
+				if not os.path.exists(a):
+					return self.message('error', command_import_txt(-1, a))
+				return self.import_file(a, tbl_name, fmt)
+			return self.message('error', command_import_txt(-2, raw_cmd))
+
 		elif cmd == 'SHOW':
 			if nargs == 1:
 				a = args[0].strip().lower()
@@ -187,6 +412,15 @@ class ClCommander():
 					return self.show_database(args[1])
 			return self.message('error', command_show_txt(-1, raw_cmd))
 
+		elif cmd == 'TIMER':
+			if nargs == 1 and args[0].strip().lower() in ['on', 'off']:
+				return self.set_timer(args[0].strip().lower() == 'on')
+			return self.message('error', command_timer_txt(-2, raw_cmd))
+
+		elif cmd == 'EXPLAIN':
+			# keep the original SQL text(spaces, case of literals)
+			return self.explain_statement(str(raw_cmd).strip()[len('EXPLAIN'):])
+
 		elif cmd == 'EXIT':
 			if nargs == 1:
 				a = args[0].strip().lower()
@@ -209,6 +443,19 @@ class ClCommander():
 		
 		statements = self.statements
 		self.cache_statements()
+		self.vm_steps = 0
+		if self.chunk_rows > 0:
+			self.stream = {
+				'statements': [s.strip() for s in statements.split(';') if s.strip()],
+				'cursor': None,
+				'columns': None,
+				'carry': None,
+				'seconds': 0.0,
+				'rows': 0
+			}
+			return self.next_chunk()
+		start = time.perf_counter()
+		rows = 0
 		try:
 			results = []
 			for sql in [s.strip() for s in statements.split(';')]:
@@ -217,14 +464,116 @@ class ClCommander():
 				if sql_upper.startswith('SELECT'):
 					column_names = [c[0] for c in cursor.description]
 					results.append(column_names)
-					results.extend(cursor.fetchall())	
+					fetched = cursor.fetchall()
+					rows += len(fetched)
+					results.extend(fetched)	
 				elif sql_upper.startswith('INSERT'):
+					rows += max(cursor.rowcount, 0)
 					results.append([cursor.lastrowid])
 				else:
+					rows += max(cursor.rowcount, 0)
 					results.append([cursor.rowcount])
 		except Exception as e:
 			return self.message('error', execute_statements_txt(-2, str(e)))
-		return self.data(results)
+		response = self.data(results)
+		if self.timer:
+			response['header']['timer'] = {
+				'seconds': time.perf_counter() - start,
+				'rows': rows,
+				'vm_steps': self.vm_steps
+			}
+		return response
+
+	def next_chunk(self):
+		'''
+		Return the next data-chunk response of the pending statements, body is a
+		list of segments {'columns', 'rows', 'continued'}, a segment is the rows of 
+		one statement, continued means it continues the last segment of the previous 
+		chunk. Header continuation tells whether there are more chunks.
+		'''
+		stream = self.stream
+		if not stream:
+			return self.message('error', next_chunk_txt(-1))
+		start = time.perf_counter()
+		budget = self.chunk_rows
+		segments = []
+		try:
+			while budget > 0:
+				if stream['cursor'] is None:
+					if not stream['statements']:
+						break
+					sql = stream['statements'].pop(0)
+					cursor = self.con.execute(sql)
+					if cursor.description is None:
+						if sql.upper().startswith('INSERT'):
+							segments.append({'columns': ['Last Modified ID'], 'rows': [(cursor.lastrowid,)], 'continued': False})
+						else:
+							segments.append({'columns': ['Affected Row Count'], 'rows': [(cursor.rowcount,)], 'continued': False})
+						stream['rows'] += max(cursor.rowcount, 0)
+						budget -= 1
+						continue
+					stream['cursor'] = cursor
+					stream['columns'] = [c[0] for c in cursor.description]
+					continued = False
+				else:
+					continued = True
+				cursor = stream['cursor']
+				rows = []
+				if stream['carry'] is not None:
+					rows.append(stream['carry'])
+					stream['carry'] = None
+				rows.extend(cursor.fetchmany(budget - len(rows)))
+				segments.append({'columns': stream['columns'], 'rows': rows, 'continued': continued})
+				stream['rows'] += len(rows)
+				if len(rows) < budget:
+					stream['cursor'] = None
+				else:
+					# peek one row, so the last chunk is never empty
+					stream['carry'] = cursor.fetchone()
+					if stream['carry'] is None:
+						stream['cursor'] = None
+				budget -= len(rows)
+		except Exception as e:
+			self.stream = None
+			return self.message('error', execute_statements_txt(-2, str(e)))
+		stream['seconds'] += time.perf_counter() - start
+		continuation = stream['cursor'] is not None or bool(stream['statements'])
+		response = self.response(segments, {
+			'type': 'data-chunk',
+			'status': 'ok',
+			'continuation': continuation
+		})
+		if not continuation:
+			self.stream = None
+			if self.timer:
+				response['header']['timer'] = {
+					'seconds': stream['seconds'],
+					'rows': stream['rows'],
+					'vm_steps': self.vm_steps
+				}
+		return response
+
+	def cancel_chunks(self):
+		'''
+		Discard the rest rows of pending SELECT statements, other pending 
+		statements are still executed.
+		'''
+		stream = self.stream
+		if not stream:
+			return self.message('ok', cancel_chunks_txt(0))
+		self.stream = None
+		skipped = 1 if stream['cursor'] is not None else 0
+		if stream['cursor'] is not None:
+			stream['cursor'].close()
+		try:
+			for sql in stream['statements']:
+				if sql.upper().startswith(('SELECT', 'VALUES')):
+					skipped += 1
+				else:
+					self.con.execute(sql)
+		except Exception as e:
+			return self.message('error', execute_statements_txt(-2, str(e)))
+		return self.message('ok', cancel_chunks_txt(skipped))
 
 	def message(self, status, msg):
 		return self.response(msg, {
@@ -262,6 +611,8 @@ class ClCommander():
 		return (cmd, args[1:])
 
 	def accept(self, s):
+		if self.stream:
+			self.cancel_chunks()
 		cmd, args = self.parse_command(s)
 		if cmd:
 			self.clean_statements()
@@ -23,6 +23,10 @@ def load_database_txt(status, *args):
 		return 'When loading database, Occured Errors: {0}'.format(args[0])
 	elif status == 1:
 		return 'Load database into memory and execute {0} SQL statements'.format(args[0])
+	elif status == 2:
+		progress = '\n'.join(['    {0}/{1} pages'.format(copied, total) for copied, total in args[2]])
+		return '''Load database into memory by copying {0} pages in {1} steps
+{2}'''.format(args[0], args[1], progress)
 
 def dump_database_txt(status, *args):
 	if status == -1:
@@ -32,7 +36,8 @@ def dump_database_txt(status, *args):
 	elif status == -3:
 		return 'When dumping database, Occured Errors: {0}'.format(args[0])
 	elif status == 1:
-		return 'Dump database into [{0}] file'.format(args[0])
+		return 'Dump database into [{0}] file, {1} bytes in {2:.3f}s ({3:.0f} bytes/sec)'.format(
+			args[0], args[1]['bytes'], args[1]['seconds'], args[1]['bytes_per_sec'])
 
 def show_database_txt(status, *args):
 	if status == -1:
@@ -69,12 +74,16 @@ def command_load_txt(status, *args):
 		return 'When loading database, Occured Errors: {0}'.format(args[0])
 	elif status == -3:
 		return 'Invalid Command [{0}]'.format(args[0])
+	elif status == -4:
+		return 'Invalid load mode [{0}], avaiable modes: backup, sql'.format(args[0])
 
 def command_dump_txt(status, *args):
 	if status == -1:
 		return 'The dump file [{0}] exists, cannot overwrite it!'.format(args[0])
 	elif status == -2:
 		return 'Invalid Command [{0}]'.format(args[0])
+	elif status == -3:
+		return 'Invalid dump option [{0}], avaiable options: sql, snapshot, gzip, zlib'.format(args[0])
 
 def command_exit_txt(status, *args):
 	if status == 1:
@@ -92,4 +101,75 @@ def execute_statements_txt(status, *args):
 	if status == -1:
 		return 'The statements does not terminated with a semicolon'
 	elif status == -2:
-		return 'When executing statements, Occured Errors: {0}'.format(args[0])
\ No newline at end of file
+		return 'When executing statements, Occured Errors: {0}'.format(args[0])
+
+def export_database_txt(status, *args):
+	if status == -1:
+		return 'Please connect to database first!'
+	elif status == -2:
+		return 'When exporting database, Occured Errors: {0}'.format(args[0])
+	elif status == 1:
+		lines = ['    {0:<20} {1:>10} rows -> {2}'.format(table, r['rows'], r['path']) for table, r in args[0].items()]
+		return '''Export {0} tables in {1:.3f}s
+{2}'''.format(len(args[0]), args[1], '\n'.join(lines))
+
+def command_export_txt(status, *args):
+	if status == -1:
+		return 'Invalid Command [{0}]'.format(args[0])
+
+def import_file_txt(status, *args):
+	if status == -1:
+		return 'Please connect to database first!'
+	elif status == -2:
+		return 'When importing file, Occured Errors: {0}'.format(args[0])
+	elif status == 1:
+		rate = args[2] / args[3] if args[3] > 0 else 0.0
+		lines = ['    {0:>10} rows {1:.3f}s'.format(count, seconds) for count, seconds in args[4]]
+		return '''Import {2} rows from [{0}] into table [{1}] in {3:.3f}s ({4:.0f} rows/sec)
+{5}'''.format(args[0], args[1], args[2], args[3], rate, '\n'.join(lines))
+
+def command_import_txt(status, *args):
+	if status == -1:
+		return 'The data file [{0}] does not exists!'.format(args[0])
+	elif status == -2:
+		return 'Invalid Command [{0}]'.format(args[0])
+
+def command_timer_txt(status, *args):
+	if status == -1:
+		return 'Please connect to database first!'
+	elif status == -2:
+		return 'Invalid Command [{0}]'.format(args[0])
+	elif status == 1:
+		return 'Timer is on'
+	elif status == 2:
+		return 'Timer is off'
+
+def timer_txt(status, *args):
+	if status == 1:
+		return 'Run Time: {0:.6f}s, {1} rows, ~{2} VM steps'.format(
+			args[0]['seconds'], args[0]['rows'], args[0]['vm_steps'])
+
+def explain_statement_txt(status, *args):
+	if status == -1:
+		return 'Please connect to database first!'
+	elif status == -2:
+		return 'Please specify a statement to explain!'
+	elif status == -3:
+		return 'When explaining statement, Occured Errors: {0}'.format(args[0])
+	elif status == 1:
+		return '''QUERY PLAN
+{0}
+Bytecode: {1} instructions'''.format('\n'.join(args[0]), args[1])
+
+def next_chunk_txt(status, *args):
+	if status == -1:
+		return 'There are no more results!'
+
+def cancel_chunks_txt(status, *args):
+	if status == 0:
+		return 'There are no pending results'
+	return 'Skipped the rest results of {0} statements'.format(status)
+
+def more_chunks_txt(status, *args):
+	if status == 1:
+		return '-- More({0} rows) -- [Enter] next, [a] all, [q] quit: '.format(args[0])
@@ -1,15 +1,20 @@
 import sqlite3, copy, os, sys, re
 
 from .utils import print_list_as_table
+from ..dumper import dump_sql, guess_compression
 
 class SimpleCl(object):
 	'''
 	con -> this connection database will be loaded into memory
 	con_kwargs -> use this connection arguments to connect the memory
+	load_mode -> 'backup' copy database pages with backup API, 'sql' replay the SQL dump
 	'''
-	def __init__(self, con=None, con_kwargs=None):
+	backup_pages = 1024
+
+	def __init__(self, con=None, con_kwargs=None, load_mode='backup'):
 		self._con = con if isinstance(con, sqlite3.Connection) else None
 		self._con_kwargs = con_kwargs if isinstance(con_kwargs, dict) else {}
+		self.load_mode = load_mode
 		self.con = None
 		self.con_kwargs = None
 		self.cur = None
@@ -35,9 +40,7 @@ class SimpleCl(object):
 			f.write('\n'.join(self.cached_statements))
 
 	def dump_database(self, dump_file):
-		with open(dump_file, 'w', encoding='utf8') as f:
-			for line in self.con.iterdump():
-				f.write('%s\n' % line)
+		return dump_sql(self.con, dump_file, guess_compression(dump_file))
 
 	def clean_database(self, con):
 		for row in con.execute('SELECT name FROM sqlite_master WHERE type="table"'):
@@ -53,12 +56,17 @@ class SimpleCl(object):
 		self.con.text_factory = lambda item: item.decode('utf8')
 		self.cur = self.con.cursor()
 
-		if self._con:
+		if self._con and self.load_mode == 'sql':
 			count = 0
 			for line in self._con.iterdump():
 				count += 1
 				self.cur.execute(line)
 			print('Load your database into memory and execute %d SQL statements' % count)
+		elif self._con:
+			def progress(status, remaining, total):
+				print('Load your database into memory: %d/%d pages' % (total-remaining, total), end='\r')
+			self._con.backup(self.con, pages=self.backup_pages, progress=progress)
+			print('')
 
 		print('Please type your SQL commands')
 		print('(Enter exit or Ctrl+C to leave interaction):')
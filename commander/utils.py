@@ -1,18 +1,49 @@
-def print_list_as_table(ll, headers=[]):
-	column_width = 13
-	head = ''
-	hr = ''
+import itertools
+
+def cell_text(value, width):
+	text = str(value)
+	if len(text) > width:
+		text = text[:max(width-2, 0)] + '..'
+	return text
+
+def column_widths(rows, headers=[], max_width=40):
+	'''
+	Width of every column, the longest value of rows(a sample) or headers, 
+	at most max_width.
+	'''
+	widths = [len(str(h)) for h in headers]
+	for row in rows:
+		if not isinstance(row, (list, tuple)):
+			row = [row]
+		for i, value in enumerate(row):
+			if i >= len(widths):
+				widths.append(0)
+			widths[i] = max(widths[i], len(str(value)))
+	return [min(max(w, 1), max_width) for w in widths]
+
+def print_list_as_table(ll, headers=[], widths=None, sample_size=100, max_width=40):
+	'''
+	Print rows incrementally, ll can be any iterable. Column widths are sized 
+	from headers and the first sample_size rows unless widths is given.
+
+	Return: the column widths, pass them when printing the following rows of 
+	the same table.
+	'''
+	rows = iter(ll)
+	sample = list(itertools.islice(rows, sample_size))
+	if widths is None:
+		widths = column_widths(sample, headers, max_width)
+	def fmt_line(values):
+		if not isinstance(values, (list, tuple)):
+			values = [values]
+		cells = []
+		for i, value in enumerate(values):
+			width = widths[i] if i < len(widths) else max_width
+			cells.append(' {0:^{1}} '.format(cell_text(value, width), width))
+		return '|' + '|'.join(cells) + '|'
 	if headers:
-		fmt = (('|{:^%d}' % column_width) * len(headers))+'|'
-		head = fmt.format(*headers)
-		hr = '|' + ('+'.join(['-'*column_width for i in range(len(headers))])) + '|'
-	lines = [head, hr]
-	for l in ll:
-		if isinstance(l, list) or isinstance(l, tuple):
-			fmt = (('|{:^%d}' % column_width) * len(l))+'|'
-			lines.append(fmt.format(*l))
-		else:
-			fmt = '|{}|'
-			lines.append(fmt.format(l))
-	lines = [line.strip() for line in lines if line.strip()]
-	print('\n'.join(lines))
\ No newline at end of file
+		print(fmt_line(headers))
+		print('|' + '+'.join(['-'*(w+2) for w in widths]) + '|')
+	for row in itertools.chain(sample, rows):
+		print(fmt_line(row))
+	return widths
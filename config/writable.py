@@ -1,6 +1,7 @@
 import datetime
 
-from ..helper import md5sum, strip, reverse_cmp, JoinAggregate, datetime_py2sqlite, datetime_sqlite2py
+from ..helper import md5sum, strip, reverse_cmp, reverse_key, JoinAggregate, datetime_py2sqlite, datetime_sqlite2py, \
+	MeanAggregate, VarianceAggregate, StdevAggregate, HyperLogLog, ApproxQuantile, state_aggregate, merge_aggregate
 
 config = {
 	
@@ -14,17 +15,66 @@ config = {
 	
 	'text_factory': lambda text: text.decode('utf8'),
 	
+	'enable_fast_rows': False,
+	
+	'fast_row_class': 'tuple',
+	
+	'intern_text_size': 0,
+	
 	'waiting_unlock_timeout': 5,
 	
 	'cached_sql_statements': 100,
 	
 	'enable_autocommit': False,
 	
+	'pool_size': 0,
+	
+	'pool_idle_timeout': 300,
+	
+	'pool_wait_timeout': 5,
+	
+	'stream_batch_size': 1000,
+	
+	'count_mode': 'exact',
+	
+	'trusted_schema': None,
+	
+	'recursive_triggers': True,
+	
+	'enable_index_advisor': False,
+	
+	'enable_write_queue': False,
+	
+	'write_queue_batch': 100,
+	
+	'result_cache_size': 0,
+	
+	'result_cache_bytes': 64*1024*1024,
+	
+	'result_cache_ttl': 60,
+	
+	'enable_metrics': False,
+	
+	'slow_query_threshold': 0.5,
+	
+	'metrics_progress_steps': 1000,
+	
+	'converter_cache_size': 1024,
+	
 	'custom_functions': [
-		('function', 'md5sum', 1, md5sum),
-		('function', 'strip', 1, strip),
+		('function', 'md5sum', 1, md5sum, True),
+		('function', 'strip', 1, strip, True),
 		('aggregate', 'join', 1, JoinAggregate),
-		('collation', 'reverse', reverse_cmp)
+		('window', 'mean', 1, MeanAggregate),
+		('window', 'variance', 1, VarianceAggregate),
+		('window', 'stdev', 1, StdevAggregate),
+		('aggregate', 'approx_distinct', 1, HyperLogLog),
+		('aggregate', 'approx_distinct_state', 1, state_aggregate(HyperLogLog)),
+		('aggregate', 'approx_distinct_merge', 1, merge_aggregate(HyperLogLog)),
+		('aggregate', 'approx_quantile', 2, ApproxQuantile),
+		('aggregate', 'approx_quantile_state', 1, state_aggregate(ApproxQuantile)),
+		('aggregate', 'approx_quantile_merge', 2, merge_aggregate(ApproxQuantile)),
+		('collation', 'reverse', reverse_cmp, reverse_key)
 	],
 
 	'custom_types': [
@@ -50,12 +100,31 @@ config_description = {
 		 result set. Accept a bytes as parameter.
 	''',
 	
+	'enable_fast_rows': '''
+		Low-overhead rows: TEXT is decoded natively(text_factory and enable_row_factory 
+		 are ignored) and rows are fast_row_class instead of sqlite3.Row.
+	''',
+
+	'fast_row_class': '''
+		Row class of fast rows: 'tuple' is the cheapest, 'namedtuple' supports access 
+		 by attribute and index, its class is created once per query.
+	''',
+
+	'intern_text_size': '''
+		When fast rows enabled, equal TEXT values share one str object(saves memory for 
+		 repeated values but costs a Python call per TEXT value), this bounds the number 
+		 of interned values per connection, 0 disables interning.
+	''',
+	
 	'waiting_unlock_timeout': '''
 		When connect to database may wait other connections unlock(commit
 		 trasaction) database util timeout.
 	''',
 	
-	'cached_sql_statements': 'Cache statement to avoid SQL parsing overhead',
+	'cached_sql_statements': '''
+		Cache statement to avoid SQL parsing overhead, it's passed to sqlite3.connect() 
+		 as cached_statements and also bounds the SQL strings memoized by SimpleClient builders.
+	''',
 	
 	'enable_autocommit': '''
 		By default, sqlite3 implicitly opens trasaction before a Data Modification statements(
@@ -66,8 +135,90 @@ config_description = {
 		 performance boost).
 	''',
 
+	'pool_size': '''
+		The max number of pooled connections used by read methods(select_table, 
+		 count_table etc.), 0 disables the pool and everything runs on one connection.
+		Pooled connections only see committed changes of the main connection.
+	''',
+
+	'pool_idle_timeout': 'Pooled connections idle longer than this(seconds) will be closed',
+
+	'pool_wait_timeout': 'How long(seconds) to wait for a free pooled connection',
+
+	'stream_batch_size': 'The number of rows fetched per batch when streaming result rows',
+
+	'count_mode': '''
+		Default mode of count_table: 'exact'(COUNT(*)), 'counter'(trigger-maintained 
+		 row counters), 'approx'(estimate from ANALYZE statistics) or 'index'(count with 
+		 the smallest covering index).
+	''',
+
+	'trusted_schema': '''
+		None keeps SQLite's default, True/False sets PRAGMA trusted_schema on every 
+		 connection. The pragma applies to all views, triggers, indexes and generated 
+		 columns of the database, functions used by them need a trusted schema since 
+		 sqlite3 cannot mark them innocuous.
+	''',
+
+	'recursive_triggers': '''
+		True/False sets PRAGMA recursive_triggers on every connection, None keeps SQLite's 
+		 default(OFF). It's ON by default so rows deleted by REPLACE conflict resolution 
+		 fire DELETE triggers, which keeps row counters(see create_table row_counter) exact.
+		Triggers which modify their own table may recurse when it's ON.
+	''',
+
+	'enable_index_advisor': '''
+		Record WHERE/ORDER BY shapes of select_table, one_table and count_table, see 
+		 index_report(), suggest_indexes() and create_suggested_indexes().
+	''',
+
+	'enable_write_queue': '''
+		Put database into WAL mode, all writes(execute, executemany, executescript) are 
+		 queued and executed by one writer thread, reads are served by pooled reader 
+		 connections(pool_size, 4 by default) so readers never block on the writer.
+		Rollback is not supported in this mode, every write call is committed by itself 
+		 unless it runs in a transaction() block.
+	''',
+
+	'write_queue_batch': 'The max number of queued writes committed in one transaction(group commit)',
+
+	'result_cache_size': '''
+		The max number of results cached for select_table, one_table, count_table and 
+		 id_table, 0 disables the cache. Cached results are invalidated when any write 
+		 through the client touches the tables they read.
+	''',
+
+	'result_cache_bytes': 'The max(estimated) bytes of cached results',
+
+	'result_cache_ttl': 'Cached results expire after this(seconds), 0 means never',
+
+	'enable_metrics': '''
+		Record per statement(literals are normalized into ?) call counts, latency 
+		 histograms(p50/p95/p99), rows and VM steps of execute, executemany and 
+		 executescript, see metrics_snapshot().
+	''',
+
+	'slow_query_threshold': 'Statements slower than this(seconds) are recorded into the slow query log',
+
+	'metrics_progress_steps': '''
+		The progress handler counts VM steps in units of this number, smaller 
+		 is more accurate but slower.
+	''',
+
 	'custom_functions': '''
-		Custom python functions as SQLite inner function, aggregate and collation.
+		Custom python functions as SQLite inner function, aggregate, window function and collation.
+		list item is ('function', name, num_params, func, [deterministic]), 
+		 ('aggregate', name, num_params, cls), 
+		 ('window', name, num_params, cls) or ('collation', name, func, [key_func]).
+		key_func of a collation is registered as deterministic function sort_key_<name>, 
+		 see create_table(sort_keys=...).
+		The *_state aggregates return serialized states of partial scans, *_merge aggregates
+		 combine these states into the final value.
+	''',
+
+	'converter_cache_size': '''
+		Every converter memoizes conversions of this number of the most recent distinct 
+		 raw values(LRU), 0 disables it.
 	''',
 
 	'custom_types': '''
@@ -77,7 +228,9 @@ config_description = {
 		and when retrieve from database should use a **converter** to auto convert it back
 		to corresponding python custom type. 
 		Custom python data types auto convert into SQLite data types. list item is 
-		tuple(datetype, typename, adapte_func, convert_func), everything in tuple is optional.
+		tuple(datetype, typename, adapte_func, convert_func, [batch]), everything in tuple is optional.
+		Adapters and converters only work for the client, batch = True means convert_func 
+		 accepts a list of bytes(a column of fetched rows) and return a list.
 		**Notice** that adapte_func should return None, int, str, float, or bytes and convert_func should
 		 return a datatype object.
 	'''
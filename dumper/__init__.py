@@ -0,0 +1,3 @@
+from .dumps import snapshot_database, dump_sql, dump_database, guess_compression
+from .exports import export_tables, export_connection
+from .imports import ImportReader, guess_format
@@ -0,0 +1,141 @@
+import sqlite3, os, time, gzip, zlib
+
+def guess_compression(path):
+	'''
+	Guess compression from file extension: .gz -> gzip, .zz/.zlib -> zlib
+	'''
+	ext = os.path.splitext(str(path))[1].lower()
+	if ext == '.gz':
+		return 'gzip'
+	elif ext in ['.zz', '.zlib']:
+		return 'zlib'
+	return None
+
+def make_stats(path, seconds, **kwargs):
+	size = os.path.getsize(path)
+	stats = {
+		'path': os.path.abspath(path),
+		'bytes': size,
+		'seconds': seconds,
+		'bytes_per_sec': size / seconds if seconds > 0 else 0.0,
+	}
+	stats.update(kwargs)
+	return stats
+
+def snapshot_database(con, path, pages=1024, sleep=0.0, progress=None):
+	'''
+	Copy database into a binary SQLite file with the online backup API.
+
+	Pages are copied in steps of pages, so the source database is only locked
+	while copying a step, writers can go on between steps. The snapshot is 
+	written into a temp file and then renamed to path.
+
+	Parameters:
+
+		pages 		-> the number of pages copied per step
+		sleep 		-> seconds to sleep between steps
+		progress 	-> progress(status, remaining, total) called after every step
+
+	Return:
+
+		{'path', 'bytes', 'seconds', 'bytes_per_sec', 'pages', 'steps'}
+	'''
+	if con.in_transaction:
+		# backup keeps waiting on its own write lock
+		raise Exception('cannot snapshot a connection in transaction, commit it first')
+	tmp = '{}.tmp-{}'.format(path, os.getpid())
+	counter = {'steps': 0, 'pages': 0}
+	def report(status, remaining, total):
+		counter['steps'] += 1
+		counter['pages'] = total
+		if progress:
+			progress(status, remaining, total)
+
+	start = time.perf_counter()
+	target = sqlite3.connect(tmp)
+	try:
+		con.backup(target, pages=pages, progress=report, sleep=sleep)
+	except Exception:
+		target.close()
+		os.remove(tmp)
+		raise
+	target.close()
+	os.replace(tmp, path)
+	seconds = time.perf_counter() - start
+	return make_stats(path, seconds, pages=counter['pages'], steps=counter['steps'])
+
+class ZlibWriter(object):
+	'''
+	Write text into a raw zlib stream file.
+	'''
+
+	def __init__(self, path, level=6):
+		self.f = open(path, 'wb')
+		self.compressor = zlib.compressobj(level)
+
+	def write(self, text):
+		self.f.write(self.compressor.compress(text.encode('utf8')))
+
+	def close(self):
+		self.f.write(self.compressor.flush())
+		self.f.close()
+
+def open_writer(path, compression, level):
+	if compression == 'gzip':
+		return gzip.open(path, 'wt', encoding='utf8', compresslevel=level)
+	elif compression == 'zlib':
+		return ZlibWriter(path, level)
+	elif compression:
+		raise Exception('compression should be gzip or zlib')
+	return open(path, 'w', encoding='utf8')
+
+def dump_sql(con, path, compression=None, buffer_size=1024*1024, level=6):
+	'''
+	Stream the SQL dump(iterdump) of database into file with large buffered 
+	writes, optionally compressed.
+
+	Parameters:
+
+		compression 	-> None, 'gzip' or 'zlib'
+		buffer_size 	-> the number of characters buffered before a write
+		level 			-> compression level
+
+	Return:
+
+		{'path', 'bytes', 'seconds', 'bytes_per_sec', 'statements'}
+	'''
+	start = time.perf_counter()
+	count = 0
+	f = open_writer(path, compression, level)
+	try:
+		buf = []
+		size = 0
+		for line in con.iterdump():
+			count += 1
+			buf.append(line)
+			size += len(line) + 1
+			if size >= buffer_size:
+				buf.append('')
+				f.write('\n'.join(buf))
+				buf = []
+				size = 0
+		if buf:
+			buf.append('')
+			f.write('\n'.join(buf))
+	finally:
+		f.close()
+	seconds = time.perf_counter() - start
+	return make_stats(path, seconds, statements=count)
+
+def dump_database(con, path, mode='sql', compression=None):
+	'''
+	mode = 'sql' 		-> streaming SQL dump, compression is guessed from extension when not given
+	mode = 'snapshot' 	-> binary snapshot with backup API
+	'''
+	if mode == 'snapshot':
+		return snapshot_database(con, path)
+	elif mode == 'sql':
+		if compression is None:
+			compression = guess_compression(path)
+		return dump_sql(con, path, compression)
+	raise Exception('dump mode should be sql or snapshot')
@@ -0,0 +1,166 @@
+import sqlite3, os, time, csv, json, shutil, tempfile, binascii, urllib.request
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from .dumps import snapshot_database
+
+def export_value(value):
+	# BLOB values are exported as hex strings
+	if isinstance(value, bytes):
+		return binascii.hexlify(value).decode('ascii')
+	return value
+
+def connect_readonly(database):
+	uri = 'file:{}?mode=ro'.format(urllib.request.pathname2url(os.path.abspath(database)))
+	return sqlite3.connect(uri, uri=True)
+
+def list_tables(con):
+	rows = con.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")
+	return [row[0] for row in rows]
+
+def export_range(database, table, path, fmt='csv', start=None, end=None, header=True, batch_size=10000):
+	'''
+	Export rows of table(rowid in [start, end)) into path, rows are streamed
+	with fetchmany(batch_size) so memory is bounded.
+
+	Return:
+
+		the number of exported rows
+	'''
+	con = connect_readonly(database)
+	try:
+		sql = 'SELECT * FROM "{}"'.format(table)
+		params = []
+		if start is not None:
+			sql += ' WHERE rowid >= ? AND rowid < ?'
+			params = [start, end]
+		cursor = con.execute(sql, params)
+		columns = [d[0] for d in cursor.description]
+		count = 0
+		with open(path, 'w', encoding='utf8', newline='') as f:
+			if fmt == 'csv':
+				writer = csv.writer(f)
+				if header:
+					writer.writerow(columns)
+			while True:
+				rows = cursor.fetchmany(batch_size)
+				if not rows:
+					break
+				count += len(rows)
+				if fmt == 'csv':
+					writer.writerows([[export_value(v) for v in row] for row in rows])
+				else:
+					f.write(''.join([json.dumps(dict(zip(columns, [export_value(v) for v in row])), ensure_ascii=False) + '\n' for row in rows]))
+		return count
+	finally:
+		con.close()
+
+def table_ranges(database, table, partitions):
+	'''
+	Split table into rowid ranges, return [(start, end)] or [(None, None)].
+	'''
+	if partitions <= 1:
+		return [(None, None)]
+	con = connect_readonly(database)
+	try:
+		low, high = con.execute('SELECT min(rowid), max(rowid) FROM "{}"'.format(table)).fetchone()
+	except sqlite3.OperationalError:
+		# WITHOUT ROWID table
+		return [(None, None)]
+	finally:
+		con.close()
+	if low is None:
+		return [(None, None)]
+	step = max(1, -(-(high - low + 1) // partitions))
+	return [(start, start + step) for start in range(low, high + 1, step)]
+
+def concat_files(paths, path):
+	with open(path, 'wb') as f:
+		for part in paths:
+			with open(part, 'rb') as p:
+				shutil.copyfileobj(p, f, 1024*1024)
+			os.remove(part)
+
+def export_tables(database, tables=None, directory='.', fmt='csv', workers=None, partitions=1, processes=False, batch_size=10000, snapshot=True):
+	'''
+	Export tables of a database file into directory/<table>.<fmt> in parallel.
+
+	Every table is split into partitions rowid ranges, each range is exported
+	by a worker with its own read connection, then parts are concatenated.
+
+	Workers don't share a read transaction, so by default the database is 
+	copied into a temp file with backup API first and all tables and ranges 
+	are read from this copy. With snapshot=False they are read from the 
+	database directly, commits in between may be seen by some ranges only.
+
+	Parameters:
+
+		tables 		-> table names, None exports all tables
+		fmt 		-> 'csv' or 'jsonl'
+		workers 	-> the number of worker threads/processes, default is cpu count
+		processes 	-> use a process pool instead of a thread pool
+		snapshot 	-> export from a consistent copy of the database
+
+	Return:
+
+		{table: {'path', 'rows', 'seconds'}}
+	'''
+	if fmt not in ['csv', 'jsonl']:
+		raise Exception('export format should be csv or jsonl')
+	if database == ':memory:' or not os.path.exists(database):
+		raise Exception('export needs a database file')
+	if snapshot:
+		con = connect_readonly(database)
+		try:
+			return export_connection(con, tables, directory, fmt, 
+				workers=workers, partitions=partitions, processes=processes, batch_size=batch_size)
+		finally:
+			con.close()
+	if tables is None:
+		con = connect_readonly(database)
+		try:
+			tables = list_tables(con)
+		finally:
+			con.close()
+	if not os.path.isdir(directory):
+		os.makedirs(directory)
+
+	workers = workers if workers else (os.cpu_count() or 1)
+	executor_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+	start = time.perf_counter()
+	results = {}
+	with executor_class(max_workers=workers) as executor:
+		jobs = {}
+		for table in tables:
+			path = os.path.join(directory, '{}.{}'.format(table, fmt))
+			ranges = table_ranges(database, table, partitions)
+			parts = []
+			futures = []
+			for i, (low, high) in enumerate(ranges):
+				part = path if len(ranges) == 1 else '{}.part{}'.format(path, i)
+				parts.append(part)
+				futures.append(executor.submit(export_range,
+					database, table, part, fmt, low, high, i == 0, batch_size))
+			jobs[table] = (path, parts, futures)
+		for table, (path, parts, futures) in jobs.items():
+			rows = sum([future.result() for future in futures])
+			if len(parts) > 1:
+				concat_files(parts, path)
+			results[table] = {
+				'path': os.path.abspath(path),
+				'rows': rows,
+				'seconds': time.perf_counter() - start,
+			}
+	return results
+
+def export_connection(con, tables=None, directory='.', fmt='csv', **kwargs):
+	'''
+	Export tables of a connection(e.g. :memory: database), the database is
+	copied into a temp file with backup API first.
+	'''
+	tmpdir = tempfile.mkdtemp(prefix='quick_sqlite3_export_')
+	try:
+		database = os.path.join(tmpdir, 'export.db')
+		snapshot_database(con, database)
+		return export_tables(database, tables, directory, fmt, snapshot=False, **kwargs)
+	finally:
+		shutil.rmtree(tmpdir, ignore_errors=True)
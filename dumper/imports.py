@@ -0,0 +1,182 @@
+import csv, json, os, itertools
+
+def guess_format(path):
+	'''
+	Guess import format from file extension: .csv -> csv, .jsonl/.ndjson -> jsonl
+	'''
+	ext = os.path.splitext(str(path))[1].lower()
+	if ext == '.csv':
+		return 'csv'
+	elif ext in ['.jsonl', '.ndjson', '.json']:
+		return 'jsonl'
+	return None
+
+def is_integer(s):
+	try:
+		int(s)
+	except ValueError:
+		return False
+	return True
+
+def is_float(s):
+	try:
+		float(s)
+	except ValueError:
+		return False
+	return True
+
+def infer_type(values, text):
+	'''
+	Infer basic type(i, f, s) of a column from sample values,
+	text = True means values are strings parsed from CSV.
+	'''
+	kind = None
+	for value in values:
+		if value is None or value == '':
+			continue
+		if text:
+			t = 'i' if is_integer(value) else ('f' if is_float(value) else 's')
+		elif isinstance(value, bool) or isinstance(value, int):
+			t = 'i'
+		elif isinstance(value, float):
+			t = 'f'
+		elif isinstance(value, bytes):
+			t = 'b'
+		else:
+			t = 's'
+		if kind is None or kind == t:
+			kind = t
+		elif set([kind, t]) == set(['i', 'f']):
+			kind = 'f'
+		else:
+			return 's'
+	return kind if kind else 's'
+
+def text_to_int(value):
+	if not value:
+		return None
+	try:
+		return int(value)
+	except ValueError:
+		# types are inferred from sampled rows, keep the text and 
+		# let the column affinity store it(e.g. '1.5' as REAL)
+		return value
+
+def text_to_float(value):
+	if not value:
+		return None
+	try:
+		return float(value)
+	except ValueError:
+		return value
+
+def text_to_text(value):
+	return value if value else None
+
+def text_converter(t):
+	# empty CSV fields are imported as NULL
+	if t == 'i':
+		return text_to_int
+	elif t == 'f':
+		return text_to_float
+	return text_to_text
+
+def call(func, value):
+	return func(value)
+
+def json_value(value):
+	if isinstance(value, (list, dict)):
+		return json.dumps(value, ensure_ascii=False)
+	return value
+
+class ImportReader(object):
+	'''
+	Stream rows from a CSV(with header) or JSONL file.
+
+	columns -> column names(CSV header, or keys of the sampled JSONL rows, a 
+			   later row with other keys raises when iterated)
+	types 	-> {column: basic type}, inferred from the first sample_size rows
+			   unless given
+	iterate the reader yields tuples matching columns
+
+	Example:
+
+		with ImportReader('user.csv') as reader:
+			for row in reader:
+				print(dict(zip(reader.columns, row)))
+	'''
+
+	def __init__(self, path, fmt=None, types=None, sample_size=1000):
+		self.path = path
+		self.fmt = fmt if fmt else guess_format(path)
+		if self.fmt not in ['csv', 'jsonl']:
+			raise Exception('import format should be csv or jsonl')
+		self.given_types = types if types else {}
+		self.sample_size = sample_size
+		self.f = None
+		self.columns = []
+		self.types = {}
+		self.sample = []
+		self.rows = None
+
+	def __enter__(self):
+		self.open()
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+	def open(self):
+		self.f = open(self.path, 'r', encoding='utf8', newline='')
+		if self.fmt == 'csv':
+			reader = csv.reader(self.f)
+			try:
+				self.columns = [c.strip() for c in next(reader)]
+			except StopIteration:
+				raise Exception('CSV file has no header')
+			self.sample = list(itertools.islice(reader, self.sample_size))
+			self.rows = reader
+		else:
+			lines = (line for line in self.f if line.strip())
+			self.sample = [json.loads(line) for line in itertools.islice(lines, self.sample_size)]
+			for item in self.sample:
+				for key in item:
+					if key not in self.columns:
+						self.columns.append(key)
+			self.rows = (json.loads(line) for line in lines)
+
+		text = self.fmt == 'csv'
+		for i, column in enumerate(self.columns):
+			if column in self.given_types:
+				self.types[column] = self.given_types[column]
+			elif text:
+				self.types[column] = infer_type([row[i] if i < len(row) else None for row in self.sample], True)
+			else:
+				self.types[column] = infer_type([item.get(column) for item in self.sample], False)
+
+	def __iter__(self):
+		if self.fmt == 'csv':
+			converters = [text_converter(self.types[c]) for c in self.columns]
+			width = len(self.columns)
+			for row in itertools.chain(self.sample, self.rows):
+				if not row:
+					continue
+				if len(row) < width:
+					row = row + [''] * (width - len(row))
+				yield tuple(map(call, converters, row))
+		else:
+			columns = self.columns
+			for item in self.sample:
+				yield tuple([json_value(item.get(c)) for c in columns])
+			known = set(columns)
+			for i, item in enumerate(self.rows, len(self.sample) + 1):
+				# columns only come from the sample, don't drop the other keys silently
+				unknown = [key for key in item if key not in known]
+				if unknown:
+					raise Exception('JSONL row {} has keys {} not in the first {} rows, increase sample_size'.format(i, unknown, len(self.sample)))
+				yield tuple([json_value(item.get(c)) for c in columns])
+
+	def close(self):
+		if self.f:
+			self.f.close()
+			self.f = None
@@ -1,4 +1,5 @@
 from .functions import md5sum, strip
 from .types import datetime_py2sqlite, datetime_sqlite2py
-from .aggregations import JoinAggregate
-from .collations import reverse_cmp
+from .aggregations import JoinAggregate, MergeableAggregate, MeanAggregate, VarianceAggregate, StdevAggregate, \
+	HyperLogLog, ApproxQuantile, state_aggregate, merge_aggregate, merge_states
+from .collations import reverse_cmp, reverse_key
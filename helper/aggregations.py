@@ -1,3 +1,5 @@
+import math, json, base64, hashlib, bisect
+
 class JoinAggregate(object):
 	def __init__(self):
 		self.sep = ', '
@@ -11,4 +13,262 @@ class JoinAggregate(object):
 
 	# must declare finalize() method
 	def finalize(self):
-		return self.sep.join(self.items)
\ No newline at end of file
+		return self.sep.join(self.items)
+
+class MergeableAggregate(object):
+	'''
+	Constant memory aggregate whose state can be serialized and merged, so
+	partial results of parallel scans(e.g. rowid ranges, shards) can be combined.
+
+	Subclasses implement step(), value(), merge(other), get_state() and set_state(state).
+	finalize() returns value(), window versions also implement inverse().
+	'''
+
+	def finalize(self):
+		return self.value()
+
+	def dumps(self):
+		return json.dumps(self.get_state(), separators=(',', ':'))
+
+	@classmethod
+	def loads(cls, s):
+		aggregate = cls()
+		aggregate.set_state(json.loads(s))
+		return aggregate
+
+def state_aggregate(cls):
+	'''
+	Return an aggregate class whose result is the serialized state of cls
+	instead of the value, e.g. run it on every partition:
+
+		('aggregate', 'approx_distinct_state', 1, state_aggregate(HyperLogLog))
+	'''
+	return type(cls.__name__ + 'State', (cls,), {'finalize': lambda self: self.dumps()})
+
+def merge_aggregate(cls):
+	'''
+	Return an aggregate class which merges serialized states of cls and
+	return the value, extra arguments after the state are passed to value:
+
+		('aggregate', 'approx_distinct_merge', 1, merge_aggregate(HyperLogLog))
+		SELECT approx_distinct_merge(state) FROM partial_results
+	'''
+	def step(self, state, *args):
+		if state is not None:
+			self.merge(cls.loads(state))
+		self.args = args
+
+	def finalize(self):
+		return cls.value(self, *getattr(self, 'args', ()))
+
+	return type(cls.__name__ + 'Merge', (cls,), {'step': step, 'finalize': finalize})
+
+def merge_states(cls, states, *args):
+	'''
+	Merge serialized states(e.g. fetched from several databases) in Python
+	and return the value.
+	'''
+	aggregate = cls()
+	for state in states:
+		if state is not None:
+			aggregate.merge(cls.loads(state))
+	return aggregate.value(*args)
+
+class MeanAggregate(MergeableAggregate):
+	'''
+	Running mean and variance(Welford's algorithm), also works as window
+	function since values can be removed with inverse().
+
+	SELECT mean(score) OVER (ORDER BY id ROWS BETWEEN 9 PRECEDING AND CURRENT ROW) FROM test
+	'''
+
+	def __init__(self):
+		self.n = 0
+		self.mean = 0.0
+		self.m2 = 0.0
+
+	def step(self, value):
+		if value is None:
+			return
+		self.n += 1
+		delta = value - self.mean
+		self.mean += delta / self.n
+		self.m2 += delta * (value - self.mean)
+
+	def inverse(self, value):
+		if value is None:
+			return
+		if self.n <= 1:
+			self.n = 0
+			self.mean = 0.0
+			self.m2 = 0.0
+			return
+		self.n -= 1
+		delta = value - self.mean
+		self.mean -= delta / self.n
+		self.m2 = max(0.0, self.m2 - delta * (value - self.mean))
+
+	def merge(self, other):
+		# Chan's parallel algorithm
+		if not other.n:
+			return
+		n = self.n + other.n
+		delta = other.mean - self.mean
+		self.mean += delta * other.n / n
+		self.m2 += other.m2 + delta * delta * self.n * other.n / n
+		self.n = n
+
+	def get_state(self):
+		return [self.n, self.mean, self.m2]
+
+	def set_state(self, state):
+		self.n, self.mean, self.m2 = state
+
+	def value(self):
+		return self.mean if self.n else None
+
+class VarianceAggregate(MeanAggregate):
+	'''
+	Sample variance, NULL when there are less than 2 values.
+	'''
+
+	def value(self):
+		return self.m2 / (self.n - 1) if self.n > 1 else None
+
+class StdevAggregate(MeanAggregate):
+	'''
+	Sample standard deviation, NULL when there are less than 2 values.
+	'''
+
+	def value(self):
+		return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else None
+
+class HyperLogLog(MergeableAggregate):
+	'''
+	Approximate distinct count with 2**p registers(4KB when p = 12,
+	standard error is about 1.04/sqrt(2**p) = 1.6%).
+
+	Values are hashed with blake2b, so states from different processes
+	can be merged.
+	'''
+
+	p = 12
+
+	def __init__(self):
+		self.m = 1 << self.p
+		self.registers = bytearray(self.m)
+
+	def step(self, value):
+		if value is None:
+			return
+		data = value if isinstance(value, bytes) else repr(value).encode('utf8')
+		x = int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+		index = x >> (64 - self.p)
+		rest = x & ((1 << (64 - self.p)) - 1)
+		rank = (64 - self.p) - rest.bit_length() + 1
+		if rank > self.registers[index]:
+			self.registers[index] = rank
+
+	def merge(self, other):
+		self.registers = bytearray(map(max, self.registers, other.registers))
+
+	def get_state(self):
+		return base64.b64encode(bytes(self.registers)).decode('ascii')
+
+	def set_state(self, state):
+		self.registers = bytearray(base64.b64decode(state))
+
+	def value(self):
+		m = self.m
+		alpha = 0.7213 / (1 + 1.079 / m)
+		estimate = alpha * m * m / sum([2.0 ** -r for r in self.registers])
+		zeros = self.registers.count(0)
+		if estimate <= 2.5 * m and zeros:
+			# small range correction(linear counting)
+			estimate = m * math.log(m / zeros)
+		return int(round(estimate))
+
+class ApproxQuantile(MergeableAggregate):
+	'''
+	Approximate quantile with a merging digest: values are kept as at most
+	about 2*compression centroids, centroids near the tails are smaller so
+	extreme quantiles are more accurate.
+
+	SELECT approx_quantile(latency, 0.99) FROM requests
+	'''
+
+	compression = 100
+	buffer_size = 500
+
+	def __init__(self):
+		self.centroids = [] # [[mean, count]] sorted by mean
+		self.buffer = []
+		self.total = 0
+		self.q = 0.5
+
+	def step(self, value, q=0.5):
+		if value is None:
+			return
+		self.q = q
+		self.buffer.append(value)
+		if len(self.buffer) >= self.buffer_size:
+			self.compress()
+
+	def compress(self):
+		points = self.centroids + [[float(v), 1] for v in self.buffer]
+		self.buffer = []
+		if not points:
+			return
+		points.sort(key=lambda c: c[0])
+		total = sum([c[1] for c in points])
+		merged = [list(points[0])]
+		cumulative = 0
+		for mean, count in points[1:]:
+			last = merged[-1]
+			q = (cumulative + last[1] + count / 2.0) / total
+			limit = max(1.0, 4 * total * q * (1 - q) / self.compression)
+			if last[1] + count <= limit:
+				n = last[1] + count
+				last[0] += (mean - last[0]) * count / n
+				last[1] = n
+			else:
+				cumulative += last[1]
+				merged.append([mean, count])
+		self.centroids = merged
+		self.total = total
+
+	def merge(self, other):
+		other.compress()
+		self.centroids = self.centroids + [list(c) for c in other.centroids]
+		self.compress()
+
+	def get_state(self):
+		self.compress()
+		return self.centroids
+
+	def set_state(self, state):
+		self.centroids = [list(c) for c in state]
+		self.total = sum([c[1] for c in self.centroids])
+
+	def value(self, q=None):
+		q = self.q if q is None else q
+		self.compress()
+		if not self.centroids:
+			return None
+		if len(self.centroids) == 1:
+			return self.centroids[0][0]
+		# interpolate between centroid centers
+		rank = q * self.total
+		centers = []
+		cumulative = 0
+		for mean, count in self.centroids:
+			centers.append(cumulative + count / 2.0)
+			cumulative += count
+		i = bisect.bisect_left(centers, rank)
+		if i == 0:
+			return self.centroids[0][0]
+		if i == len(centers):
+			return self.centroids[-1][0]
+		low, high = centers[i-1], centers[i]
+		t = (rank - low) / (high - low) if high > low else 0.0
+		return self.centroids[i-1][0] + t * (self.centroids[i][0] - self.centroids[i-1][0])
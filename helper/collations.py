@@ -5,4 +5,11 @@ def reverse_cmp(s1, s2):
 	elif s1 > s2:
 		return -1
 	else:
-		return 0
\ No newline at end of file
+		return 0
+
+def reverse_key(s):
+	# sort key of reverse_cmp, ordering by it without COLLATE gives the same order:
+	# every UTF-8 byte is inverted and 0xFF terminated(so prefixes sort after)
+	if not isinstance(s, str):
+		return s
+	return bytes([255 - b for b in s.encode('utf8')]) + b'\xff'
@@ -22,21 +22,21 @@ client.create_table('users', (('username', 's'), ('phone', 's')))
 
 # method insert_table
 client.insert_table('users', {'username': 'xiao', 'phone': '166'})
-print(client.one_table('users', (('username', '="xiao"'),)))
+print(client.one_table('users', (('username', 'xiao'),)))
 
 # method drop_table
 # client.drop_table('test')
 # client.cli(client.get_connection())
 
 # method count_table
-# print(client.count_table('email', (('id', '>1'), ('id', '<3'))))
+# print(client.count_table('email', (('id', 1, '>'), ('id', 3, '<'))))
 
 # method id_table
 # row = client.id_table('email', 2)
 # print(row['subject'])
 
 # method one_table
-# row = client.one_table('email', (('id', '>0'), ('id', '<3')), ('id desc',))
+# row = client.one_table('email', (('id', 0, '>'), ('id', 3, '<')), ('id desc',))
 # print(row['subject'])
 
 # method select_table
@@ -44,7 +44,7 @@ print(client.one_table('users', (('username', '="xiao"'),)))
 # 	rows = client.select_table(
 # 		'email', 
 # 		('id', 'subject'), 
-# 		(('id', '>0'), ('id', '<30')), 
+# 		(('id', 0, '>'), ('id', 30, '<')), 
 # 		('id desc',),
 # 		(),
 # 		page_nth=i,
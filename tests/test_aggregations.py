@@ -0,0 +1,42 @@
+import statistics, unittest
+
+from quick_sqlite3.client import SimpleClient
+
+class AggregationsTest(unittest.TestCase):
+
+	def setUp(self):
+		self.client = SimpleClient(database=':memory:', enable_debug=False)
+		self.client.create_table('t', (('g', 's'), ('v', 'f')))
+		self.values = [float(i) for i in range(1000)]
+		self.client.insert_many_table('t', [('a' if i % 2 else 'b', v) for i, v in enumerate(self.values)], ('g', 'v'))
+
+	def tearDown(self):
+		self.client.close()
+
+	def value(self, sql):
+		return self.client.sql(sql, ())[0][0]
+
+	def test_window_functions(self):
+		rows = self.client.sql('SELECT v, mean(v) OVER w, variance(v) OVER w, stdev(v) OVER w FROM t '
+			'WINDOW w AS (ORDER BY id ROWS BETWEEN 2 PRECEDING AND CURRENT ROW) ORDER BY id LIMIT 4', ())
+		self.assertEqual([row[1] for row in rows], [0.0, 0.5, 1.0, 2.0])
+		self.assertAlmostEqual(rows[3][2], statistics.variance([1.0, 2.0, 3.0]))
+		self.assertAlmostEqual(rows[3][3], statistics.stdev([1.0, 2.0, 3.0]))
+		self.assertAlmostEqual(self.value('SELECT variance(v) FROM t'), statistics.variance(self.values))
+
+	def test_approx_distinct(self):
+		self.assertTrue(abs(self.value('SELECT approx_distinct(v) FROM t') - 1000) < 50)
+		self.assertEqual(self.value('SELECT approx_distinct(g) FROM t'), 2)
+		merged = self.value('SELECT approx_distinct_merge(s) FROM (SELECT approx_distinct_state(v) AS s FROM t GROUP BY g)')
+		self.assertEqual(merged, self.value('SELECT approx_distinct(v) FROM t'))
+
+	def test_approx_quantile(self):
+		self.assertTrue(abs(self.value('SELECT approx_quantile(v, 0.5) FROM t') - 500) < 20)
+		merged = self.value('SELECT approx_quantile_merge(s, 0.9) FROM (SELECT approx_quantile_state(v) AS s FROM t GROUP BY g)')
+		self.assertTrue(abs(merged - 900) < 20)
+
+	def test_join(self):
+		self.assertEqual(self.value('SELECT "join"(g) FROM (SELECT g FROM t ORDER BY id LIMIT 3)'), 'b, a, b')
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,124 @@
+import asyncio, os, shutil, tempfile, threading, time, unittest
+
+from quick_sqlite3.client import AsyncSimpleClient
+from quick_sqlite3.client.async_client import Worker
+
+# counts to n in the VM, slow enough to be cancelled
+slow_sql = 'WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x+1 FROM c WHERE x < ?) SELECT count(*) FROM c'
+
+class AsyncStreamTest(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+
+	def nested_write(self, database, reader_threads):
+		async def main():
+			client = AsyncSimpleClient(database=database, reader_threads=reader_threads, enable_debug=False)
+			try:
+				await client.create_table('users', (('username', 's'), ('age', 'i')))
+				await client.insert_many_table('users', [('u%d' % i, i) for i in range(50)], ('username', 'age'))
+				seen = 0
+				async for row in client.iter_table('users', batch_size=7):
+					# the worker is free while the loop body runs
+					await client.update_table('users', {'age': '++100'}, (('id', row['id']),))
+					seen += 1
+				# readers only see committed changes
+				await client.commit()
+				return seen, await client.count_table('users', (('age', 100, '>='),))
+			finally:
+				await client.close()
+		return asyncio.run(asyncio.wait_for(main(), 30))
+
+	def test_nested_write_memory(self):
+		self.assertEqual(self.nested_write(':memory:', 0), (50, 50))
+
+	def test_nested_write_shared_writer(self):
+		self.assertEqual(self.nested_write(os.path.join(self.directory, 'a.db'), 0), (50, 50))
+
+	def test_nested_write_readers(self):
+		self.assertEqual(self.nested_write(os.path.join(self.directory, 'b.db'), 2), (50, 50))
+
+class AsyncCancelTest(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+
+	def test_cancel_queued_call(self):
+		worker = Worker('test-worker', {'database': ':memory:', 'enable_debug': False})
+		release = threading.Event()
+		called = []
+		async def main():
+			busy = asyncio.ensure_future(worker.run(release.wait))
+			queued = asyncio.ensure_future(worker.run(called.append, 1))
+			await asyncio.sleep(0.05)
+			queued.cancel()
+			# the queued call is dropped without waiting for the busy one
+			await asyncio.wait([queued], timeout=2)
+			dropped = queued.cancelled()
+			release.set()
+			await busy
+			self.assertTrue(dropped)
+			await worker.run(called.append, 2)
+		try:
+			asyncio.run(asyncio.wait_for(main(), 30))
+		finally:
+			release.set()
+			worker.close()
+		self.assertEqual(called, [2])
+
+	def test_cancel_interrupts_own_reader(self):
+		database = os.path.join(self.directory, 'a.db')
+		async def main():
+			client = AsyncSimpleClient(database=database, reader_threads=1, enable_debug=False)
+			try:
+				await client.create_table('users', (('age', 'i'),))
+				await client.insert_many_table('users', [(i,) for i in range(100)], ('age',))
+				await client.commit()
+				seen = 0
+				async for row in client.iter_table('users', batch_size=10):
+					if seen == 0:
+						# the stream keeps its reader, the call runs on the writer
+						task = asyncio.ensure_future(client.sql(slow_sql, (10**9,)))
+						await asyncio.sleep(0.1)
+						start = time.perf_counter()
+						task.cancel()
+						with self.assertRaises(asyncio.CancelledError):
+							await task
+						self.assertTrue(time.perf_counter() - start < 5)
+					seen += 1
+				# the interrupted reader is usable again
+				self.assertEqual(await client.count_table('users'), 100)
+				return seen
+			finally:
+				await client.close()
+		self.assertEqual(asyncio.run(asyncio.wait_for(main(), 60)), 100)
+
+	def test_cancel_keeps_shared_stream(self):
+		async def main():
+			client = AsyncSimpleClient(database=':memory:', enable_debug=False)
+			try:
+				await client.create_table('users', (('age', 'i'),))
+				await client.insert_many_table('users', [(i,) for i in range(100)], ('age',))
+				seen = 0
+				async for row in client.iter_table('users', batch_size=10):
+					if seen == 0:
+						# the stream has an open statement on the writer connection
+						task = asyncio.ensure_future(client.sql(slow_sql, (10**5,)))
+						await asyncio.sleep(0)
+						task.cancel()
+						with self.assertRaises(asyncio.CancelledError):
+							await task
+					seen += 1
+				return seen
+			finally:
+				await client.close()
+		self.assertEqual(asyncio.run(asyncio.wait_for(main(), 60)), 100)
+
+if __name__ == '__main__':
+	unittest.main()
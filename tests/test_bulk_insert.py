@@ -0,0 +1,41 @@
+import unittest
+
+from quick_sqlite3.client import SimpleClient
+
+class BulkInsertTest(unittest.TestCase):
+
+	def setUp(self):
+		self.client = SimpleClient(database=':memory:', enable_debug=False)
+		self.client.create_table('users', (('username', 's'), ('age', 'i')))
+
+	def tearDown(self):
+		self.client.close()
+
+	def test_generator_of_dicts(self):
+		progress = []
+		result = self.client.insert_many_table('users', ({'username': 'x%d' % i, 'age': i} for i in range(25)), 
+			chunk_size=10, progress=lambda count, seconds: progress.append(count))
+		self.assertEqual(result['rows'], 25)
+		self.assertEqual(progress, [10, 20, 25])
+		self.assertEqual(self.client.count_table('users'), 25)
+
+	def test_multi_values(self):
+		rows = [('x%d' % i, i) for i in range(1234)]
+		result = self.client.insert_many_table('users', rows, ('username', 'age'), chunk_size=500, multi_values=True)
+		self.assertEqual(result['rows'], 1234)
+		self.assertEqual([tuple(row) for row in self.client.select_table('users', ('username', 'age'), orderby=('id',))], rows)
+
+	def test_quoted_columns(self):
+		self.client.create_table('orders', (('"group"', 'i'), ('"user name"', 's')))
+		self.client.insert_many_table('orders', [{'group': 1, 'user name': 'x'}, {'group': 2, 'user name': 'y'}])
+		self.client.insert_many_table('orders', [(3, 'z')], ('group', 'user name'), multi_values=True)
+		self.assertEqual([tuple(row) for row in self.client.select_table('orders', ('"group"', '"user name"'), orderby=('id',))], 
+			[(1, 'x'), (2, 'y'), (3, 'z')])
+
+	def test_tuple_rows_need_columns(self):
+		with self.assertRaises(Exception):
+			self.client.insert_many_table('users', [('x', 1)])
+		self.assertEqual(self.client.insert_many_table('users', [])['rows'], 0)
+
+if __name__ == '__main__':
+	unittest.main()
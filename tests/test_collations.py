@@ -0,0 +1,25 @@
+import unittest
+
+from quick_sqlite3.client import SimpleClient
+
+class SortKeyTest(unittest.TestCase):
+
+	def setUp(self):
+		self.client = SimpleClient(database=':memory:', enable_debug=False)
+
+	def tearDown(self):
+		self.client.close()
+
+	def test_sort_keys(self):
+		self.client.create_table('words', (('word', 's'),), sort_keys=(('word', 'reverse'),))
+		self.client.insert_many_table('words', [('a',), ('c',), ('b',)], ('word',))
+		rows = self.client.select_table('words', ('word',), orderby=('word COLLATE reverse',))
+		self.assertEqual([row[0] for row in rows], ['c', 'b', 'a'])
+		self.assertEqual(self.client.rewrite_orderby(('word COLLATE reverse DESC',)), ['sort_key_reverse(word) DESC'])
+
+	def test_collation_without_sort_key(self):
+		with self.assertRaises(Exception):
+			self.client.create_table('other', (('word', 's'),), sort_keys=(('word', 'nocase'),))
+
+if __name__ == '__main__':
+	unittest.main()
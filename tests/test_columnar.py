@@ -0,0 +1,30 @@
+import math, unittest
+
+from quick_sqlite3.client import SimpleClient
+
+class ColumnarTest(unittest.TestCase):
+
+	def setUp(self):
+		self.client = SimpleClient(database=':memory:', enable_debug=False)
+		self.client.create_table('users', (('username', 's'), ('age', 'i'), ('score', 'f')))
+		self.client.insert_table('users', {'username': 'xiao', 'age': 20, 'score': 1.5})
+		self.client.insert_table('users', {'username': 'tom', 'age': None, 'score': 2.5})
+
+	def tearDown(self):
+		self.client.close()
+
+	def test_select_table_columnar(self):
+		columns = self.client.select_table('users', ('username', 'age', 'score'), orderby=('id',), columnar=True)
+		self.assertEqual(list(columns['username']), ['xiao', 'tom'])
+		# INTEGER column with NULL is promoted to REAL with NaN
+		self.assertEqual(columns['age'][0], 20)
+		self.assertTrue(math.isnan(columns['age'][1]))
+		self.assertEqual(list(columns['score']), [1.5, 2.5])
+
+	def test_fetch_columns(self):
+		columns = self.client.fetch_columns('SELECT id, username FROM users ORDER BY id', types={'id': 'i'}, use_numpy=False)
+		self.assertEqual(columns['id'].tolist(), [1, 2])
+		self.assertEqual(columns['username'], ['xiao', 'tom'])
+
+if __name__ == '__main__':
+	unittest.main()
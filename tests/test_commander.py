@@ -0,0 +1,61 @@
+import unittest
+
+from quick_sqlite3.commander import ClCommander
+
+class CommanderTest(unittest.TestCase):
+
+	def setUp(self):
+		self.commander = ClCommander(None, chunk_rows=0)
+		self.commander.connect_database()
+		self.commander.accept('CREATE TABLE t(a INTEGER);')
+		self.commander.accept('INSERT INTO t VALUES (1),(2),(3),(4),(5),(6),(7);')
+
+	def tearDown(self):
+		self.commander.con.close()
+
+	def test_timer(self):
+		self.assertEqual(self.commander.accept('TIMER on')['header']['status'], 'ok')
+		timer = self.commander.accept('SELECT a FROM t;')['header']['timer']
+		self.assertEqual(timer['rows'], 7)
+		self.assertTrue(timer['seconds'] >= 0 and timer['vm_steps'] >= 0)
+		self.commander.accept('TIMER off')
+		self.assertNotIn('timer', self.commander.accept('SELECT a FROM t;')['header'])
+
+	def test_explain(self):
+		response = self.commander.accept('EXPLAIN QUERY PLAN SELECT * FROM t WHERE a=1')
+		self.assertEqual(response['header']['status'], 'ok')
+		self.assertIn('SCAN t', response['body'])
+		self.assertIn('instructions', response['body'])
+		self.commander.accept('CREATE INDEX t_a ON t(a);')
+		self.assertIn('t_a', self.commander.accept('EXPLAIN SELECT * FROM t WHERE a=1')['body'])
+		self.assertEqual(self.commander.accept('EXPLAIN SELECT nope FROM t')['header']['status'], 'error')
+
+	def test_chunks(self):
+		self.commander.chunk_rows = 3
+		response = self.commander.accept('SELECT a FROM t; SELECT count(*) FROM t;')
+		chunks = [response]
+		while response['header']['continuation']:
+			response = self.commander.next_chunk()
+			chunks.append(response)
+		self.assertEqual([chunk['header']['type'] for chunk in chunks], ['data-chunk']*3)
+		segments = [segment for chunk in chunks for segment in chunk['body']]
+		self.assertEqual([segment['continued'] for segment in segments], [False, True, True, False])
+		self.assertEqual([row[0] for segment in segments[:3] for row in segment['rows']], [1, 2, 3, 4, 5, 6, 7])
+		self.assertEqual(segments[3]['rows'], [(7,)])
+		self.assertEqual(self.commander.next_chunk()['header']['status'], 'error')
+
+	def test_cancel_chunks(self):
+		self.commander.chunk_rows = 3
+		response = self.commander.accept('SELECT a FROM t; INSERT INTO t VALUES (8); SELECT a FROM t;')
+		self.assertTrue(response['header']['continuation'])
+		self.assertEqual(self.commander.cancel_chunks()['header']['status'], 'ok')
+		# the pending INSERT is still executed
+		self.assertEqual(self.commander.con.execute('SELECT count(*) FROM t').fetchone()[0], 8)
+
+	def test_whole_results(self):
+		response = self.commander.accept('SELECT a FROM t WHERE a > 5;')
+		self.assertEqual(response['header']['type'], 'data')
+		self.assertEqual(response['body'][:3], [['a'], (6,), (7,)])
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+
+from quick_sqlite3.client import SimpleClient, Expression
+from quick_sqlite3.helper import md5sum
+
+class ConditionsTest(unittest.TestCase):
+
+	def setUp(self):
+		self.client = SimpleClient(database=':memory:', enable_debug=False)
+		self.client.create_table('users', (('username', 's'), ('age', 'i')))
+		for username, age in [('xiao', 20), ('tom', 35), ('o\'neil', 50), ('amy', None)]:
+			self.client.insert_table('users', {'username': username, 'age': age})
+
+	def tearDown(self):
+		self.client.close()
+
+	def test_build_where(self):
+		self.assertEqual(self.client.build_where((('username', 'xiao'),)), (('`username` = ?',), ['xiao']))
+		self.assertEqual(self.client.build_where((('age', 30, '>'), ('id', [1, 2], 'in'))), 
+			(('`age` > ?', '`id` IN (?, ?)'), [30, 1, 2]))
+		self.assertEqual(self.client.build_where((('age', None, 'is  not'),)), (('`age` IS NOT ?',), [None]))
+		self.assertEqual(self.client.build_where(((Expression('md5sum(username)'), 'x'),)), 
+			(('md5sum(username) = ?',), ['x']))
+		self.assertEqual(self.client.build_where((('a`b', 1),)), (('`a``b` = ?',), [1]))
+
+	def test_invalid_operator(self):
+		with self.assertRaises(Exception):
+			self.client.build_where((('age', 1, '= 1 OR 1 ='),))
+		with self.assertRaises(Exception):
+			self.client.build_where((('age',),))
+
+	def test_two_tuple_value_is_bound(self):
+		self.assertEqual(self.client.count_table('users', (('username', 'xiao'),)), 1)
+		self.assertEqual(self.client.count_table('users', (('username', "o'neil"),)), 1)
+		# SQL in values is never spliced
+		self.assertEqual(self.client.count_table('users', (('username', "x' OR '1'='1"),)), 0)
+		self.assertEqual(self.client.count_table('users', (('username', '>0', '='),)), 0)
+		self.assertEqual(self.client.count_table('users'), 4)
+
+	def test_legacy_conditions(self):
+		self.assertEqual(self.client.build_where((('age', '>30'),)), (('`age` > ?',), [30]))
+		self.assertEqual(self.client.build_where((('username', ' like "x%"'),)), (('`username` LIKE ?',), ['x%']))
+		self.assertEqual(self.client.count_table('users', (('age', '>30'),)), 2)
+		self.assertEqual(len(self.client.select_table('users', where_condition=(('id', '>2'),))), 2)
+		self.assertEqual(self.client.one_table('users', (('username', '="tom"'),))['age'], 35)
+		# conditions which cannot be bound raise instead of matching nothing
+		for condition in [' IS NULL', '>age', '=1 OR 1=1', ' IN (1, 2)']:
+			with self.assertRaises(Exception):
+				self.client.count_table('users', (('age', condition),))
+
+	def test_unknown_column(self):
+		# a quoted unknown name is not compared as a string literal
+		with self.assertRaises(Exception):
+			self.client.count_table('users', (('usernme', 'xiao'),))
+		with self.assertRaises(Exception):
+			self.client.select_table('users', where_condition=(('agee', 30, '>'),))
+
+	def test_documented_examples(self):
+		self.assertEqual(self.client.count_table('users', (('age', 50, '>'),)), 0)
+		self.assertEqual(self.client.count_table('users', (('age', None, 'IS'),)), 1)
+		self.assertEqual(self.client.one_table('users', (('id', 3, '>'),))['username'], 'amy')
+		rows = self.client.select_table('users', ('id', 'username'), (('id', 1, '>'),), ('id desc',), page_nth=1, page_num=2)
+		self.assertEqual([row['username'] for row in rows], ['amy', 'o\'neil'])
+		self.assertEqual(self.client.update_table('users', {'age': '++1'}, (('username', 'xiao'),)), 1)
+		self.assertEqual(self.client.one_table('users', (('username', 'xiao'),))['age'], 21)
+
+	def test_expression_index_example(self):
+		self.client.create_index('users', 'md5sum(username)')
+		where = ((Expression('md5sum(username)'), md5sum('tom')),)
+		self.assertEqual(self.client.count_table('users', where), 1)
+		condition, params = self.client.build_where(where)
+		plan = self.client.fetchall('EXPLAIN QUERY PLAN SELECT * FROM users WHERE ' + condition[0], params)
+		self.assertIn('idx_users_md5sum_username', ' '.join([row[3] for row in plan]))
+
+	def test_cached_sql(self):
+		for age in range(3):
+			self.client.select_table('users', where_condition=(('age', age),))
+		stats = self.client.sql_cache_stats()
+		self.assertTrue(stats['hits'] >= 2)
+		# the values are bound, not cached in SQL
+		self.assertEqual(len(self.client.select_table('users', where_condition=(('age', 35),))), 1)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,45 @@
+import datetime, unittest
+
+from quick_sqlite3.client import SimpleClient
+
+born = datetime.datetime(2020, 1, 2, 3, 4, 5)
+
+class ConvertersTest(unittest.TestCase):
+
+	def setUp(self):
+		self.client = SimpleClient(database=':memory:', enable_debug=False)
+		self.client.create_table('users', (('username', 's'), ('age', 'i'), ('born', 'datetime')))
+		self.client.insert_table('users', {'username': 'xiao', 'age': 20, 'born': born})
+		self.client.insert_table('users', {'username': 'tom', 'age': None, 'born': born})
+
+	def tearDown(self):
+		self.client.close()
+
+	def test_memoized_converter(self):
+		rows = self.client.select_table('users', ('username', ('born', 'datetime')))
+		self.assertEqual([row['born'] for row in rows], [born, born])
+		stats = self.client.converter_stats()['DATETIME']
+		self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+	def test_batch_converter(self):
+		batches = []
+		def convert(values):
+			batches.append(len(values))
+			return [int(value) * 2 for value in values]
+		self.client.add_converter('double', convert, batch=True)
+		rows = self.client.select_table('users', (('age', 'double'),), (('age', None, 'IS NOT'),))
+		self.assertEqual([row[0] for row in rows], [40])
+		self.assertEqual(batches, [1])
+
+	def test_converters_are_per_client(self):
+		other = SimpleClient(database=':memory:', enable_debug=False)
+		try:
+			self.client.add_converter('double', lambda value: int(value) * 2)
+			other.create_table('t', (('a', 'i'),))
+			other.insert_table('t', {'a': 2})
+			self.assertEqual(other.select_table('t', (('a', 'double'),))[0][0], 2)
+		finally:
+			other.close()
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+
+from quick_sqlite3.client import SimpleClient
+
+class CountTest(unittest.TestCase):
+
+	def setUp(self):
+		self.client = SimpleClient(database=':memory:', enable_debug=False)
+		self.client.create_table('users', (('username', 's'), ('age', 'i')), indexes=('age',), row_counter=True)
+		self.client.insert_many_table('users', [('u%02d' % i, i % 10) for i in range(50)], ('username', 'age'))
+
+	def tearDown(self):
+		self.client.close()
+
+	def test_counter(self):
+		self.assertEqual(self.client.count_table('users', mode='counter'), 50)
+		self.client.insert_table('users', {'username': 'new', 'age': 3})
+		self.client.execute('DELETE FROM users WHERE id=1', autocommit=True)
+		self.client.execute('DELETE FROM users WHERE id=2', autocommit=True)
+		self.assertEqual(self.client.count_table('users', mode='counter'), 49)
+
+	def test_index(self):
+		self.assertEqual(self.client.count_table('users', (('age', 4),), mode='index'), 5)
+		self.assertEqual(self.client.covering_index('users', (('age', 4),)), self.client.index_name('users', ('age',)))
+
+	def test_approx(self):
+		# not analyzed, falls back to exact
+		self.assertEqual(self.client.count_table('users', mode='approx'), 50)
+		self.client.analyze('users')
+		self.assertEqual(self.client.count_table('users', mode='approx'), 50)
+		self.assertTrue(0 < self.client.count_table('users', (('age', 4),), mode='approx') < 50)
+
+	def test_invalid_mode(self):
+		with self.assertRaises(Exception):
+			self.client.count_table('users', mode='fast')
+
+	def test_approx_partial_index(self):
+		client = SimpleClient(database=':memory:', enable_debug=False)
+		self.addCleanup(client.close)
+		client.create_table('t', (('a', 'i'),), indexes=({'expressions': ('a',), 'where': 'a > 90'}, 'a'))
+		client.insert_many_table('t', [(i,) for i in range(100)], ('a',))
+		client.analyze('t')
+		indexes = dict([(row[4], row[1]) for row in client.fetchall('PRAGMA index_list(t)')])
+		# the partial index row is read last
+		client.execute('DELETE FROM sqlite_stat1')
+		client.execute("INSERT INTO sqlite_stat1 VALUES ('t', ?, '100 1'), ('t', ?, '9 1')", (indexes[0], indexes[1]))
+		client.commit()
+		self.assertEqual(client.count_table('t', mode='approx'), 100)
+
+	def test_counter_replace(self):
+		client = SimpleClient(database=':memory:', enable_debug=False)
+		self.addCleanup(client.close)
+		client.create_table('t', (('a', 'i', 'UNIQUE'),), row_counter=True)
+		client.insert_many_table('t', [(i,) for i in range(10)], ('a',))
+		client.execute('INSERT OR REPLACE INTO t(a) VALUES (3)', autocommit=True)
+		client.execute('REPLACE INTO t(a) VALUES (4)', autocommit=True)
+		self.assertEqual(client.count_table('t', mode='counter'), 10)
+		self.assertEqual(client.count_table('t', mode='exact'), 10)
+
+	def test_counter_table_checked_once(self):
+		checks = []
+		has_table = self.client.has_table
+		self.client.has_table = lambda tbl_name: checks.append(tbl_name) or has_table(tbl_name)
+		for i in range(3):
+			self.client.count_table('users', mode='counter')
+		self.assertEqual(checks, [])
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,54 @@
+import gzip, os, shutil, sqlite3, tempfile, unittest
+
+from quick_sqlite3.client import SimpleClient
+from quick_sqlite3.commander import ClCommander
+
+class DumpTest(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+
+	def path(self, name):
+		return os.path.join(self.directory, name)
+
+	def count(self, path):
+		con = sqlite3.connect(path)
+		try:
+			return con.execute('SELECT count(*) FROM users').fetchone()[0]
+		finally:
+			con.close()
+
+	def test_client_dump(self):
+		client = SimpleClient(database=self.path('test.db'), enable_debug=False)
+		try:
+			client.create_table('users', (('username', 's'),))
+			client.insert_many_table('users', [('u%d' % i,) for i in range(100)], ('username',))
+			stats = client.dump(self.path('dump.sql.gz'))
+			client.dump(self.path('dump.db'), mode='snapshot')
+		finally:
+			client.close()
+		self.assertEqual(stats['path'], self.path('dump.sql.gz'))
+		con = sqlite3.connect(':memory:')
+		with gzip.open(self.path('dump.sql.gz'), 'rt') as f:
+			con.executescript(f.read())
+		self.assertEqual(con.execute('SELECT count(*) FROM users').fetchone()[0], 100)
+		con.close()
+		self.assertEqual(self.count(self.path('dump.db')), 100)
+
+	def test_commander_dump(self):
+		commander = ClCommander(None)
+		commander.connect_database()
+		commander.accept('CREATE TABLE users(username TEXT);')
+		commander.accept("INSERT INTO users VALUES ('a'), ('b');")
+		self.assertEqual(commander.accept('DUMP {} snapshot'.format(self.path('dump.db')))['header']['status'], 'ok')
+		# the dump file should not be overwritten
+		self.assertEqual(commander.accept('DUMP {}'.format(self.path('dump.db')))['header']['status'], 'error')
+		self.assertEqual(commander.accept('DUMP {} sql zlib'.format(self.path('dump.sql')))['header']['status'], 'ok')
+		commander.con.close()
+		self.assertEqual(self.count(self.path('dump.db')), 2)
+
+if __name__ == '__main__':
+	unittest.main()
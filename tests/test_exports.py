@@ -0,0 +1,71 @@
+import json, os, shutil, sqlite3, tempfile, unittest
+
+from quick_sqlite3.client import SimpleClient
+from quick_sqlite3.commander import ClCommander
+from quick_sqlite3.dumper import exports
+
+class ExportTest(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+
+	def test_export_partitions(self):
+		client = SimpleClient(database=os.path.join(self.directory, 'test.db'), enable_debug=False)
+		try:
+			client.create_table('users', (('username', 's'), ('age', 'i')))
+			client.insert_many_table('users', [('u%d' % i, i) for i in range(100)], ('username', 'age'))
+			results = client.export_tables(None, self.directory, 'csv', workers=2, partitions=3)
+		finally:
+			client.close()
+		self.assertEqual(list(results.keys()), ['users'])
+		self.assertEqual(results['users']['rows'], 100)
+		with open(results['users']['path']) as f:
+			lines = f.read().splitlines()
+		self.assertEqual(lines[0], 'id,username,age')
+		self.assertEqual(lines[1:], ['%d,u%d,%d' % (i+1, i, i) for i in range(100)])
+
+	def test_export_snapshot(self):
+		database = os.path.join(self.directory, 'test.db')
+		client = SimpleClient(database=database, enable_debug=False)
+		export_range = exports.export_range
+		def delete_then_export(*args):
+			# another connection commits while the first range is exported
+			if not deleted:
+				con = sqlite3.connect(database)
+				con.execute('DELETE FROM users WHERE id = (SELECT max(id) FROM users)')
+				con.commit()
+				con.close()
+				deleted.append(True)
+			return export_range(*args)
+		try:
+			client.create_table('users', (('username', 's'), ('age', 'i')))
+			client.insert_many_table('users', [('u%d' % i, i) for i in range(100)], ('username', 'age'))
+			exports.export_range = delete_then_export
+			deleted = []
+			results = client.export_tables(['users'], self.directory, 'csv', workers=1, partitions=4)
+			self.assertEqual(deleted, [True])
+			self.assertEqual(results['users']['rows'], 100)
+			deleted = []
+			results = exports.export_tables(database, ['users'], self.directory, 'csv', workers=1, partitions=4, snapshot=False)
+			self.assertEqual(results['users']['rows'], 98)
+		finally:
+			exports.export_range = export_range
+			client.close()
+
+	def test_commander_export(self):
+		commander = ClCommander(None)
+		commander.connect_database()
+		commander.accept('CREATE TABLE t(a INTEGER, b BLOB);')
+		commander.accept("INSERT INTO t VALUES (1, x'ff'), (2, NULL);")
+		response = commander.accept('EXPORT {} jsonl t'.format(self.directory))
+		commander.con.close()
+		self.assertEqual(response['header']['status'], 'ok')
+		with open(os.path.join(self.directory, 't.jsonl')) as f:
+			rows = [json.loads(line) for line in f]
+		self.assertEqual(rows, [{'a': 1, 'b': 'ff'}, {'a': 2, 'b': None}])
+
+if __name__ == '__main__':
+	unittest.main()
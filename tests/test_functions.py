@@ -0,0 +1,40 @@
+import sqlite3, unittest
+
+from quick_sqlite3.client import SimpleClient, Expression
+from quick_sqlite3.helper import md5sum
+
+class FunctionsTest(unittest.TestCase):
+
+	def make_client(self, **kwargs):
+		client = SimpleClient(database=':memory:', enable_debug=False, **kwargs)
+		self.addCleanup(client.close)
+		return client
+
+	def test_create_table_examples(self):
+		client = self.make_client()
+		client.create_table('users', (('username', 's'),), 
+			generated_columns=(('username_md5', 's', 'md5sum(username)'),), 
+			indexes=('md5sum(username)', {'expressions': ('username_md5',), 'unique': True}))
+		client.insert_many_table('users', [('u%d' % i,) for i in range(100)], ('username',))
+		digest = md5sum('u42')
+		for where in [((Expression('md5sum(username)'), digest),), (('username_md5', digest),)]:
+			self.assertEqual(client.one_table('users', where)['username'], 'u42')
+			condition, params = client.build_where(where)
+			plan = client.fetchall('EXPLAIN QUERY PLAN SELECT * FROM users WHERE ' + condition[0], params)
+			self.assertTrue(plan[0][3].startswith('SEARCH'))
+
+	def test_trusted_schema_is_not_changed(self):
+		default = sqlite3.connect(':memory:').execute('PRAGMA trusted_schema').fetchone()[0]
+		client = self.make_client()
+		client.add_function('double', 1, lambda x: x * 2, deterministic=True)
+		self.assertEqual(client.fetchone('PRAGMA trusted_schema')[0], default)
+		self.assertEqual(client.fetchone('SELECT double(21)')[0], 42)
+
+	def test_trusted_schema_opt_in(self):
+		client = self.make_client(trusted_schema=False)
+		self.assertEqual(client.fetchone('PRAGMA trusted_schema')[0], 0)
+		client = self.make_client(trusted_schema=True)
+		self.assertEqual(client.fetchone('PRAGMA trusted_schema')[0], 1)
+
+if __name__ == '__main__':
+	unittest.main()
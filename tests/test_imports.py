@@ -0,0 +1,115 @@
+import csv, json, os, shutil, sqlite3, tempfile, unittest
+
+from quick_sqlite3.client import SimpleClient
+from quick_sqlite3.commander import ClCommander
+from quick_sqlite3.dumper import ImportReader
+
+class ImportTest(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.client = SimpleClient(database=':memory:', enable_debug=False)
+
+	def tearDown(self):
+		self.client.close()
+		shutil.rmtree(self.directory)
+
+	def write_csv(self, name, rows):
+		path = os.path.join(self.directory, name)
+		with open(path, 'w', encoding='utf8', newline='') as f:
+			writer = csv.writer(f)
+			writer.writerow(['id', 'username', 'age'])
+			writer.writerows(rows)
+		return path
+
+	def rows(self, bad=None):
+		rows = [[str(i+1), 'u%d' % i, str(i)] for i in range(1200)]
+		if bad:
+			rows[1100] = bad
+		return rows
+
+	def test_values_after_sample_fall_back(self):
+		rows = self.rows()
+		rows[1100][2] = '1.5'
+		rows[1150][2] = 'oops'
+		path = self.write_csv('users.csv', rows)
+		result = self.client.import_file(path, chunk_size=500)
+		self.assertEqual(result['types']['age'], 'i')
+		self.assertEqual(result['rows'], 1200)
+		self.assertEqual(self.client.one_table('users', (('username', 'u1100'),))['age'], 1.5)
+		self.assertEqual(self.client.one_table('users', (('username', 'u1150'),))['age'], 'oops')
+		self.assertEqual(self.client.one_table('users', (('username', 'u7'),))['age'], 7)
+
+	def test_failed_import_rolls_back(self):
+		# duplicate primary key after the first committed chunks
+		path = self.write_csv('users.csv', self.rows(['5', 'u1100', '1']))
+		with self.assertRaises(Exception):
+			self.client.import_file(path, chunk_size=500)
+		self.assertFalse(self.client.has_table('users'))
+
+		self.client.create_table('users', (('username', 's'), ('age', 'i')))
+		self.client.insert_table('users', {'id': 5000, 'username': 'xiao', 'age': 20})
+		self.client.commit()
+		with self.assertRaises(Exception):
+			self.client.import_file(path, chunk_size=500)
+		self.assertEqual(self.client.count_table('users'), 1)
+
+	def test_commander_import_transaction(self):
+		commander = ClCommander(None)
+		commander.connect_database()
+		statements = []
+		commander.con.set_trace_callback(statements.append)
+		commander.import_chunk_size = 500
+		response = commander.import_file(self.write_csv('good.csv', self.rows()))
+		self.assertEqual(response['header']['status'], 'ok')
+		self.assertEqual(statements.count('BEGIN'), 1)
+		self.assertEqual(statements.count('COMMIT'), 1)
+		self.assertEqual(commander.con.execute('SELECT COUNT(*) FROM good').fetchone()[0], 1200)
+
+		response = commander.import_file(self.write_csv('bad.csv', self.rows(['5', 'u1100', '1'])))
+		self.assertEqual(response['header']['status'], 'error')
+		self.assertIn('ROLLBACK', statements)
+		self.assertIsNone(commander.con.execute("SELECT name FROM sqlite_master WHERE name = 'bad'").fetchone())
+
+	def test_commander_replay_database(self):
+		con = sqlite3.connect(':memory:')
+		con.execute('CREATE TABLE t (a)')
+		con.executemany('INSERT INTO t VALUES (?)', [(i,) for i in range(10)])
+		con.commit()
+		commander = ClCommander(None)
+		commander.connect_database()
+		response = commander.load_database(con, 'sql')
+		self.assertEqual(response['header']['status'], 'ok')
+		self.assertEqual(commander.con.execute('SELECT COUNT(*) FROM t').fetchone()[0], 10)
+		self.assertFalse(commander.con.in_transaction)
+
+	def test_jsonl_keys_after_sample(self):
+		path = os.path.join(self.directory, 'users.jsonl')
+		with open(path, 'w', encoding='utf8') as f:
+			for i in range(1200):
+				item = {'username': 'u%d' % i}
+				if i == 10:
+					item['age'] = i
+				if i == 1100:
+					item['email'] = 'u@x'
+				f.write(json.dumps(item) + '\n')
+		with self.assertRaises(Exception) as cm:
+			self.client.import_file(path)
+		self.assertIn('1101', str(cm.exception))
+		self.assertFalse(self.client.has_table('users'))
+
+		# keys of the sampled rows all become columns
+		with ImportReader(path, sample_size=1200) as reader:
+			self.assertEqual(reader.columns, ['username', 'age', 'email'])
+			self.assertEqual(len(list(reader)), 1200)
+
+	def test_has_table(self):
+		self.assertFalse(self.client.has_table('users'))
+		self.client.create_table('users', (('username', 's'),))
+		self.assertTrue(self.client.has_table('users'))
+		# views are not tables
+		self.client.execute('CREATE VIEW names AS SELECT username FROM users')
+		self.assertFalse(self.client.has_table('names'))
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+from quick_sqlite3.client import SimpleClient, Expression
+from quick_sqlite3.client.index_advisor import index_terms, normalize_expression
+
+class IndexAdvisorTest(unittest.TestCase):
+
+	def setUp(self):
+		self.client = SimpleClient(database=':memory:', enable_debug=False, enable_index_advisor=True)
+		self.client.create_table('users', (('username', 's'), ('age', 'i')))
+		self.client.insert_many_table('users', [('u%d' % i, i % 50) for i in range(200)], ('username', 'age'))
+
+	def tearDown(self):
+		self.client.close()
+
+	def test_index_terms(self):
+		self.assertEqual(index_terms('CREATE INDEX i ON t (md5sum(a, \',\'), "b" DESC, c COLLATE nocase)'), 
+			['md5sum(a, \',\')', '"b"', 'c'])
+		self.assertEqual(normalize_expression('"Age" DESC'), 'age')
+
+	def test_suggest_and_create(self):
+		for i in range(3):
+			self.client.select_table('users', where_condition=(('age', i),))
+		self.client.count_table('users', (('age', 10, '>'),))
+		suggestions = self.client.suggest_indexes()
+		self.assertEqual(suggestions[0]['columns'], ['age'])
+		self.assertEqual(suggestions[0]['calls'], 4)
+		self.assertEqual(self.client.create_suggested_indexes(), ['idx_users_age'])
+		self.assertEqual(self.client.suggest_indexes(), [])
+
+	def test_failed_shape_does_not_break_report(self):
+		self.client.create_table('tmp', (('name', 's'),))
+		self.client.select_table('tmp', where_condition=(('name', 'x'),))
+		self.client.select_table('users', where_condition=(('age', 1),))
+		self.client.drop_table('tmp')
+		report = self.client.index_report()
+		errors = [item for item in report if item.get('error')]
+		self.assertEqual([item['table'] for item in errors], ['tmp'])
+		self.assertEqual([item['columns'] for item in self.client.suggest_indexes()], [['age']])
+
+	def test_existing_expression_indexes(self):
+		self.client.create_index('users', 'md5sum(username)')
+		# the expression index is only read for the order, the plan is a full scan
+		self.client.select_table('users', orderby=('md5sum(username)',))
+		self.client.select_table('users', where_condition=((Expression('md5sum( username )'), 'x', '>'),))
+		self.assertEqual(self.client.suggest_indexes(), [])
+
+	def test_existing_sort_key_index(self):
+		self.client.create_table('names', (('name', 's'),), sort_keys=(('name', 'reverse'),))
+		self.client.select_table('names', orderby=('name COLLATE reverse DESC',))
+		self.assertEqual(self.client.suggest_indexes(), [])
+
+if __name__ == '__main__':
+	unittest.main()
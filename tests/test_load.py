@@ -0,0 +1,52 @@
+import os, shutil, sqlite3, tempfile, unittest
+
+from quick_sqlite3.commander import ClCommander
+
+class LoadTest(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.database = os.path.join(self.directory, 'test.db')
+		con = sqlite3.connect(self.database)
+		con.execute('CREATE TABLE t(a INTEGER)')
+		con.executemany('INSERT INTO t VALUES (?)', [(i,) for i in range(1, 8)])
+		con.commit()
+		con.close()
+		self.commander = ClCommander(None)
+		self.commander.connect_database()
+
+	def tearDown(self):
+		self.commander.con.close()
+		shutil.rmtree(self.directory)
+
+	def test_load(self):
+		for mode in ['backup', 'sql']:
+			self.commander.con.close()
+			self.commander.connect_database()
+			response = self.commander.accept('LOAD {} {}'.format(self.database, mode))
+			self.assertEqual(response['header']['status'], 'ok')
+			self.assertEqual(self.commander.con.execute('SELECT sum(a) FROM t').fetchone()[0], 28)
+
+	def test_load_again(self):
+		other = os.path.join(self.directory, 'other.db')
+		con = sqlite3.connect(other)
+		con.execute('PRAGMA page_size=8192')
+		con.execute('CREATE TABLE u(b TEXT)')
+		con.execute("INSERT INTO u VALUES ('x')")
+		con.commit()
+		con.close()
+		response = self.commander.accept('LOAD {}'.format(self.database))
+		self.assertEqual(response['header']['status'], 'ok')
+		# the second backup has another page size and replaces the first one
+		response = self.commander.accept('LOAD {}'.format(other))
+		self.assertEqual(response['header']['status'], 'ok')
+		tables = self.commander.con.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()
+		self.assertEqual(tables, [('u',)])
+		self.assertEqual(self.commander.con.execute('SELECT b FROM u').fetchone()[0], 'x')
+
+	def test_missing_file(self):
+		response = self.commander.accept('LOAD {}'.format(os.path.join(self.directory, 'nope.db')))
+		self.assertEqual(response['header']['status'], 'error')
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+
+from quick_sqlite3.client import SimpleClient
+
+class MetricsTest(unittest.TestCase):
+
+	def setUp(self):
+		self.client = SimpleClient(database=':memory:', enable_debug=False, enable_metrics=True, slow_query_threshold=0)
+		self.client.create_table('users', (('username', 's'), ('age', 'i')))
+		self.client.insert_many_table('users', [('u%d' % i, i) for i in range(100)], ('username', 'age'))
+
+	def tearDown(self):
+		self.client.close()
+
+	def test_snapshot(self):
+		for age in range(3):
+			self.client.select_table('users', where_condition=(('age', age),))
+		snapshot = self.client.metrics_snapshot(reset=True)
+		stats = [s for sql, s in snapshot['statements'].items() if sql.startswith('SELECT * FROM users WHERE')]
+		self.assertEqual(len(stats), 1)
+		self.assertEqual((stats[0]['calls'], stats[0]['rows'], stats[0]['errors']), (3, 3, 0))
+		self.assertTrue(stats[0]['p50'] <= stats[0]['p99'])
+		self.assertTrue(snapshot['slow_queries'])
+		self.assertEqual(self.client.metrics_snapshot()['statements'], {})
+
+	def test_errors(self):
+		with self.assertRaises(Exception):
+			self.client.execute('SELECT nope FROM users')
+		stats = self.client.metrics_snapshot()['statements']['SELECT nope FROM users']
+		self.assertEqual(stats['errors'], 1)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,38 @@
+import os, shutil, tempfile, threading, unittest
+
+from quick_sqlite3.client import SimpleClient
+
+class PoolTest(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.client = SimpleClient(database=os.path.join(self.directory, 'test.db'), enable_debug=False, pool_size=2)
+		self.client.create_table('users', (('username', 's'),))
+		self.client.insert_many_table('users', [('u%d' % i,) for i in range(100)], ('username',))
+
+	def tearDown(self):
+		self.client.close()
+		shutil.rmtree(self.directory)
+
+	def test_concurrent_reads(self):
+		counts = []
+		def read():
+			counts.append(self.client.count_table('users'))
+		threads = [threading.Thread(target=read) for i in range(4)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		self.assertEqual(counts, [100]*4)
+		stats = self.client.pool_stats()
+		self.assertTrue(1 <= stats['size'] <= 2)
+		self.assertEqual(stats['in_use'], 0)
+
+	def test_reads_see_committed_rows(self):
+		self.client.insert_table('users', {'username': 'new'})
+		self.assertEqual(self.client.count_table('users'), 100)
+		self.client.commit()
+		self.assertEqual(self.client.count_table('users'), 101)
+
+if __name__ == '__main__':
+	unittest.main()
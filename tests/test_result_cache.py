@@ -0,0 +1,63 @@
+import os, shutil, tempfile, threading, unittest
+
+from quick_sqlite3.client import SimpleClient
+
+class ResultCacheTest(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.clients = []
+
+	def tearDown(self):
+		for client in self.clients:
+			client.close()
+		shutil.rmtree(self.directory)
+
+	def make_client(self, **kwargs):
+		client = SimpleClient(database=os.path.join(self.directory, 'test.db'), 
+			enable_debug=False, result_cache_size=100, **kwargs)
+		self.clients.append(client)
+		client.create_table('users', (('username', 's'),))
+		return client
+
+	def test_write_queue_commit_invalidates(self):
+		client = self.make_client(enable_write_queue=True)
+		self.assertEqual(client.count_table('users'), 0)
+		client.insert_table('users', {'username': 'xiao'})
+		client.commit()
+		self.assertEqual(client.count_table('users'), 1)
+		with client.transaction():
+			client.insert_table('users', {'username': 'tom'})
+		self.assertEqual(client.count_table('users'), 2)
+		self.assertEqual(len(client.select_table('users')), 2)
+
+	def test_read_before_group_commit(self):
+		client = self.make_client(enable_write_queue=True)
+		inserted = threading.Event()
+		release = threading.Event()
+		def job(con):
+			client._execute(con, 'INSERT INTO users(username) VALUES (?)', ('xiao',))
+			inserted.set()
+			release.wait(10)
+		future = client.writer.submit(job)
+		inserted.wait(10)
+		# the reader caches the committed snapshot while the insert is pending
+		self.assertEqual(client.count_table('users'), 0)
+		release.set()
+		future.result()
+		self.assertEqual(client.count_table('users'), 1)
+
+	def test_cached_rows_are_copied(self):
+		client = self.make_client()
+		client.insert_table('users', {'username': 'xiao'})
+		client.commit()
+		rows = client.select_table('users')
+		rows.append('garbage')
+		rows = client.select_table('users')
+		self.assertEqual(len(rows), 1)
+		rows.clear()
+		self.assertEqual(len(client.select_table('users')), 1)
+		self.assertGreater(client.result_cache_stats()['hits'], 0)
+
+if __name__ == '__main__':
+	unittest.main()
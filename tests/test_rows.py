@@ -0,0 +1,31 @@
+import unittest
+
+from quick_sqlite3.client import SimpleClient
+
+class FastRowsTest(unittest.TestCase):
+
+	def make_client(self, **kwargs):
+		client = SimpleClient(database=':memory:', enable_debug=False, enable_fast_rows=True, **kwargs)
+		self.addCleanup(client.close)
+		client.create_table('users', (('username', 's'), ('age', 'i')))
+		client.insert_many_table('users', [('xiao', 20), ('tom', None)], ('username', 'age'))
+		return client
+
+	def test_tuple_rows(self):
+		client = self.make_client()
+		rows = client.select_table('users', ('username', 'age'), orderby=('id',))
+		self.assertEqual(rows, [('xiao', 20), ('tom', None)])
+		self.assertIs(type(rows[0]), tuple)
+		self.assertIs(type(rows[0][0]), str)
+
+	def test_namedtuple_rows(self):
+		client = self.make_client(fast_row_class='namedtuple')
+		row = client.one_table('users', (('username', 'tom'),))
+		self.assertEqual((row.username, row.age, row[1]), ('tom', None, 'tom'))
+
+	def test_invalid_row_class(self):
+		with self.assertRaises(Exception):
+			SimpleClient(database=':memory:', enable_debug=False, enable_fast_rows=True, fast_row_class='dict')
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+from quick_sqlite3.client import SimpleClient
+
+class SeekTest(unittest.TestCase):
+
+	def setUp(self):
+		self.client = SimpleClient(database=':memory:', enable_debug=False)
+		self.client.create_table('users', (('username', 's'), ('age', 'i')))
+		self.client.insert_many_table('users', [('u%02d' % i, i % 10) for i in range(50)], ('username', 'age'))
+
+	def tearDown(self):
+		self.client.close()
+
+	def test_pages(self):
+		seen = []
+		rows, cursor = self.client.seek_table('users', ('username',), (('age', 5, '<'),), page_num=7)
+		seen.extend(rows)
+		while cursor:
+			rows, cursor = self.client.seek_table('users', ('username',), (('age', 5, '<'),), page_num=7, cursor=cursor)
+			seen.extend(rows)
+		self.assertEqual(len(seen), 25)
+		self.assertEqual([row['id'] for row in seen], sorted(row['id'] for row in seen))
+
+	def test_composite_key_desc(self):
+		rows, cursor = self.client.seek_table('users', key=('age', 'id'), page_num=3, desc=True)
+		self.assertEqual([(row['age'], row['id']) for row in rows], [(9, 50), (9, 40), (9, 30)])
+		rows, cursor = self.client.seek_table('users', key=('age', 'id'), page_num=3, desc=True, cursor=cursor)
+		self.assertEqual([(row['age'], row['id']) for row in rows], [(9, 20), (9, 10), (8, 49)])
+
+	def test_invalid_cursor(self):
+		with self.assertRaises(Exception):
+			self.client.seek_table('users', cursor='not a cursor')
+
+if __name__ == '__main__':
+	unittest.main()
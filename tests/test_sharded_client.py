@@ -0,0 +1,45 @@
+import os, shutil, tempfile, unittest
+
+from quick_sqlite3.client import ShardedClient
+
+class ShardedClientTest(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		databases = [os.path.join(self.directory, 'shard-%d.db' % i) for i in range(3)]
+		self.client = ShardedClient(databases, shard_key='username', enable_debug=False)
+		self.client.create_table('users', (('username', 's'), ('age', 'i')))
+
+	def tearDown(self):
+		self.client.close()
+		shutil.rmtree(self.directory)
+
+	def test_insert_many_generator_in_batches(self):
+		batches = []
+		def rows():
+			for i in range(100):
+				# rows already read but not inserted are bounded by batch_size per shard
+				batches.append(i)
+				yield ('u%d' % i, i)
+		result = self.client.insert_many_table('users', rows(), ('username', 'age'), batch_size=8)
+		self.assertEqual(result['rows'], 100)
+		self.assertEqual(len(batches), 100)
+		self.assertEqual(self.client.count_table('users'), 100)
+		counts = self.client.broadcast('count_table', 'users')
+		self.assertEqual(sum(counts), 100)
+		self.assertTrue(all(count > 0 for count in counts))
+
+	def test_routing_and_merge(self):
+		self.client.insert_many_table('users', [{'username': 'u%d' % i, 'age': i} for i in range(30)])
+		self.assertEqual(self.client.count_table('users', (('username', 'u7'),)), 1)
+		self.assertEqual(self.client.update_table('users', {'age': 100}, (('username', 'u7'),)), 1)
+		rows = self.client.select_table('users', ('username', 'age'), orderby=('age DESC',), page_nth=2, page_num=5)
+		self.assertEqual([row[1] for row in rows], [25, 24, 23, 22, 21])
+		self.assertEqual(self.client.one_table('users', orderby=('age DESC',))['username'], 'u7')
+		with self.assertRaises(Exception):
+			self.client.update_table('users', {'username': 'x'}, (('age', 1),))
+		with self.assertRaises(Exception):
+			self.client.insert_table('users', {'age': 1})
+
+if __name__ == '__main__':
+	unittest.main()
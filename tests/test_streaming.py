@@ -0,0 +1,29 @@
+import unittest
+
+from quick_sqlite3.client import SimpleClient
+
+class StreamingTest(unittest.TestCase):
+
+	def setUp(self):
+		self.client = SimpleClient(database=':memory:', enable_debug=False)
+		self.client.create_table('users', (('username', 's'), ('age', 'i')))
+		self.client.insert_many_table('users', [('u%02d' % i, i % 10) for i in range(50)], ('username', 'age'))
+
+	def tearDown(self):
+		self.client.close()
+
+	def test_select_table_stream(self):
+		rows = self.client.select_table('users', orderby=('id',), stream=True, batch_size=7)
+		self.assertFalse(isinstance(rows, list))
+		self.assertEqual([row['username'] for row in rows], ['u%02d' % i for i in range(50)])
+
+	def test_iter_table(self):
+		rows = self.client.iter_table('users', ('username',), (('age', 3),), batch_size=2)
+		self.assertEqual([row[0] for row in rows], ['u03', 'u13', 'u23', 'u33', 'u43'])
+
+	def test_sql_stream(self):
+		rows = self.client.sql('SELECT username FROM users WHERE age=?', (3,), stream=True, batch_size=2)
+		self.assertEqual(len(list(rows)), 5)
+
+if __name__ == '__main__':
+	unittest.main()
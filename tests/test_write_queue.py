@@ -0,0 +1,74 @@
+import os, shutil, tempfile, threading, unittest
+
+from quick_sqlite3.client import SimpleClient
+
+class WriteQueueTransactionTest(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.client = SimpleClient(database=os.path.join(self.directory, 'test.db'), 
+			enable_debug=False, enable_write_queue=True, result_cache_size=100)
+		self.client.create_table('users', (('username', 's'),))
+
+	def tearDown(self):
+		self.client.close()
+		shutil.rmtree(self.directory)
+
+	def test_rollback_on_exception(self):
+		self.assertEqual(self.client.count_table('users'), 0)
+		with self.assertRaises(ValueError):
+			with self.client.transaction():
+				self.client.insert_table('users', {'username': 'xiao'})
+				self.client.insert_many_table('users', [('tom',), ('jim',)], ('username',))
+				raise ValueError('stop')
+		self.assertEqual(self.client.count_table('users'), 0)
+		# later writes are not affected
+		self.client.insert_table('users', {'username': 'lily'})
+		self.client.commit()
+		self.assertEqual(self.client.count_table('users'), 1)
+
+	def test_commit_on_success(self):
+		self.assertEqual(self.client.count_table('users'), 0)
+		with self.client.transaction():
+			self.client.insert_table('users', {'username': 'xiao'})
+			self.client.insert_many_table('users', [('tom',), ('jim',)], ('username',))
+			self.client.commit()
+		# the cached count is invalidated after the block is committed
+		self.assertEqual(self.client.count_table('users'), 3)
+
+	def test_other_threads_wait_for_block(self):
+		entered = threading.Event()
+		finished = []
+		def writer():
+			entered.wait()
+			self.client.insert_table('users', {'username': 'other'})
+			finished.append(True)
+		thread = threading.Thread(target=writer)
+		thread.start()
+		with self.assertRaises(ValueError):
+			with self.client.transaction():
+				self.client.insert_table('users', {'username': 'xiao'})
+				entered.set()
+				thread.join(0.2)
+				self.assertEqual(finished, [])
+				raise ValueError('stop')
+		thread.join()
+		self.client.commit()
+		self.assertEqual([row['username'] for row in self.client.select_table('users')], ['other'])
+
+	def test_flush_inside_block_raises(self):
+		directory = self.directory
+		with self.client.transaction():
+			self.client.insert_table('users', {'username': 'xiao'})
+			with self.assertRaises(Exception):
+				self.client.dump(os.path.join(directory, 'dump.sql'))
+			with self.assertRaises(Exception):
+				self.client.export_tables(['users'], directory)
+			with self.assertRaises(Exception):
+				self.client.close()
+		self.client.commit()
+		self.assertEqual(self.client.count_table('users'), 1)
+		self.assertTrue(self.client.dump(os.path.join(directory, 'dump.sql'))['statements'] > 0)
+
+if __name__ == '__main__':
+	unittest.main()